@@ -1,17 +1,11 @@
-import os
-import subprocess
+import argparse
+import sys
+import cli
 
-def main():
+def print_instructions(excel_file_path, mode):
     """
-    Main function to execute the pointer diagram script.
-    - Ensures the required Excel file exists.
-    - Provides instructions to the user.
-    - Runs the pointer diagram script using subprocess.
+    Gibt die Hinweise zum Aufbau der Excel-Datei und zur Bedienung aus.
     """
-    # Dateipfad zur Excel-Datei
-    excel_file_path = './data/input.xlsx'
-
-    # Hinweise an den Nutzer
     print(f"Bitte stellen Sie sicher, dass die Excel-Datei {excel_file_path} die folgenden Blätter enthält:")
     print("- 'Currents': Enthält die Ströme für jedes Szenario in separaten Spalten.")
     print("- 'Current Angles': Enthält die Winkel der Ströme für jedes Szenario in separaten Spalten.")
@@ -19,21 +13,54 @@ def main():
     print("- 'Voltages': Enthält die Spannungswerte für jedes Szenario in separaten Spalten.")
     print("- 'INN': Enthält den INN-Wert für jedes Szenario in einer separaten Spalte.")
     print("\nBitte füllen Sie die Excel-Datei entsprechend aus und speichern Sie sie ab.")
-    print("\n\nWährend der Ausführung des Programms:")
-    print("- Sie können durch die individuellen Diagramme navigieren, indem Sie die Pfeiltasten auf Ihrer Tastatur verwenden.")
-    print("- Nach dem Schließen des Diagrammfensters wird automatisch eine Zusammenfassung aller Szenarien angezeigt.")
-    input("Drücken Sie die Eingabetaste, um fortzufahren...")
-    
-    if not os.path.exists(os.path.abspath(excel_file_path)):
-        print(f"Fehler: Die Datei {excel_file_path} wurde nicht gefunden.")
-        return
-    
-    # Zeigerdigramm-Skript ausführen
-    print("\nStarte das Zeigerdiagramm-Skript...")
-    try:
-        subprocess.run(['python', 'zeigerdiagramme.py'], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Fehler bei der Ausführung des Zeigerdiagramm-Skripts: {e}")
+    if mode == 'show':
+        print("\n\nWährend der Ausführung des Programms:")
+        print("- Sie können durch die individuellen Diagramme navigieren, indem Sie die Pfeiltasten auf Ihrer Tastatur verwenden.")
+        print("- Nach dem Schließen des Diagrammfensters wird automatisch eine Zusammenfassung aller Szenarien angezeigt.")
+
+def build_parser():
+    """
+    Erstellt den Argument-Parser des Einstiegspunkts.
+    """
+    parser = argparse.ArgumentParser(
+        description="Zeigerdiagramme für Sternnetzwerke. Weitere Optionen bieten die Unterbefehle von cli.py."
+    )
+    parser.add_argument('input', nargs='?', default='./data/input.xlsx', help="Pfad zur Excel-Datei (Standard: %(default)s)")
+    parser.add_argument('-m', '--mode', choices=['show', 'render', 'export', 'report'], default='show',
+                        help="show: interaktiv anzeigen, render: Diagramme als Dateien, export: Ergebnistabelle, "
+                             "report: HTML-Bericht zum Weitergeben (Standard: %(default)s)")
+    parser.add_argument('-s', '--scenarios', default=None, help="Szenariobereich, z. B. '1-100' (nicht bei export; Standard: alle)")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Ausgabeverzeichnis (render, Standard: ./output) bzw. Ergebnisdatei (export, Standard: ./output/ergebnisse.csv; "
+                             "report, Standard: ./output/bericht.html)")
+    parser.add_argument('--method', choices=['geometric', 'millman'], default='geometric', help="Berechnung von N' (Standard: %(default)s)")
+    parser.add_argument('--validation', choices=['raise', 'quarantine', 'off'], default='raise',
+                        help="Fehlerhafte Szenarien melden und abbrechen, aussortieren oder nicht prüfen (Standard: %(default)s)")
+    parser.add_argument('-y', '--yes', '--no-prompt', dest='no_prompt', action='store_true',
+                        help="Hinweise und Rückfrage überspringen (für unbeaufsichtigte Läufe)")
+    return parser
+
+def main(argv=None):
+    """
+    Einstiegspunkt: Gibt die Hinweise aus, wartet auf eine Bestätigung und startet dann die
+    gewählte Ausgabe im selben Prozess (über die Unterbefehle von cli.py).
+    Ohne Terminal an stdin (z. B. in Skripten) wird nicht nachgefragt.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.scenarios is not None and args.mode == 'export':
+        parser.error("--scenarios wird im Modus 'export' nicht unterstützt.")
+
+    if not args.no_prompt and sys.stdin.isatty():
+        print_instructions(args.input, args.mode)
+        input("Drücken Sie die Eingabetaste, um fortzufahren...")
+
+    command = [args.mode, '--input', args.input, '--method', args.method, '--validation', args.validation]
+    if args.scenarios is not None:
+        command += ['--scenarios', args.scenarios]
+    if args.output is not None:
+        command += ['--output', args.output]
+    return cli.main(command)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import io
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from calculations import VALID_STATUSES
+from input_excel_data import load_scenarios_from_excel
+from scenario_set import ScenarioSet
+from plotting_functions import calculate_polygon_points, calculate_triangle_points, plot_diagram, solve_scenarios
+from instrumentation import stage
+
+# Standardeinstellungen, entsprechen denen von ZeigerDiagram
+DEFAULT_SETTINGS = {
+    'triangle_amplitude': 50,
+    'current_scale': 1.5,
+    'label_fontsize': 12,
+    'overview_label_fontsize': 10,
+    'figsize': (16, 16),
+    'dpi': 100
+}
+
+# Zustand der Worker-Prozesse (wird einmal pro Prozess in init_worker gesetzt)
+_worker_state = {}
+
+def init_worker(arrays, n_primes, shift_enabled, inn_angles, settings, systems=None, system_index=None):
+    """
+    Initialisiert einen Worker-Prozess: Agg-Backend aktivieren und die Szenariodaten einmalig übernehmen.
+    Bei Netzen (siehe render_network) enthält systems die (Name, Amplitude) der Systeme und system_index
+    für jedes Szenario den Index seines Systems; alle Systeme eines Workers haben gleich viele Phasen.
+    """
+    matplotlib.use('Agg')
+    scenarios = ScenarioSet(**arrays)
+    _worker_state.update(
+        scenarios=scenarios,
+        n_primes=n_primes,
+        shift_enabled=shift_enabled,
+        inn_angles=inn_angles,
+        settings=settings,
+        triangle_pts=calculate_triangle_points(settings['triangle_amplitude']),
+        systems=systems,
+        system_index=system_index,
+        polygons=[calculate_polygon_points(amplitude, scenarios.num_phases) for _, amplitude in systems or ()]
+    )
+
+def draw_scenario(ax, index, label_fontsize, result=None):
+    """
+    Zeichnet ein Szenario aus dem Worker-Zustand auf die übergebene Achse.
+    result: (optimal_n_prime, shift_enabled, inn_angle) des Szenarios, None = aus dem Worker-Zustand
+    """
+    state = _worker_state
+    if result is None:
+        result = (state['n_primes'][index], state['shift_enabled'][index], state['inn_angles'][index])
+    optimal_n_prime, shift_enabled, inn_angle = result
+    scenario = state['scenarios'][index]
+    title = f"Szenario {scenario.number}"
+    triangle_pts = state['triangle_pts']
+    if state['systems'] is not None:
+        system = state['system_index'][index]
+        triangle_pts = state['polygons'][system]
+        name = state['systems'][system][0]
+        title = f"{name} - {title}" if name else title
+    plot_diagram(
+        triangle_pts=triangle_pts,
+        optimal_n_prime=optimal_n_prime,
+        angles=scenario.voltages,
+        currents=scenario.currents,
+        current_angles=scenario.angles,
+        inn_value=scenario.inn_values,
+        inn_angle=inn_angle,
+        current_scale=state['settings']['current_scale'],
+        shift_enabled=shift_enabled,
+        ax=ax,
+        label_fontsize=label_fontsize
+    )
+    ax.set_title(title, fontsize=14)
+
+def render_files(indices, output_dir, formats):
+    """
+    Worker-Aufgabe: Rendert die Szenarien mit den übergebenen Indizes als einzelne Dateien.
+    Die Figur wird für alle Szenarien der Aufgabe wiederverwendet.
+
+    Rückgabewert:
+    Anzahl der gerenderten Szenarien.
+    """
+    settings = _worker_state['settings']
+    fig, ax = plt.subplots(figsize=settings['figsize'])
+    for index in indices:
+        draw_scenario(ax, index, settings['label_fontsize'])
+        number = _worker_state['scenarios'][index].number
+        for fmt in formats:
+            fig.savefig(os.path.join(output_dir, f"szenario_{number:05d}.{fmt}"), dpi=settings['dpi'])
+    plt.close(fig)
+    return len(indices)
+
+def render_pdf_part(pages, rows, cols, pdf_path):
+    """
+    Worker-Aufgabe: Zeichnet aufeinanderfolgende PDF-Seiten mit jeweils bis zu rows * cols Szenarien und schreibt sie
+    mit PdfPages als Vektorgrafik in die Teildatei pdf_path (siehe merge_pdf). Die Figur wird für alle Seiten wiederverwendet.
+
+    Parameter:
+    pages: Liste der Seiten, jede eine Liste von Indizes der Szenarien
+
+    Rückgabewert:
+    Anzahl der geschriebenen Seiten.
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+    settings = _worker_state['settings']
+    fig, axes = plt.subplots(rows, cols, figsize=(cols * 6, rows * 6))
+    axes = np.atleast_1d(axes).flatten()
+    with PdfPages(pdf_path) as pdf:
+        for indices in pages:
+            for ax, index in zip(axes, indices):
+                ax.axis('on')
+                draw_scenario(ax, index, settings['overview_label_fontsize'])
+            for ax in axes[len(indices):]:
+                ax.clear()
+                ax.axis('off')
+            pdf.savefig(fig, dpi=settings['dpi'])
+    plt.close(fig)
+    return len(pages)
+
+def render_thumbnails(indices, size, dpi, results=None):
+    """
+    Worker-Aufgabe: Rendert kleine Vorschaubilder der Szenarien mit den übergebenen Indizes.
+
+    Parameter:
+    indices: Indizes der Szenarien
+    size: float, Kantenlänge eines Vorschaubilds in Zoll
+    dpi: int, Auflösung der Vorschaubilder
+    results: Liste von (optimal_n_prime, shift_enabled, inn_angle) je Szenario (None = aus dem Worker-Zustand),
+             z. B. wenn die Ergebnisse beim Start des Pools noch nicht alle berechnet waren
+
+    Rückgabewert:
+    Liste von (index, PNG-Daten) Tupeln.
+    """
+    settings = _worker_state['settings']
+    fig, ax = plt.subplots(figsize=(size, size))
+    thumbnails = []
+    for position, index in enumerate(indices):
+        draw_scenario(ax, index, settings['overview_label_fontsize'], None if results is None else results[position])
+        ax.set_title('')
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi)
+        thumbnails.append((index, buffer.getvalue()))
+    plt.close(fig)
+    return thumbnails
+
+def merge_pdf(pdf_path, part_paths):
+    """
+    Fügt die Teildateien (siehe render_pdf_part) in der gegebenen Reihenfolge zu einem PDF zusammen (benötigt pypdf).
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError as e:
+        raise ImportError("Zum Zusammenfügen der PDF-Seiten wird pypdf benötigt (pip install pypdf).") from e
+    writer = PdfWriter()
+    for part_path in part_paths:
+        writer.append(part_path)
+    with open(pdf_path, 'wb') as f:
+        writer.write(f)
+
+def render_jobs(jobs, initargs, formats, workers, per_page):
+    """
+    Rendert Szenarien mit einem Prozesspool, dessen Worker mit initargs (siehe init_worker) initialisiert werden.
+
+    Parameter:
+    jobs: Liste von (Ausgabeverzeichnis, Indizes der Szenarien); das Verzeichnis muss existieren
+    formats, per_page: siehe render_scenarios
+    workers: int, Anzahl der Worker-Prozesse
+
+    Rückgabewert:
+    Liste der geschriebenen Verzeichnisse bzw. PDF-Dateien.
+    """
+    file_formats = [fmt for fmt in formats if fmt != 'pdf']
+    total = sum(len(indices) for _, indices in jobs)
+    written = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as executor:
+        if file_formats:
+            # Mehrere kleine Aufgaben pro Worker für eine gleichmäßige Auslastung
+            chunk_size = max(1, min(50, total // (workers * 4)))
+            tasks = [(indices[i:i + chunk_size], output_dir) for output_dir, indices in jobs for i in range(0, len(indices), chunk_size)]
+            done = 0
+            with stage('render.files'):
+                for count in executor.map(render_files, [task[0] for task in tasks], [task[1] for task in tasks], [file_formats] * len(tasks)):
+                    done += count
+                    print(f"{done}/{total} Szenarien gerendert")
+            written.extend(output_dir for output_dir, _ in jobs)
+
+        if 'pdf' in formats:
+            cols = int(np.ceil(np.sqrt(per_page)))
+            rows = int(np.ceil(per_page / cols))
+            for output_dir, indices in jobs:
+                pages = [indices[i:i + per_page] for i in range(0, len(indices), per_page)]
+                pdf_path = os.path.join(output_dir, 'zeigerdiagramme.pdf')
+                # Aufeinanderfolgende Seiten pro Aufgabe, jede Aufgabe schreibt eine eigene Teildatei
+                pages_per_part = max(1, min(25, int(np.ceil(len(pages) / (workers * 2)))))
+                parts = [pages[i:i + pages_per_part] for i in range(0, len(pages), pages_per_part)]
+                part_dir = tempfile.mkdtemp(prefix='.zeigerdiagramme-', dir=output_dir)
+                try:
+                    part_paths = [os.path.join(part_dir, f'{i:05d}.pdf') for i in range(len(parts))]
+                    with stage('render.pdf'):
+                        list(executor.map(render_pdf_part, parts, [rows] * len(parts), [cols] * len(parts), part_paths))
+                        merge_pdf(pdf_path, part_paths)
+                finally:
+                    shutil.rmtree(part_dir, ignore_errors=True)
+                print(f"PDF mit {len(pages)} Seiten geschrieben: {pdf_path}")
+                written.append(pdf_path)
+
+    return written
+
+def render_scenarios(file_path, output_dir, formats=('png',), workers=None, method='geometric', per_page=4, scenario_range=None, use_cache=True, settings=None,
+                     skip_inconsistent=False, validate='raise'):
+    """
+    Rendert die Diagramme aller Szenarien ohne Fenster (Agg-Backend) in Dateien.
+    Die Berechnung von N' und I_NN läuft vektorisiert im Hauptprozess, das Zeichnen verteilt auf einen Prozesspool.
+
+    Parameter:
+    file_path: str, Pfad zur Excel-Datei
+    output_dir: str, Ausgabeverzeichnis
+    formats: Ausgabeformate; 'png' und 'svg' erzeugen eine Datei pro Szenario,
+             'pdf' ein mehrseitiges PDF (zeigerdiagramme.pdf) mit per_page Szenarien pro Seite
+    workers: int, Anzahl der Worker-Prozesse (None = Anzahl der CPU-Kerne)
+    method: Methode zur Berechnung von N' ('geometric' oder 'millman')
+    per_page: int, Szenarien pro PDF-Seite
+    scenario_range: range der zu rendernden Szenario-Indizes, bezogen auf die Nummern in der Excel-Datei (None = alle)
+    use_cache: bool, Cache beim Laden der Excel-Datei verwenden
+    settings: dict, überschreibt Einträge aus DEFAULT_SETTINGS
+    skip_inconsistent: bool, Szenarien auslassen, für die der Solver keine zu den Messwerten passende Lösung findet
+                       (Status nicht in VALID_STATUSES, siehe SOLVER_STATUSES); sie werden stattdessen aufgelistet
+    validate: Prüfung der Eingangsdaten vor der Berechnung: 'raise', 'quarantine' (fehlerhafte Szenarien aussortieren) oder 'off'
+
+    Rückgabewert:
+    Liste der geschriebenen Dateien bzw. Verzeichnisse.
+    """
+    matplotlib.use('Agg')
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    os.makedirs(output_dir, exist_ok=True)
+
+    scenarios = load_scenarios_from_excel(file_path, use_cache=use_cache, validate=validate)
+    triangle_pts = calculate_triangle_points(settings['triangle_amplitude'])
+    n_primes, shift_enabled, inn_angles, solver = solve_scenarios(triangle_pts, scenarios, method, diagnostics=True, multi_start=skip_inconsistent)
+
+    numbers = scenarios.scenario_numbers()
+    indices = [index for index in range(len(scenarios)) if scenario_range is None or numbers[index] - 1 in scenario_range]
+    if skip_inconsistent:
+        skipped = [index for index in indices if solver.status[index] not in VALID_STATUSES]
+        for index in skipped:
+            print(f"Szenario {numbers[index]} ausgelassen: {solver.status[index]} (Residuum {solver.residual[index]:.3g})")
+        indices = [index for index in indices if solver.status[index] in VALID_STATUSES]
+    workers = workers or os.cpu_count() or 1
+
+    # Arrays als normale ndarrays übergeben (Memory-Maps aus dem Cache lassen sich nicht sinnvoll picklen)
+    arrays = {name: np.array(values) for name, values in scenarios.arrays().items()}
+    initargs = (arrays, n_primes, shift_enabled, inn_angles, settings)
+    return render_jobs([(output_dir, indices)], initargs, formats, workers, per_page)
+
+def system_dirname(name):
+    """
+    Name des Ausgabeverzeichnisses eines Systems (Zeichen außer Buchstaben, Ziffern, '.', '-' werden zu '_').
+    """
+    return re.sub(r'[^\w.-]+', '_', name).strip('_') or 'system'
+
+def render_network(file_path, output_dir, formats=('png',), workers=None, method='geometric', per_page=4, use_cache=True, settings=None,
+                   skip_inconsistent=False, validate='raise'):
+    """
+    Rendert die Diagramme aller Systeme eines Netzes (siehe network.load_network) ohne Fenster in Dateien,
+    je System in ein eigenes Unterverzeichnis (siehe system_dirname). N' wird für alle Systeme gemeinsam berechnet
+    (siehe solve_network); gezeichnet wird mit einem Prozesspool pro Anzahl der Phasen, der alle Systeme mit dieser
+    Anzahl auf einmal übernimmt.
+
+    Parameter wie render_scenarios; die Amplitude aus settings['triangle_amplitude'] gilt für Systeme ohne eigene Angabe.
+
+    Rückgabewert:
+    Liste der geschriebenen Verzeichnisse bzw. Dateien.
+    """
+    from network import load_network, solve_network
+
+    matplotlib.use('Agg')
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    network = load_network(file_path, default_amplitude=settings['triangle_amplitude'], use_cache=use_cache, validate=validate)
+    solved = solve_network(network, method, diagnostics=True, multi_start=skip_inconsistent)
+    workers = workers or os.cpu_count() or 1
+    written = []
+
+    for indices in network.phase_groups().values():
+        systems = [network[index] for index in indices]
+        jobs, start = [], 0
+        for index, system in zip(indices, systems):
+            status = solved[index][3].status
+            keep = np.ones(len(system), dtype=bool)
+            if skip_inconsistent:
+                keep = np.isin(status, VALID_STATUSES)
+                for position in np.flatnonzero(~keep):
+                    print(f"{system.name} Szenario {system.scenarios[int(position)].number} ausgelassen: {status[position]} "
+                          f"(Residuum {solved[index][3].residual[position]:.3g})")
+            system_dir = os.path.join(output_dir, system_dirname(system.name)) if len(network) > 1 or system.name else output_dir
+            os.makedirs(system_dir, exist_ok=True)
+            jobs.append((system_dir, (start + np.flatnonzero(keep)).tolist()))
+            start += len(system)
+
+        combined = ScenarioSet.concatenate(system.scenarios for system in systems)
+        arrays = {name: np.array(values) for name, values in combined.arrays().items()}
+        arrays['numbers'] = np.concatenate([system.scenarios.scenario_numbers() for system in systems])
+        n_primes, shift_enabled, inn_angles = (np.concatenate([solved[index][part] for index in indices]) for part in range(3))
+        system_index = np.repeat(np.arange(len(systems)), [len(system) for system in systems])
+        initargs = (arrays, n_primes, shift_enabled, inn_angles, settings,
+                    [(system.name, system.amplitude) for system in systems], system_index)
+        written += render_jobs(jobs, initargs, formats, workers, per_page)
+    return written
@@ -0,0 +1,423 @@
+"""
+Benchmarks für die zeitkritischen Pfade: Laden, Berechnung von N'/I_NN, Einzeldiagramm und Übersicht.
+
+Aufruf aus dem Projektverzeichnis:
+    python benchmarks/run_benchmarks.py                      # alle Größen und Lastfälle
+    python benchmarks/run_benchmarks.py --quick              # nur 10 und 1000 Szenarien, weniger Wiederholungen
+    python benchmarks/run_benchmarks.py --only solve render  # nur ausgewählte Gruppen
+    python benchmarks/run_benchmarks.py --only startup       # nur die Importzeit des Rechenpfads
+    python benchmarks/run_benchmarks.py --compare alt.json   # Vergleich mit einem früheren Lauf
+
+Die Ergebnisse werden als JSON geschrieben (Standard: benchmarks/results-<commit>.json).
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import scipy
+
+from synthetic import LOAD_KINDS, generate_scenarios, write_csv, write_excel
+from network import Network, StarSystem, solve_network
+from scenario_set import ScenarioSet
+from batch_render import DEFAULT_SETTINGS, init_worker, render_thumbnails
+from input_excel_data import iter_scenarios, load_data_from_excel, load_scenarios_from_excel, parse_scenarios_from_excel
+from plotting_functions import (
+    DiagramRenderer, calculate_current_arrows, calculate_diagram_limits, calculate_inn_angle, calculate_n_prime_millman,
+    calculate_optimal_n_prime, calculate_optimal_n_prime_batch, calculate_triangle_points, draw_currents, plot_diagram,
+    solve_scenarios
+)
+
+DEFAULT_SIZES = (10, 1000, 100000)
+QUICK_SIZES = (10, 1000)
+GROUPS = ('load', 'solve', 'render', 'overview', 'startup')
+# Zielwert für den Start ohne Grafik (Export, Berechnung): Import der Rechen- und Lademodule
+# höchstens so viel länger als der Import von numpy allein
+STARTUP_TARGET_MS = 100
+COMPUTE_MODULES = ('calculations', 'input_excel_data', 'scenario_set', 'result_cache')
+HEAVY_MODULES = ('matplotlib', 'pandas', 'scipy.optimize')
+NETWORK_SYSTEMS = 20  # Anzahl der Systeme im Netz-Benchmark
+EXCEL_MAX_SCENARIOS = 16383  # Excel erlaubt 16384 Spalten, eine davon ist die Beschreibung
+
+def measure(func, repeats, warmup=1):
+    """
+    Führt func warmup-mal ohne und repeats-mal mit Zeitmessung aus.
+
+    Rückgabewert:
+    Liste der Laufzeiten in Sekunden.
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+def peak_memory(func):
+    """
+    Spitzenwert des mit tracemalloc verfolgten Speichers während eines Aufrufs von func in MB.
+    Getrennt von der Zeitmessung, weil tracemalloc die Laufzeit deutlich verlängert.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+def latency_stats(times):
+    """
+    Latenz-Perzentilen in ms aus einem Array von Laufzeiten in Sekunden.
+    """
+    return {
+        'min': float(times.min() * 1e3),
+        'mean': float(times.mean() * 1e3),
+        'p50': float(np.percentile(times, 50) * 1e3),
+        'p95': float(np.percentile(times, 95) * 1e3),
+        'p99': float(np.percentile(times, 99) * 1e3),
+    }
+
+def run_case(name, kind, num_scenarios, func, items, repeats, warmup=1, memory=True):
+    """
+    Misst einen Benchmark-Fall.
+
+    Parameter:
+    name: str, Name des Falls (z. B. 'solve.batch')
+    kind: str, Lastfall der Szenarien
+    num_scenarios: int, Anzahl der erzeugten Szenarien
+    func: Funktion ohne Argumente, die einmal gemessen wird
+    items: int, Anzahl der pro Aufruf verarbeiteten Einheiten (Szenarien, Diagramme, Seiten)
+    repeats: int, Anzahl der gemessenen Aufrufe
+
+    Rückgabewert:
+    dict mit Latenz-Perzentilen (ms pro Aufruf), Durchsatz (Einheiten pro Sekunde) und Spitzenspeicher (MB).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):  # Ausgaben von scipy (disp=True) unterdrücken
+        times = np.array(measure(func, repeats, warmup))
+        peak = peak_memory(func) if memory else None
+    result = {
+        'name': name,
+        'kind': kind,
+        'scenarios': num_scenarios,
+        'items': items,
+        'repeats': repeats,
+        'latency_ms': latency_stats(times),
+        'throughput_per_s': float(items / np.median(times)),
+        'peak_memory_mb': peak
+    }
+    print(f"{name:<28} {kind:<11} {num_scenarios:>7}  p50 {result['latency_ms']['p50']:10.3f} ms  "
+          f"p95 {result['latency_ms']['p95']:10.3f} ms  {result['throughput_per_s']:12.1f}/s  "
+          f"{'-' if peak is None else f'{peak:8.2f} MB'}")
+    return result
+
+def bench_load(scenarios, kind, repeats, tmp_dir):
+    """
+    Laden: Excel ohne und mit Cache (load_data_from_excel) sowie blockweises Lesen einer CSV-Datei.
+    """
+    n = len(scenarios)
+    results = []
+    if n <= EXCEL_MAX_SCENARIOS:
+        excel_path = os.path.join(tmp_dir, f"{kind}_{n}.xlsx")
+        write_excel(scenarios, excel_path)
+        results.append(run_case('load.excel_parse', kind, n, lambda: parse_scenarios_from_excel(excel_path), n, max(3, repeats // 4)))
+        load_scenarios_from_excel(excel_path, refresh_cache=True)
+        results.append(run_case('load.excel_cached', kind, n, lambda: load_scenarios_from_excel(excel_path), n, repeats))
+        results.append(run_case('load.load_data_from_excel', kind, n, lambda: load_data_from_excel(excel_path), n, repeats))
+
+    csv_path = os.path.join(tmp_dir, f"{kind}_{n}.csv")
+    write_csv(scenarios, csv_path)
+    results.append(run_case('load.csv_chunks', kind, n, lambda: sum(len(chunk) for chunk in iter_scenarios(csv_path)), n, max(3, repeats // 4)))
+    return results
+
+def scale_voltages(scenarios, factor):
+    """
+    ScenarioSet mit um factor skalierten Spannungen (gleiche Lösung bei factor-facher Amplitude).
+    """
+    return ScenarioSet(**{**scenarios.arrays(), 'voltages': scenarios.voltages * factor, 'unn_values': scenarios.unn_values * factor})
+
+def bench_solve(scenarios, kind, repeats, triangle_pts):
+    """
+    Berechnung: N' vektorisiert, skalar (Stichprobe), nach Millman, Winkel von I_NN und solve_scenarios komplett,
+    außerdem ein Netz aus NETWORK_SYSTEMS Systemen mit unterschiedlichen Amplituden gemeinsam (solve_network)
+    und System für System.
+    """
+    n = len(scenarios)
+    sample = scenarios[np.arange(min(n, 50))]
+    parts = np.array_split(np.arange(n), min(n, NETWORK_SYSTEMS))
+    network = Network(StarSystem(f"System {i + 1}", 50 * (1 + i), scale_voltages(scenarios[part], 1 + i)) for i, part in enumerate(parts))
+    results = [
+        run_case('solve.batch', kind, n, lambda: calculate_optimal_n_prime_batch(triangle_pts, scenarios), n, repeats),
+        run_case('solve.scalar', kind, n, lambda: [calculate_optimal_n_prime(triangle_pts, s.unn_values, s.voltages) for s in sample],
+                 len(sample), max(3, repeats // 4)),
+        run_case('solve.millman', kind, n, lambda: calculate_n_prime_millman(triangle_pts, scenarios.impedances), n, repeats),
+        run_case('solve.inn_angle', kind, n, lambda: calculate_inn_angle(scenarios), n, repeats),
+        run_case('solve.scenarios', kind, n, lambda: solve_scenarios(triangle_pts, scenarios), n, repeats),
+        run_case('solve.network', kind, n, lambda: solve_network(network), n, repeats),
+        run_case('solve.network_loop', kind, n, lambda: [solve_scenarios(system.polygon_points(), system.scenarios) for system in network],
+                 n, repeats)
+    ]
+    return results
+
+def enable_blit(renderer):
+    """
+    Schaltet das Blitting eines DiagramRenderer wie auf einem interaktiven Backend ein. Agg unterstützt
+    copy_from_bbox und restore_region, DiagramRenderer verzichtet dort aber auf Blitting.
+    """
+    renderer.blit = True
+    for artist in renderer.dynamic_artists:
+        artist.set_animated(True)
+    renderer.fig.canvas.mpl_connect('draw_event', renderer.on_draw)
+
+def bench_render(scenarios, kind, repeats, triangle_pts, solved):
+    """
+    Einzeldiagramm: plot_diagram inklusive Rasterung, draw_currents allein und DiagramRenderer.update.
+    - render.renderer_update: ohne Blitting (wie mit Agg), jedes Bild wird vollständig neu gezeichnet
+    - render.renderer_blit: mit Blitting (enable_blit), also restore_region, draw_artist der veränderlichen
+      Artists einschließlich Legende und blit; nur wenn ein Szenario nicht in die bisherigen Achsengrenzen passt
+      (sie werden nur erweitert), wird wie im Fenster vollständig neu gezeichnet
+    - render.renderer_blit_fixed: wie render.renderer_blit mit festen Achsengrenzen, misst also fast nur den Blit-Pfad
+    Bei den Blit-Fällen steht der Anteil vollständiger Neuzeichnungen unter 'full_redraw_share'. Die Übertragung
+    des Bildes auf den Bildschirm (blit ist bei Agg ohne Wirkung) ist nicht enthalten; auf einem GUI-Backend
+    kommt sie zu den gemessenen Zeiten hinzu.
+    Gemessen wird jeweils ein Diagramm pro Aufruf, die Szenarien werden reihum aus den ersten 20 gewählt.
+    """
+    n = len(scenarios)
+    n_primes, shift_enabled, inn_angles = solved
+    settings = DEFAULT_SETTINGS
+    indices = itertools.cycle(range(min(n, 20)))
+
+    fig, ax = plt.subplots(figsize=settings['figsize'], dpi=settings['dpi'])
+
+    def draw_plot_diagram():
+        i = next(indices)
+        s = scenarios[i]
+        plot_diagram(triangle_pts, n_primes[i], s.voltages, s.currents, s.angles, s.inn_values, inn_angles[i],
+                     current_scale=settings['current_scale'], shift_enabled=shift_enabled[i], ax=ax, label_fontsize=settings['label_fontsize'])
+        fig.canvas.draw()
+
+    def draw_only_currents():
+        i = next(indices)
+        s = scenarios[i]
+        ax.clear()
+        xlim, ylim = calculate_diagram_limits(triangle_pts, n_primes[i], shift_enabled[i])
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        draw_currents(ax, n_primes[i], s.currents, s.angles, settings['current_scale'], settings['label_fontsize'], [], 'I', 'red')
+
+    results = [
+        run_case('render.plot_diagram', kind, n, draw_plot_diagram, 1, repeats),
+        run_case('render.draw_currents', kind, n, draw_only_currents, 1, repeats),
+        run_case('render.current_arrows', kind, n, lambda: calculate_current_arrows(
+            n_primes[0], scenarios.currents[0], scenarios.angles[0], settings['current_scale'],
+            *calculate_diagram_limits(triangle_pts, n_primes[0], shift_enabled[0])), 1, repeats)
+    ]
+    plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=settings['figsize'], dpi=settings['dpi'])
+    renderer = DiagramRenderer(ax, triangle_pts, current_scale=settings['current_scale'], label_fontsize=settings['label_fontsize'])
+    fig.canvas.draw()
+
+    def update_renderer():
+        i = next(indices)
+        s = scenarios[i]
+        renderer.update(n_primes[i], s.voltages, s.currents, s.angles, s.inn_values, inn_angles[i], shift_enabled[i])
+
+    results.append(run_case('render.renderer_update', kind, n, update_renderer, 1, repeats))
+    plt.close(fig)
+
+    for name, limits in (('render.renderer_blit', None), ('render.renderer_blit_fixed', ((-150, 150), (-150, 150)))):
+        fig, ax = plt.subplots(figsize=settings['figsize'], dpi=settings['dpi'])
+        renderer = DiagramRenderer(ax, triangle_pts, current_scale=settings['current_scale'], label_fontsize=settings['label_fontsize'],
+                                   limits=limits)
+        enable_blit(renderer)
+        draws = []
+        fig.canvas.mpl_connect('draw_event', lambda event: draws.append(1))
+        renderer.update(n_primes[0], scenarios[0].voltages, scenarios[0].currents, scenarios[0].angles, scenarios[0].inn_values,
+                        inn_angles[0], shift_enabled[0], redraw=False)
+        fig.canvas.draw()
+        draws.clear()
+        calls = []
+
+        def update_blit(renderer=renderer):
+            calls.append(1)
+            i = next(indices)
+            s = scenarios[i]
+            renderer.update(n_primes[i], s.voltages, s.currents, s.angles, s.inn_values, inn_angles[i], shift_enabled[i])
+
+        result = run_case(name, kind, n, update_blit, 1, repeats)
+        result['full_redraw_share'] = len(draws) / len(calls)
+        results.append(result)
+        plt.close(fig)
+    return results
+
+def bench_overview(scenarios, kind, repeats, solved, rows=3, cols=4):
+    """
+    Übersicht: eine Seite Vorschaubilder (rows * cols) im aktuellen Prozess rendern, wie es ein Worker
+    des OverviewBrowser tut. Der Durchsatz ist in Vorschaubildern pro Sekunde angegeben.
+    """
+    n = len(scenarios)
+    per_page = min(n, rows * cols)
+    arrays = {name: np.array(values) for name, values in scenarios.arrays().items()}
+    init_worker(arrays, *solved, dict(DEFAULT_SETTINGS))
+    pages = itertools.cycle(range(max(1, n // per_page)))
+
+    def render_page():
+        start = next(pages) * per_page
+        render_thumbnails(range(start, start + per_page), 4, 50)
+
+    return [run_case('overview.thumbnail_page', kind, n, render_page, per_page, max(3, repeats // 4))]
+
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import numpy
+numpy_done = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+done = time.perf_counter()
+print(numpy_done - start, done - numpy_done, *[m for m in {heavy!r} if m in sys.modules])
+"""
+
+def bench_startup(repeats):
+    """
+    Importzeit des Rechenpfads (COMPUTE_MODULES) in jeweils frischen Interpretern, gemessen als
+    Zusatzzeit gegenüber dem Import von numpy. Geprüft wird außerdem, dass dabei weder matplotlib
+    noch pandas oder scipy.optimize geladen werden.
+    """
+    script = STARTUP_SCRIPT.format(modules=COMPUTE_MODULES, heavy=HEAVY_MODULES)
+    numpy_times, overheads = [], []
+    loaded = set()
+    for _ in range(repeats + 1):
+        output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+        numpy_times.append(float(output[0]))
+        overheads.append(float(output[1]))
+        loaded.update(output[2:])
+    numpy_times, overheads = np.array(numpy_times[1:]), np.array(overheads[1:])  # erster Lauf füllt nur den Dateicache
+    p50 = float(np.percentile(overheads, 50) * 1e3)
+    result = {
+        'name': 'startup.compute_imports',
+        'kind': '-',
+        'scenarios': 0,
+        'items': 1,
+        'repeats': repeats,
+        'latency_ms': latency_stats(overheads),
+        'numpy_import_ms': float(np.median(numpy_times) * 1e3),
+        'heavy_modules_loaded': sorted(loaded),
+        'target_ms': STARTUP_TARGET_MS,
+        'met': p50 <= STARTUP_TARGET_MS and not loaded
+    }
+    print(f"{result['name']:<28} {'-':<11} {0:>7}  p50 {p50:10.3f} ms  (numpy {result['numpy_import_ms']:.1f} ms, "
+          f"Ziel <= {STARTUP_TARGET_MS} ms: {'erreicht' if result['met'] else 'VERFEHLT'}"
+          f"{', geladen: ' + ', '.join(sorted(loaded)) if loaded else ''})")
+    return [result]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def environment():
+    """
+    Angaben zur Umgebung, damit Läufe auf verschiedenen Rechnern/Commits einzuordnen sind.
+    """
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'matplotlib': matplotlib.__version__
+    }
+
+def run_benchmarks(sizes, kinds, groups, repeats, seed=0):
+    """
+    Führt alle ausgewählten Benchmarks aus.
+
+    Rückgabewert:
+    dict mit 'environment' und der Liste 'results'.
+    """
+    triangle_pts = np.asarray(calculate_triangle_points(DEFAULT_SETTINGS['triangle_amplitude']))
+    results = bench_startup(max(5, repeats // 2)) if 'startup' in groups else []
+    if not set(groups) - {'startup'}:
+        sizes = ()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_scenarios in sizes:
+            for kind in kinds:
+                scenarios = generate_scenarios(num_scenarios, kind, seed=seed, triangle_amplitude=DEFAULT_SETTINGS['triangle_amplitude'])
+                solved = solve_scenarios(triangle_pts, scenarios)
+                if 'load' in groups:
+                    results += bench_load(scenarios, kind, repeats, tmp_dir)
+                if 'solve' in groups:
+                    results += bench_solve(scenarios, kind, repeats, triangle_pts)
+                if 'render' in groups:
+                    results += bench_render(scenarios, kind, repeats, triangle_pts, solved)
+                if 'overview' in groups:
+                    results += bench_overview(scenarios, kind, repeats, solved)
+    return {'environment': environment(), 'seed': seed, 'results': results}
+
+def compare(baseline_path, report):
+    """
+    Gibt das Verhältnis der p50-Latenzen zu einem früheren Lauf aus (> 1 = langsamer geworden).
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    old = {(r['name'], r['kind'], r['scenarios']): r for r in baseline['results']}
+    print(f"\nVergleich mit {baseline_path} (Commit {baseline['environment']['commit']}):")
+    for r in report['results']:
+        previous = old.get((r['name'], r['kind'], r['scenarios']))
+        if previous is None:
+            continue
+        ratio = r['latency_ms']['p50'] / previous['latency_ms']['p50']
+        marker = '  <-- langsamer' if ratio > 1.1 else ''
+        print(f"{r['name']:<28} {r['kind']:<11} {r['scenarios']:>7}  p50 x{ratio:6.2f}{marker}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für Laden, Berechnung und Rendern der Zeigerdiagramme")
+    parser.add_argument('--sizes', type=int, nargs='+', default=None, help="Anzahl der Szenarien (Standard: 10 1000 100000)")
+    parser.add_argument('--kinds', nargs='+', choices=LOAD_KINDS, default=list(LOAD_KINDS), help="Lastfälle (Standard: alle)")
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS), help="Benchmark-Gruppen (Standard: alle)")
+    parser.add_argument('--repeats', type=int, default=None, help="Wiederholungen pro Fall (Standard: 20, mit --quick 5)")
+    parser.add_argument('--quick', action='store_true', help="Nur 10 und 1000 Szenarien mit weniger Wiederholungen")
+    parser.add_argument('--seed', type=int, default=0, help="Startwert der Szenariogeneratoren (Standard: %(default)s)")
+    parser.add_argument('-o', '--output', default=None, help="JSON-Ausgabedatei (Standard: benchmarks/results-<commit>.json)")
+    parser.add_argument('--compare', default=None, help="Früheres JSON-Ergebnis zum Vergleich")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    repeats = args.repeats or (5 if args.quick else 20)
+    report = run_benchmarks(sizes, args.kinds, args.only, repeats, seed=args.seed)
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', f"results-{report['environment']['commit']}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nErgebnisse geschrieben: {output}")
+
+    if args.compare:
+        compare(args.compare, report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import numpy as np
+from scenario_set import ScenarioSet
+from plotting_functions import calculate_polygon_points, calculate_n_prime_millman
+
+# Lastfälle der synthetischen Szenarien
+LOAD_KINDS = ('balanced', 'unbalanced', 'open_phase')
+
+def generate_impedances(num_scenarios, kind, rng, num_phases=3):
+    """
+    Erzeugt komplexe Phasenimpedanzen (N, num_phases) für den gewünschten Lastfall.
+    - 'balanced': gleiche ohmsch-induktive Last in allen Phasen (±2 %)
+    - 'unbalanced': Beträge 5-50 Ohm und Winkel -30° bis 30° unabhängig pro Phase
+    - 'open_phase': wie 'unbalanced', aber eine zufällige Phase ist unterbrochen
+    """
+    if kind == 'balanced':
+        base = rng.uniform(10, 20, (num_scenarios, 1)) * np.exp(1j * np.radians(rng.uniform(0, 25, (num_scenarios, 1))))
+        return base * (1 + rng.uniform(-0.02, 0.02, (num_scenarios, num_phases)))
+    magnitudes = rng.uniform(5, 50, (num_scenarios, num_phases))
+    angles = rng.uniform(-30, 30, (num_scenarios, num_phases))
+    impedances = magnitudes * np.exp(1j * np.radians(angles))
+    if kind == 'open_phase':
+        impedances[np.arange(num_scenarios), rng.integers(0, num_phases, num_scenarios)] = 1e9
+    elif kind != 'unbalanced':
+        raise ValueError(f"Unbekannter Lastfall: {kind!r}")
+    return impedances
+
+def generate_scenarios(num_scenarios, kind='unbalanced', seed=0, triangle_amplitude=50, noise=0.005, num_phases=3):
+    """
+    Erzeugt ein physikalisch konsistentes ScenarioSet: Sternschaltung ohne Neutralleiter an einem
+    symmetrischen Netz mit der Amplitude triangle_amplitude. N' folgt aus dem Satz von Millman,
+    die Messwerte (Ströme, Spannungen, U_NN) erhalten ein relatives Messrauschen.
+
+    Parameter:
+    num_scenarios: int, Anzahl der Szenarien
+    kind: str, Lastfall (siehe LOAD_KINDS)
+    seed: int, Startwert des Zufallsgenerators (gleicher Seed = gleiche Szenarien)
+    triangle_amplitude: float, Amplitude der Strangspannungen
+    noise: float, relatives Messrauschen
+    num_phases: int, Anzahl der Phasen
+
+    Rückgabewert:
+    ScenarioSet mit Impedanzen.
+    """
+    rng = np.random.default_rng(seed)
+    triangle_pts = np.asarray(calculate_polygon_points(triangle_amplitude, num_phases))
+    sources = triangle_pts[:, 0] + 1j * triangle_pts[:, 1]
+    impedances = generate_impedances(num_scenarios, kind, rng, num_phases)
+
+    n_prime = calculate_n_prime_millman(triangle_pts, impedances)
+    n_prime = n_prime[:, 0] + 1j * n_prime[:, 1]
+    star_voltages = sources[None, :] - n_prime[:, None]
+    currents = star_voltages / impedances
+
+    def measure(values):
+        return values * (1 + rng.normal(0, noise, np.shape(values)))
+
+    return ScenarioSet(
+        currents=measure(np.abs(currents)),
+        angles=np.degrees(np.angle(currents)),
+        voltages=measure(np.abs(star_voltages)),
+        unn_values=measure(np.abs(n_prime)),
+        inn_values=np.abs(currents.sum(axis=1)),
+        impedances=impedances
+    )
+
+def write_excel(scenarios, file_path):
+    """
+    Schreibt ein ScenarioSet im Aufbau von data/input.xlsx (ein Szenario pro Spalte), mit Impedanzen
+    zusätzlich die Blätter 'Impedances' und 'Impedance Angles'. Excel erlaubt höchstens 16384 Spalten.
+    """
+    import pandas as pd
+    columns = [f"Szenario {i + 1}" for i in range(len(scenarios))]
+
+    def sheet(rows, labels):
+        df = pd.DataFrame(np.atleast_2d(rows), columns=columns)
+        df.insert(0, 'Beschreibung', labels)
+        return df
+
+    with pd.ExcelWriter(file_path) as writer:
+        sheet(scenarios.currents.T, ['Strom I1', 'Strom I2', 'Strom I3']).to_excel(writer, sheet_name='Currents', index=False)
+        sheet(scenarios.angles.T, ['Winkel I1', 'Winkel I2', 'Winkel I3']).to_excel(writer, sheet_name='Current Angles', index=False)
+        sheet(scenarios.inn_values, ['Strom INN']).to_excel(writer, sheet_name='INN', index=False)
+        sheet(scenarios.voltages.T, ['Spannung U1N', 'Spannung U2N', 'Spannung U3N']).to_excel(writer, sheet_name='Voltages', index=False)
+        sheet(scenarios.unn_values, ['Spannung UNN']).to_excel(writer, sheet_name='UNN', index=False)
+        if scenarios.impedances is not None:
+            phases = range(1, scenarios.num_phases + 1)
+            sheet(np.abs(scenarios.impedances).T, [f'Impedanz Z{k}' for k in phases]).to_excel(writer, sheet_name='Impedances', index=False)
+            sheet(np.degrees(np.angle(scenarios.impedances)).T, [f'Winkel Z{k}' for k in phases]).to_excel(
+                writer, sheet_name='Impedance Angles', index=False)
+
+def write_csv(scenarios, file_path):
+    """
+    Schreibt ein ScenarioSet als CSV mit einer Zeile pro Szenario (Spalten siehe scenario_columns).
+    """
+    import pandas as pd
+    from input_excel_data import scenario_columns
+    data = {}
+    for name, columns in scenario_columns(scenarios.num_phases).items():
+        values = getattr(scenarios, name)
+        if values.ndim == 1:
+            data[columns] = values
+        else:
+            data.update({column: values[:, i] for i, column in enumerate(columns)})
+    pd.DataFrame(data).to_csv(file_path, index=False)
@@ -0,0 +1,704 @@
+import math
+from collections import namedtuple
+import numpy as np
+from instrumentation import count, timed
+
+# Result of the N' solver; for a batch every field is an array with one entry per scenario
+SolverResult = namedtuple('SolverResult', [
+    'point',       # Coordinates of N'
+    'residual',    # RMS deviation of the distances from the measured values (see calculate_fit_residuals)
+    'iterations',  # Number of solver iterations (Newton steps, plus optimizer iterations of all starts for the fallback)
+    'status'       # One of SOLVER_STATUSES
+])
+
+# 'converged': solution found and consistent with the measurements
+# 'no_shift': U_NN = 0, N' stays at N without a solver run (residual NaN)
+# 'inconsistent': solver converged, but the measured distances do not intersect (residual above the tolerance)
+# 'at_bound': solution lies on the bounds derived from the triangle amplitude
+# 'failed': solver did not converge
+SOLVER_STATUSES = ('converged', 'no_shift', 'inconsistent', 'at_bound', 'failed')
+VALID_STATUSES = ('converged', 'no_shift')  # Results that can be drawn without misleading the reader
+RESIDUAL_TOLERANCE = 0.02  # Allowed RMS residual relative to the RMS of the measured distances
+BOUND_FACTOR = 3.0         # N' is searched within +-BOUND_FACTOR * triangle amplitude
+
+# Calculate the angle (in degrees) between two points
+def calculate_angle(x1, y1, x2, y2):
+    """
+    Calculate the angle (in degrees) between two points.
+    
+    Parameters:
+    x1, y1, x2, y2: Coordinates of the two points.
+    
+    Returns:
+    Angle in degrees between the two points.
+    """
+    return math.degrees(math.atan2(y2 - y1, x2 - x1))
+
+# Calculate the quadratic deviations of the distances for the given point p
+def combined_distance_error(p, triangle_pts, u_nn, u_values):
+    """
+    Calculate the quadratic deviations of the distances for the given point.
+    
+    Parameters:
+    p: Coordinates of the point.
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Distance from the origin to the point.
+    u_values: Distances from triangle vertices to the point.
+    
+    Returns:
+    Sum of squared errors of distances.
+    """
+    x, y = p
+    triangle_pts = np.asarray(triangle_pts, dtype=float)
+    # Distance from N to p
+    dist_n = abs(np.hypot(x, y) - u_nn)
+    # Distances from the triangle points L1, L2, L3 to p
+    dist_errors = np.abs(np.hypot(x - triangle_pts[:, 0], y - triangle_pts[:, 1]) - u_values)
+    # Sum of squared errors
+    return dist_n ** 2 + np.dot(dist_errors, dist_errors)
+
+# Calculate the gradient of combined_distance_error
+def combined_distance_error_gradient(p, triangle_pts, u_nn, u_values):
+    """
+    Calculate the analytic gradient of combined_distance_error with respect to the point.
+    Where the point coincides with N or a triangle vertex, the direction of that term is undefined and it is left out.
+
+    Parameters:
+    p: Coordinates of the point.
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Distance from the origin to the point.
+    u_values: Distances from triangle vertices to the point.
+
+    Returns:
+    Gradient as an array of shape (2,).
+    """
+    centers = np.vstack([np.zeros((1, 2)), np.asarray(triangle_pts, dtype=float)])
+    diff = np.asarray(p, dtype=float) - centers
+    dist = np.hypot(diff[:, 0], diff[:, 1])
+    radii = np.concatenate([[u_nn], np.asarray(u_values, dtype=float)])
+    weights = np.divide(2 * (dist - radii), dist, out=np.zeros_like(dist), where=dist > 1e-12)
+    return weights @ diff
+
+# Unpack the solver inputs if a ScenarioSet or Scenario is passed instead of arrays
+def _scenario_inputs(u_nn, u_values, impedances=None):
+    """
+    Return (u_nn, u_values, impedances), taking them from a ScenarioSet or Scenario if one is passed as u_nn.
+    """
+    if hasattr(u_nn, 'voltages'):
+        scenarios = u_nn
+        return scenarios.unn_values, scenarios.voltages, scenarios.impedances if impedances is None else impedances
+    return u_nn, u_values, impedances
+
+# Calculate the vertices of the regular polygon of an n-phase system
+def calculate_polygon_points(amplitude, num_phases=3):
+    """
+    Calculate the vertices L1..Ln of the regular polygon of a symmetric n-phase system.
+    L1 lies on the positive x-axis, the following phases are rotated by 360° / n each.
+
+    Parameters:
+    amplitude: Amplitude of the input voltages (distance of the vertices from N).
+    num_phases: Number of phases.
+
+    Returns:
+    List of coordinates of the polygon vertices.
+    """
+    # With two phases N, L1 and L2 lie on a line and N' is only determined up to a mirror image
+    if num_phases < 3:
+        raise ValueError(f"A star system needs at least 3 phases, got {num_phases}.")
+    return [
+        (amplitude * np.cos(np.radians(360 * k / num_phases)), amplitude * np.sin(np.radians(360 * k / num_phases)))
+        for k in range(num_phases)
+    ]
+
+# Calculate the vertices of the equilateral triangle based on the amplitude of the input voltages
+def calculate_triangle_points(triangle_amplitude):
+    """
+    Calculate the vertices of an equilateral triangle based on the amplitude of the input voltages.
+    
+    Parameters:
+    triangle_amplitude: Amplitude of the input voltages.
+    
+    Returns:
+    List of coordinates of the triangle vertices.
+    """
+    return calculate_polygon_points(triangle_amplitude, 3)
+
+# Calculate the box in which the solver searches for N'
+def solver_bounds(triangle_pts, factor=BOUND_FACTOR):
+    """
+    Calculate the bounds for N' from the triangle amplitude: +-factor * amplitude in x and y.
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    factor: Half width of the box relative to the triangle amplitude.
+
+    Returns:
+    Bounds ((x_min, x_max), (y_min, y_max)).
+    """
+    limit = factor * _triangle_amplitude(triangle_pts)
+    return ((-limit, limit), (-limit, limit))
+
+def _triangle_amplitude(triangle_pts):
+    return float(np.max(np.hypot(*np.asarray(triangle_pts, dtype=float).T)))
+
+# Calculate start points for the multi-start search
+def solver_start_points(triangle_pts, u_nn, u_values):
+    """
+    Calculate start points for the multi-start search of N': the closed-form linearized solution,
+    the centroid of the triangle and six points on the circle of radius U_NN around N
+    (towards and away from every triangle vertex).
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Distance from the origin to the point.
+    u_values: Distances from triangle vertices to the point.
+
+    Returns:
+    Array of shape (8, 2).
+    """
+    triangle_pts = np.asarray(triangle_pts, dtype=float)
+    rhs = np.sum(triangle_pts ** 2, axis=1) + u_nn ** 2 - np.asarray(u_values, dtype=float) ** 2
+    linearized = np.linalg.pinv(2 * triangle_pts) @ rhs
+    directions = triangle_pts / np.hypot(triangle_pts[:, 0], triangle_pts[:, 1])[:, None]
+    return np.vstack([linearized, np.mean(triangle_pts, axis=0), u_nn * directions, -u_nn * directions])
+
+def _measurement_scale(u_nn, u_values):
+    """
+    RMS of the measured distances (U_NN and the star voltages), scalar or shape (N,): the scale of the residual tolerance.
+    """
+    radii = np.concatenate([np.asarray(u_nn, dtype=float)[..., None], np.asarray(u_values, dtype=float)], axis=-1)
+    return np.sqrt(np.mean(radii ** 2, axis=-1))
+
+# Classify solver results
+def _solver_status(converged, points, residuals, scale, bounds, residual_tolerance):
+    """
+    Return the status (see SOLVER_STATUSES) for every row, as a string array of the same shape as residuals.
+    Residuals above residual_tolerance * scale (see _measurement_scale) are 'inconsistent'.
+    """
+    points = np.asarray(points, dtype=float)
+    status = np.where(np.asarray(residuals) > residual_tolerance * np.asarray(scale), 'inconsistent', 'converged')
+    if bounds is not None:
+        (x_min, x_max), (y_min, y_max) = bounds
+        margin = 1e-6 * (x_max - x_min)
+        on_bound = ((points[..., 0] <= x_min + margin) | (points[..., 0] >= x_max - margin) |
+                    (points[..., 1] <= y_min + margin) | (points[..., 1] >= y_max - margin))
+        status = np.where(on_bound, 'at_bound', status)
+    return np.where(converged, status, 'failed')
+
+# Solve for N' of a single scenario and report how well it went
+@timed('solve.scalar')
+def solve_n_prime(triangle_pts, u_nn, u_values=None, initial_guess=None, multi_start=False, bounds=True,
+                  residual_tolerance=RESIDUAL_TOLERANCE):
+    """
+    Calculate the optimal point N' of a single scenario by minimizing combined_distance_error
+    with L-BFGS-B and the analytic gradient (combined_distance_error_gradient).
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Distance from the origin to the point, or a Scenario providing both values.
+    u_values: Distances from triangle vertices to the point.
+    initial_guess: Start point of the optimizer (e.g. N' of the previous sample), defaults to the triangle centroid.
+    multi_start: Additionally start from solver_start_points and keep the best solution. With inconsistent
+                 measurements the objective has several local minima, a single start may end in the wrong one.
+    bounds: True for solver_bounds, None for an unbounded search, or explicit ((x_min, x_max), (y_min, y_max)).
+    residual_tolerance: RMS residual relative to the RMS of the measured distances above which the result is 'inconsistent'.
+
+    Returns:
+    SolverResult with the point of shape (2,), the RMS residual, the total number of iterations and the status.
+    """
+    from scipy.optimize import minimize  # Imported on first use, scipy.optimize takes several hundred ms to import
+
+    u_nn, u_values, _ = _scenario_inputs(u_nn, u_values)
+    triangle_pts = np.asarray(triangle_pts, dtype=float)
+    u_values = np.asarray(u_values, dtype=float)
+    if bounds is True:
+        bounds = solver_bounds(triangle_pts)
+    starts = [np.mean(triangle_pts, axis=0) if initial_guess is None else np.asarray(initial_guess, dtype=float)]
+    if multi_start:
+        starts.extend(solver_start_points(triangle_pts, u_nn, u_values))
+
+    best = None
+    iterations = 0
+    for start in starts:
+        if bounds is not None:
+            start = np.clip(start, [bounds[0][0], bounds[1][0]], [bounds[0][1], bounds[1][1]])
+        result = minimize(combined_distance_error, start, args=(triangle_pts, u_nn, u_values), jac=combined_distance_error_gradient,
+                          method='L-BFGS-B', bounds=bounds, options={'maxiter': 1000})
+        iterations += result.nit
+        count('solve.scalar_evaluations', result.nfev)
+        # Prefer converged runs, then the lowest error
+        if best is None or (result.success, -result.fun) > (best.success, -best.fun):
+            best = result
+    count('solve.scalar_iterations', iterations)
+
+    point = best.x
+    residual = float(calculate_fit_residuals(triangle_pts, point, u_nn, u_values))
+    status = str(_solver_status(best.success, point, residual, _measurement_scale(u_nn, u_values), bounds, residual_tolerance))
+    if status == 'failed':
+        count('solve.scalar_failures')
+    return SolverResult(point, residual, iterations, status)
+
+# Calculate the optimal point N' by minimizing the distance error
+def calculate_optimal_n_prime(triangle_pts, u_nn, u_values=None, initial_guess=None):
+    """
+    Calculate the optimal point N' by minimizing the distance error (see solve_n_prime for the diagnostics).
+    
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Distance from the origin to the point, or a Scenario providing both values.
+    u_values: Distances from triangle vertices to the point.
+    initial_guess: Start point of the optimizer (e.g. N' of the previous sample), defaults to the triangle centroid.
+    
+    Returns:
+    Coordinates of the optimal point N'. If the optimizer does not converge, the best point found is returned with a warning.
+    """
+    result = solve_n_prime(triangle_pts, u_nn, u_values, initial_guess=initial_guess)
+    if result.status == 'failed':
+        print(f"Warning: Optimization unsuccessful, N' may be inaccurate (residual {result.residual:.3g}).")
+    return result.point
+
+# Calculate the optimal points N' for many scenarios at once and report how well it went
+@timed('solve.batch')
+def solve_n_prime_batch(triangle_pts, u_nn, u_values=None, max_iter=50, tol=1e-10, initial_points=None, multi_start=False,
+                        bounds=True, residual_tolerance=RESIDUAL_TOLERANCE):
+    """
+    Calculate the optimal point N' for a whole batch of scenarios at once.
+    The circle equations around N, L1, L2, L3 are linearized to get a closed-form
+    least-squares start point, which is then refined by a vectorized Newton/Gauss-Newton
+    iteration on the distance residuals. Rows that do not converge or leave the bounds
+    fall back to solve_n_prime with multi-start.
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Array of shape (N,) with the distances from the origin to N', or a ScenarioSet providing both arrays.
+    u_values: Array of shape (N, 3) with the distances from the triangle vertices to N'.
+    max_iter: Maximum number of Newton iterations.
+    tol: Relative step size below which a row counts as converged.
+    initial_points: Array of shape (N, 2) or (2,) with start points (e.g. N' of the previous sample of a time series).
+                    Defaults to the closed-form linearized solution.
+    multi_start: Re-solve rows whose result is 'inconsistent' with solve_n_prime(multi_start=True) and keep the better solution.
+    bounds: True for solver_bounds, None for an unbounded search, or explicit ((x_min, x_max), (y_min, y_max)).
+    residual_tolerance: RMS residual relative to the RMS of the measured distances above which a result is 'inconsistent'.
+
+    Returns:
+    SolverResult with arrays of shape (N, 2) (points) and (N,) (residual, iterations, status).
+    Filter e.g. with result.status == 'converged'.
+    """
+    u_nn, u_values, _ = _scenario_inputs(u_nn, u_values)
+    triangle_pts = np.asarray(triangle_pts, dtype=float)
+    u_nn = np.asarray(u_nn, dtype=float).reshape(-1)
+    u_values = np.asarray(u_values, dtype=float).reshape(len(u_nn), -1)
+    if bounds is True:
+        bounds = solver_bounds(triangle_pts)
+    centers = np.vstack([np.zeros((1, 2)), triangle_pts])  # N, L1, L2, L3
+    radii = np.column_stack([u_nn, u_values])
+
+    # Closed-form start: |p - L|^2 - |p - N|^2 = U^2 - U_NN^2 is linear in p
+    if initial_points is None:
+        rhs = np.sum(triangle_pts ** 2, axis=1) + u_nn[:, None] ** 2 - u_values ** 2
+        points = rhs @ np.linalg.pinv(2 * triangle_pts).T
+    else:
+        initial_points = np.broadcast_to(np.asarray(initial_points, dtype=float).reshape(-1, 2), (len(u_nn), 2))
+        points = initial_points.copy()
+
+    converged = np.zeros(len(u_nn), dtype=bool)
+    iterations = np.zeros(len(u_nn), dtype=np.int64)
+    for _ in range(max_iter):
+        rows = np.flatnonzero(~converged)
+        if rows.size == 0:
+            break
+        count('solve.batch_iterations')
+        iterations[rows] += 1
+        p = points[rows]
+        diff = p[:, None, :] - centers[None, :, :]
+        dist = np.hypot(diff[..., 0], diff[..., 1])
+        # Residual direction is undefined when p sits exactly on a center; drop that row of the Jacobian
+        jac = np.divide(diff, dist[..., None], out=np.zeros_like(diff), where=dist[..., None] > 1e-12)
+        res = dist - radii[rows]
+
+        # Solve the 2x2 system H step = J^T r for every row. H is the exact Hessian of the squared residuals
+        # (quadratic convergence even with large residuals), or J^T J where the Hessian is not positive definite.
+        jtj = np.einsum('nki,nkj->nij', jac, jac)
+        jtr = np.einsum('nki,nk->ni', jac, res)
+        curvature = np.divide(res, dist, out=np.zeros_like(res), where=dist > 1e-12)
+        hessian = jtj + np.einsum('nk,ij->nij', curvature, np.eye(2)) - np.einsum('nk,nki,nkj->nij', curvature, jac, jac)
+        positive = (hessian[:, 0, 0] > 0) & (hessian[:, 0, 0] * hessian[:, 1, 1] - hessian[:, 0, 1] * hessian[:, 1, 0] > 0)
+        matrix = np.where(positive[:, None, None], hessian, jtj)
+        det = matrix[:, 0, 0] * matrix[:, 1, 1] - matrix[:, 0, 1] * matrix[:, 1, 0]
+        solvable = np.abs(det) > 1e-12
+        det = np.where(solvable, det, 1.0)
+        step = np.column_stack([
+            (matrix[:, 1, 1] * jtr[:, 0] - matrix[:, 0, 1] * jtr[:, 1]) / det,
+            (matrix[:, 0, 0] * jtr[:, 1] - matrix[:, 1, 0] * jtr[:, 0]) / det,
+        ])
+        step[~solvable] = 0.0
+        points[rows] = p - step
+
+        small = np.hypot(step[:, 0], step[:, 1]) <= tol * (1 + np.hypot(p[:, 0], p[:, 1]))
+        converged[rows] = solvable & small
+
+    failed = ~converged | ~np.all(np.isfinite(points), axis=1)
+    if bounds is not None:
+        (x_min, x_max), (y_min, y_max) = bounds
+        failed |= (points[:, 0] < x_min) | (points[:, 0] > x_max) | (points[:, 1] < y_min) | (points[:, 1] > y_max)
+    residuals = np.zeros(len(u_nn))
+    residuals[~failed] = calculate_fit_residuals(triangle_pts, points[~failed], u_nn[~failed], u_values[~failed])
+    status = _solver_status(~failed, points, residuals, _measurement_scale(u_nn, u_values), bounds, residual_tolerance).astype('<U12')
+
+    # Scalar optimizer only for the rows the batch method could not handle (and, with multi_start, the inconsistent ones)
+    retry = failed | (multi_start & (status == 'inconsistent'))
+    count('solve.batch_scenarios', len(u_nn))
+    count('solve.batch_fallbacks', int(np.count_nonzero(retry)))
+    for i in np.flatnonzero(retry):
+        start = None if initial_points is None else initial_points[i]
+        result = solve_n_prime(triangle_pts, u_nn[i], u_values[i], initial_guess=start, multi_start=True,
+                               bounds=bounds, residual_tolerance=residual_tolerance)
+        iterations[i] += result.iterations
+        if failed[i] or result.residual < residuals[i]:
+            points[i], residuals[i], status[i] = result.point, result.residual, result.status
+    return SolverResult(points, residuals, iterations, status)
+
+# Calculate the optimal points N' for many scenarios at once
+def calculate_optimal_n_prime_batch(triangle_pts, u_nn, u_values=None, max_iter=50, tol=1e-10, initial_points=None):
+    """
+    Calculate the optimal point N' for a whole batch of scenarios at once (see solve_n_prime_batch for the diagnostics).
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Array of shape (N,) with the distances from the origin to N', or a ScenarioSet providing both arrays.
+    u_values: Array of shape (N, 3) with the distances from the triangle vertices to N'.
+    max_iter: Maximum number of Newton iterations.
+    tol: Relative step size below which a row counts as converged.
+    initial_points: Array of shape (N, 2) or (2,) with start points, defaults to the closed-form linearized solution.
+
+    Returns:
+    Array of shape (N, 2) with the coordinates of N' for every scenario.
+    """
+    return solve_n_prime_batch(triangle_pts, u_nn, u_values, max_iter=max_iter, tol=tol, initial_points=initial_points).point
+
+# Calculate N' in closed form from the complex phase impedances (Millman's theorem)
+@timed('solve.millman')
+def calculate_n_prime_millman(triangle_pts, impedances, neutral_impedance=None):
+    """
+    Calculate the star point N' directly from the complex phase impedances using Millman's theorem:
+    U_N'N = sum(E_k / Z_k) / (sum(1 / Z_k) + 1 / Z_N)
+    The source voltages E_k are the triangle vertices interpreted as complex phasors.
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    impedances: Complex phase impedances, shape (3,) for one scenario or (N, 3) for a batch.
+    neutral_impedance: Complex impedance of the neutral conductor, None if there is no neutral conductor.
+
+    Returns:
+    Coordinates of N', shape (2,) for one scenario or (N, 2) for a batch.
+    """
+    triangle_pts = np.asarray(triangle_pts, dtype=float)
+    sources = triangle_pts[:, 0] + 1j * triangle_pts[:, 1]
+    admittances = 1 / np.asarray(impedances, dtype=np.complex128)
+    neutral_admittance = 0 if neutral_impedance is None else 1 / np.asarray(neutral_impedance, dtype=np.complex128)
+    u_nn = np.sum(admittances * sources, axis=-1) / (np.sum(admittances, axis=-1) + neutral_admittance)
+    return np.stack([u_nn.real, u_nn.imag], axis=-1)
+
+# Calculate N' with the selected method
+def calculate_n_prime(triangle_pts, u_nn, u_values=None, method='geometric', impedances=None, neutral_impedance=None, initial_guess=None):
+    """
+    Calculate the star point N' with the selected method.
+    - 'geometric': Least-squares fit of the measured distances (calculate_optimal_n_prime_batch).
+    - 'millman': Closed-form solution from the complex phase impedances (calculate_n_prime_millman).
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Distance from the origin to the point, scalar or array of shape (N,),
+          or a ScenarioSet/Scenario providing U_NN, the voltages and the impedances.
+    u_values: Distances from triangle vertices to the point, shape (3,) or (N, 3).
+    method: 'geometric' or 'millman'.
+    impedances: Complex phase impedances, required for 'millman'.
+    neutral_impedance: Complex impedance of the neutral conductor, None if there is no neutral conductor.
+    initial_guess: Start point(s) for 'geometric', shape (2,) or (N, 2) (e.g. N' of the previous sample).
+
+    Returns:
+    Coordinates of N', shape (2,) for one scenario or (N, 2) for a batch.
+    """
+    u_nn, u_values, impedances = _scenario_inputs(u_nn, u_values, impedances)
+    if method == 'geometric':
+        initial_points = None if initial_guess is None else np.atleast_2d(initial_guess)
+        points = calculate_optimal_n_prime_batch(triangle_pts, np.atleast_1d(u_nn), np.atleast_2d(u_values), initial_points=initial_points)
+        return points[0] if np.ndim(u_nn) == 0 else points
+    if method == 'millman':
+        if impedances is None:
+            raise ValueError("Method 'millman' requires the complex phase impedances.")
+        return calculate_n_prime_millman(triangle_pts, impedances, neutral_impedance)
+    raise ValueError(f"Unknown method for N': {method!r}")
+
+# Compare the closed-form N' against the geometric fit
+def check_n_prime_consistency(triangle_pts, u_nn, u_values=None, impedances=None, neutral_impedance=None, tolerance=0.05, geometric=None):
+    """
+    Compare N' from Millman's theorem with the geometric fit of the measured distances.
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    u_nn: Distance from the origin to the point, scalar or array of shape (N,),
+          or a ScenarioSet/Scenario providing U_NN, the voltages and the impedances.
+    u_values: Distances from triangle vertices to the point, shape (3,) or (N, 3).
+    impedances: Complex phase impedances, shape (3,) or (N, 3).
+    neutral_impedance: Complex impedance of the neutral conductor, None if there is no neutral conductor.
+    tolerance: Allowed deviation relative to the triangle amplitude.
+    geometric: N' already computed from the distances (e.g. by solve_scenarios), None to fit it here.
+
+    Returns:
+    Tuple (deviation, consistent): distance between both points and a boolean mask
+    whether it is within the tolerance.
+    """
+    u_nn, u_values, impedances = _scenario_inputs(u_nn, u_values, impedances)
+    if geometric is None:
+        geometric = calculate_n_prime(triangle_pts, u_nn, u_values, method='geometric')
+    millman = calculate_n_prime_millman(triangle_pts, impedances, neutral_impedance)
+    deviation = np.hypot(*np.moveaxis(geometric - millman, -1, 0))
+    amplitude = np.max(np.hypot(*np.asarray(triangle_pts, dtype=float).T))
+    return deviation, deviation <= tolerance * amplitude
+
+# Calculate the angle of I_NN based on the given currents and angles
+def calculate_inn_angle(currents, current_angles=None):
+    """
+    Calculate the angle of I_NN based on the given currents and angles.
+    Works on a single scenario (shape (3,)) or vectorized on a batch (shape (N, 3)).
+    
+    Parameters:
+    currents: Current magnitudes, or a ScenarioSet/Scenario providing currents and angles.
+    current_angles: Current angles in degrees.
+    
+    Returns:
+    Angle of I_NN in degrees (array of shape (N,) for a batch).
+    """
+    if hasattr(currents, 'angles'):
+        currents, current_angles = currents.currents, currents.angles
+    currents = np.asarray(currents, dtype=float)
+    current_angles = np.radians(np.asarray(current_angles, dtype=float))
+    real_sum = np.sum(currents * np.cos(current_angles), axis=-1)
+    imag_sum = np.sum(currents * np.sin(current_angles), axis=-1)
+    return np.degrees(np.arctan2(imag_sum, real_sum))
+
+# Calculate N' and the I_NN angle for all scenarios of a ScenarioSet
+@timed('solve.scenarios')
+def solve_scenarios(triangle_pts, scenarios, method='geometric', diagnostics=False, multi_start=False):
+    """
+    Calculate N' and the angle of I_NN for all scenarios of a ScenarioSet at once.
+    With the geometric method, scenarios with U_NN = 0 have no star point displacement (N' stays at N).
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    scenarios: ScenarioSet with the input data.
+    method: Method for N' ('geometric' or 'millman').
+    diagnostics: Additionally return a SolverResult for every scenario (residual, iterations, status),
+                 e.g. to leave out scenarios whose measurements are inconsistent.
+    multi_start: Re-solve inconsistent scenarios from several start points (geometric method only).
+
+    Returns:
+    Tuple (n_primes, shift_enabled, inn_angles) with arrays of shape (N, 2), (N,) and (N,),
+    with diagnostics followed by the SolverResult. Scenarios without a star point displacement have the status
+    'no_shift' and a NaN residual; with Millman the status only reflects the residual (0 iterations).
+    """
+    n_primes = np.zeros((len(scenarios), 2))
+    if method == 'geometric':
+        shift_enabled = scenarios.unn_values != 0
+    else:
+        shift_enabled = np.ones(len(scenarios), dtype=bool)
+    iterations = np.zeros(len(scenarios), dtype=np.int64)
+    converged = np.ones(len(scenarios), dtype=bool)
+    if np.any(shift_enabled):
+        if method == 'geometric':
+            result = solve_n_prime_batch(triangle_pts, scenarios[shift_enabled], multi_start=multi_start)
+            n_primes[shift_enabled] = result.point
+            iterations[shift_enabled] = result.iterations
+            converged[shift_enabled] = result.status != 'failed'
+        else:
+            n_primes[shift_enabled] = calculate_n_prime(triangle_pts, scenarios[shift_enabled], method=method)
+    inn_angles = calculate_inn_angle(scenarios)
+    if not diagnostics:
+        return n_primes, shift_enabled, inn_angles
+
+    residuals = np.full(len(scenarios), np.nan)
+    status = np.full(len(scenarios), 'no_shift', dtype='<U12')
+    if np.any(shift_enabled):
+        shifted = scenarios[shift_enabled]
+        residuals[shift_enabled] = calculate_fit_residuals(triangle_pts, n_primes[shift_enabled], shifted)
+        bounds = solver_bounds(triangle_pts) if method == 'geometric' else None
+        status[shift_enabled] = _solver_status(converged[shift_enabled], n_primes[shift_enabled], residuals[shift_enabled],
+                                               _measurement_scale(shifted.unn_values, shifted.voltages), bounds, RESIDUAL_TOLERANCE)
+    return n_primes, shift_enabled, inn_angles, SolverResult(n_primes, residuals, iterations, status)
+
+# Calculate N' and the I_NN angle chunk by chunk
+def solve_scenario_chunks(triangle_pts, chunks, method='geometric'):
+    """
+    Calculate N' and the angle of I_NN for a stream of ScenarioSet chunks (e.g. from iter_scenarios).
+    Only one chunk is held in memory at a time.
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    chunks: Iterable of ScenarioSet chunks.
+    method: Method for N' ('geometric' or 'millman').
+
+    Yields:
+    Tuple (chunk, n_primes, shift_enabled, inn_angles) for every chunk.
+    """
+    for chunk in chunks:
+        yield (chunk,) + solve_scenarios(triangle_pts, chunk, method)
+
+# Calculate the end points of the current arrows, shortened to the axis boundaries
+def calculate_current_arrows(optimal_n_prime, currents, current_angles, current_scale, xlim, ylim):
+    """
+    Calculate the end points of the current arrows starting at N'.
+    Arrows that would leave the axis boundaries are shortened to the boundary.
+    
+    Parameters:
+    optimal_n_prime: Coordinates of the optimal point N'.
+    currents: List of current magnitudes.
+    current_angles: List of current angles in degrees.
+    current_scale: Scaling factor for currents.
+    xlim, ylim: Axis boundaries (min, max).
+    
+    Returns:
+    List of tuples (end_x, end_y, clipped) for every current.
+    """
+    arrows = []
+    for current, angle in zip(currents, current_angles):
+        scaled_current = current / current_scale
+        dx = scaled_current * np.cos(np.radians(angle))
+        dy = scaled_current * np.sin(np.radians(angle))
+        end_x = optimal_n_prime[0] + dx
+        end_y = optimal_n_prime[1] + dy
+
+        # Check if the arrow needs to be shortened
+        clipped = False
+        if dx != 0 or dy != 0:
+            scale = np.inf
+            if dx != 0:
+                scale = min(scale, (xlim[1] - optimal_n_prime[0]) / dx if dx > 0 else (xlim[0] - optimal_n_prime[0]) / dx)
+            if dy != 0:
+                scale = min(scale, (ylim[1] - optimal_n_prime[1]) / dy if dy > 0 else (ylim[0] - optimal_n_prime[1]) / dy)
+
+            if scale < 1:
+                end_x = optimal_n_prime[0] + dx * scale
+                end_y = optimal_n_prime[1] + dy * scale
+                clipped = True
+        arrows.append((end_x, end_y, clipped))
+    return arrows
+
+# Calculate the axis boundaries of the diagram
+def calculate_diagram_limits(triangle_pts, optimal_n_prime, shift_enabled, margin=0.1):
+    """
+    Calculate the axis boundaries of the diagram: the bounding box of N, N' (if displacement is enabled)
+    and the triangle vertices, extended by the relative margin (same result as ax.margins(margin)).
+    
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    optimal_n_prime: Coordinates of the optimal point N'.
+    shift_enabled: Boolean indicating if star point displacement is enabled.
+    margin: Relative margin on each side.
+    
+    Returns:
+    Tuple (xlim, ylim).
+    """
+    points = [(0, 0)] + ([tuple(optimal_n_prime)] if shift_enabled else []) + [tuple(point) for point in triangle_pts]
+    xs, ys = np.asarray(points, dtype=float).T
+    limits = []
+    for values in (xs, ys):
+        low, high = values.min(), values.max()
+        pad = margin * (high - low)
+        limits.append((low - pad, high + pad))
+    return tuple(limits)
+
+def widen_limits(limits, other):
+    """
+    Smallest axis boundaries containing both limits.
+    
+    Parameters:
+    limits, other: Tuples (xlim, ylim).
+    
+    Returns:
+    Tuple (xlim, ylim).
+    """
+    return tuple((min(a[0], b[0]), max(a[1], b[1])) for a, b in zip(limits, other))
+
+# Calculate the residuals of the distance fit for given points N'
+def calculate_fit_residuals(triangle_pts, n_primes, u_nn, u_values=None):
+    """
+    Calculate the root mean square deviation between the distances of N' to N, L1, L2, L3 and the measured values.
+    Works vectorized on a batch.
+
+    Parameters:
+    triangle_pts: Coordinates of the triangle vertices.
+    n_primes: Coordinates of N', shape (2,) or (N, 2).
+    u_nn: Measured U_NN, scalar or shape (N,), or a ScenarioSet/Scenario providing U_NN and the voltages.
+    u_values: Measured distances from the triangle vertices, shape (3,) or (N, 3).
+
+    Returns:
+    RMS residual, scalar or shape (N,).
+    """
+    u_nn, u_values, _ = _scenario_inputs(u_nn, u_values)
+    centers = np.vstack([np.zeros((1, 2)), np.asarray(triangle_pts, dtype=float)])
+    n_primes = np.asarray(n_primes, dtype=float)
+    distances = np.hypot(n_primes[..., None, 0] - centers[:, 0], n_primes[..., None, 1] - centers[:, 1])
+    radii = np.concatenate([np.asarray(u_nn, dtype=float)[..., None], np.asarray(u_values, dtype=float)], axis=-1)
+    return np.sqrt(np.mean((distances - radii) ** 2, axis=-1))
+
+# Split n-phase phasors into symmetrical components
+def calculate_symmetrical_components(phasors, triangle_pts):
+    """
+    Calculate the zero, positive and negative sequence components of n-phase phasors
+    (discrete Fourier transform over the phases; for three phases the Fortescue transformation).
+    The positive sequence is the phase order of the polygon (L1 -> L2 -> ... -> Ln), so a balanced
+    system in that order has no negative sequence component.
+
+    Parameters:
+    phasors: Complex phasors of the phases, shape (n,) or (N, n).
+    triangle_pts: Coordinates of the polygon vertices.
+
+    Returns:
+    Tuple (zero, positive, negative) of complex arrays, scalar or shape (N,).
+    """
+    triangle_pts = np.asarray(triangle_pts, dtype=float)
+    sources = triangle_pts[:, 0] + 1j * triangle_pts[:, 1]
+    rotation = sources[1] / sources[0]
+    rotation /= abs(rotation)  # e^(j360°/n) for the default polygon
+    phasors = np.asarray(phasors, dtype=np.complex128)
+    powers = rotation ** np.arange(len(sources))
+    zero = phasors.sum(axis=-1) / len(sources)
+    positive = phasors @ np.conj(powers) / len(sources)
+    negative = phasors @ powers / len(sources)
+    return zero, positive, negative
+
+# Calculate the unbalance factors from the symmetrical components
+def calculate_unbalance(phasors, triangle_pts):
+    """
+    Calculate the negative and zero sequence unbalance factors |X2| / |X1| and |X0| / |X1|.
+
+    Parameters:
+    phasors: Complex phasors of the phases, shape (n,) or (N, n).
+    triangle_pts: Coordinates of the polygon vertices.
+
+    Returns:
+    Tuple (negative_factor, zero_factor), NaN where there is no positive sequence component.
+    """
+    zero, positive, negative = calculate_symmetrical_components(phasors, triangle_pts)
+    positive = np.abs(positive)
+    valid = positive > 1e-12
+    negative_factor = np.divide(np.abs(negative), positive, out=np.full(np.shape(positive), np.nan), where=valid)
+    zero_factor = np.divide(np.abs(zero), positive, out=np.full(np.shape(positive), np.nan), where=valid)
+    return negative_factor, zero_factor
+
+# Calculate the unbalance of magnitudes as maximum deviation from the mean (NEMA definition)
+def calculate_magnitude_unbalance(values):
+    """
+    Calculate the maximum deviation of the magnitudes from their mean, relative to the mean.
+
+    Parameters:
+    values: Magnitudes of the phases, shape (n,) or (N, n).
+
+    Returns:
+    Relative unbalance, scalar or shape (N,); NaN where the mean is zero.
+    """
+    values = np.asarray(values, dtype=float)
+    mean = np.mean(values, axis=-1)
+    deviation = np.max(np.abs(values - mean[..., None]), axis=-1)
+    return np.divide(deviation, mean, out=np.full(np.shape(mean), np.nan), where=mean > 1e-12)
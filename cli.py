@@ -0,0 +1,238 @@
+import argparse
+import os
+import sys
+
+SYSTEMS_HELP = ("Datei als Netz mit mehreren Sternsystemen lesen (Blatt 'Systems' bzw. Spalten 'System' und 'Amplitude', "
+                "beliebige Anzahl von Phasen); Ausgabe je System")
+VALIDATION_HELP = ("Prüfung der Eingangsdaten vor der Berechnung: 'raise' bricht ab und listet alle fehlerhaften Szenarien, "
+                   "'quarantine' sortiert sie aus, 'off' prüft nicht (Standard: %(default)s)")
+
+def parse_range(value):
+    """
+    Wandelt eine Szenario-Angabe wie '5' oder '1-100' (1-basiert, inklusive) in einen range von Indizes um.
+    """
+    try:
+        start, _, end = value.partition('-')
+        start = int(start)
+        end = int(end) if end else start
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiger Szenariobereich: {value!r} (erwartet z. B. '5' oder '1-100')")
+    if start < 1 or end < start:
+        raise argparse.ArgumentTypeError(f"Ungültiger Szenariobereich: {value!r}")
+    return range(start - 1, end)
+
+def run_show(args):
+    """
+    Unterbefehl 'show': Zeigt die Diagramme interaktiv an (Pfeiltasten-Navigation, danach die Übersicht).
+    """
+    from zeigerdiagramme import main as show_diagrams
+    try:
+        show_diagrams(args.input, scenario_range=args.scenarios, n_prime_method=args.method,
+                      overview=not args.no_overview, result_cache_path=args.result_cache, validate=args.validation)
+    except ValueError as e:
+        raise SystemExit(f"Fehler: {e}")
+
+def run_render(args):
+    """
+    Unterbefehl 'render': Rendert alle Szenarien ohne Fenster in Dateien.
+    """
+    from batch_render import render_network, render_scenarios
+    if args.systems:
+        if args.scenarios is not None:
+            raise SystemExit("Fehler: --scenarios wird zusammen mit --systems nicht unterstützt.")
+        render_network(
+            args.input,
+            args.output,
+            formats=args.format,
+            workers=args.workers,
+            method=args.method,
+            per_page=args.per_page,
+            use_cache=not args.no_cache,
+            settings={'dpi': args.dpi},
+            skip_inconsistent=args.skip_inconsistent,
+            validate=args.validation
+        )
+        return
+    render_scenarios(
+        args.input,
+        args.output,
+        formats=args.format,
+        workers=args.workers,
+        method=args.method,
+        per_page=args.per_page,
+        scenario_range=args.scenarios,
+        use_cache=not args.no_cache,
+        settings={'dpi': args.dpi},
+        skip_inconsistent=args.skip_inconsistent,
+        validate=args.validation
+    )
+
+def run_timeseries(args):
+    """
+    Unterbefehl 'timeseries': Animiert die Sternpunktverschiebung über ein Messprotokoll.
+    """
+    from timeseries import animate_time_series
+    try:
+        animate_time_series(
+            args.input,
+            output_path=args.output,
+            method=args.method,
+            time_column=args.time_column,
+            sample_rate=args.sample_rate,
+            step=args.step,
+            trail=args.trail,
+            fps=args.fps,
+            dpi=args.dpi,
+            validate=args.validation
+        )
+    except ValueError as e:
+        raise SystemExit(f"Fehler: {e}")
+
+def run_live(args):
+    """
+    Unterbefehl 'live': Zeigt das Diagramm zu einem laufenden Messdatenstrom an.
+    """
+    import functools
+    from livefeed import parse_source, replay_file, run_live as show_live
+    if args.replay:
+        if not os.path.exists(args.replay):
+            raise SystemExit(f"Fehler: Die Datei {args.replay} wurde nicht gefunden.")
+        reader = functools.partial(replay_file, args.replay, rate=args.rate, repeat=args.repeat)
+    else:
+        try:
+            reader = parse_source(args.source)
+        except ValueError as e:
+            raise SystemExit(f"Fehler: {e}")
+    show_live(reader, buffer_size=args.buffer, fps=args.fps, trail=args.trail, method=args.method)
+
+def run_export(args):
+    """
+    Unterbefehl 'export': Schreibt die berechneten Werte aller Szenarien als Tabelle (ohne matplotlib).
+    """
+    from results_export import export_results
+    try:
+        rows = export_results(args.input, args.output, method=args.method, chunk_size=args.chunk_size, use_cache=not args.no_cache,
+                              multi_start=args.multi_start, validate=args.validation, systems=args.systems)
+    except ValueError as e:
+        raise SystemExit(f"Fehler: {e}")
+    print(f"Ergebnisse von {rows} Szenarien geschrieben: {args.output}")
+
+def run_report(args):
+    """
+    Unterbefehl 'report': Schreibt alle Diagramme als eigenständigen HTML-Bericht (ohne matplotlib).
+    """
+    from html_report import write_report
+    try:
+        count = write_report(args.input, args.output, method=args.method, scenario_range=args.scenarios, use_cache=not args.no_cache,
+                             validate=args.validation, title=args.title)
+    except ValueError as e:
+        raise SystemExit(f"Fehler: {e}")
+    print(f"Bericht mit {count} Szenarien geschrieben: {args.output}")
+
+def build_parser():
+    """
+    Erstellt den Argument-Parser mit allen Unterbefehlen.
+    """
+    parser = argparse.ArgumentParser(prog='zeigerdiagramme', description="Zeigerdiagramme für Sternnetzwerke")
+    parser.add_argument('--profile', nargs='?', const=True, default=False, metavar='TRACE.json',
+                        help="Laufzeiten messen und beim Beenden zusammenfassen; mit Dateiname zusätzlich als Chrome-Trace "
+                             "(entspricht der Umgebungsvariable ZEIGER_PROFILE)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    show = subparsers.add_parser('show', help="Diagramme interaktiv anzeigen (Pfeiltasten-Navigation und Übersicht)")
+    show.add_argument('-i', '--input', default='./data/input.xlsx', help="Pfad zur Excel-Datei (Standard: %(default)s)")
+    show.add_argument('-s', '--scenarios', type=parse_range, default=None, help="Szenariobereich, z. B. '1-100' (Standard: alle)")
+    show.add_argument('--method', choices=['geometric', 'millman'], default='geometric', help="Berechnung von N' (Standard: %(default)s)")
+    show.add_argument('--no-overview', action='store_true', help="Nach dem Schließen des Fensters keine Übersicht anzeigen")
+    show.add_argument('--result-cache', default=None, help="Datei, in der berechnete Ergebnisse zwischen Läufen gespeichert werden")
+    show.add_argument('--validation', choices=['raise', 'quarantine', 'off'], default='raise', help=VALIDATION_HELP)
+    show.set_defaults(func=run_show)
+
+    render = subparsers.add_parser('render', help="Diagramme aller Szenarien ohne Fenster in Dateien rendern")
+    render.add_argument('-i', '--input', default='./data/input.xlsx', help="Pfad zur Excel-Datei (Standard: %(default)s)")
+    render.add_argument('-o', '--output', default='./output', help="Ausgabeverzeichnis (Standard: %(default)s)")
+    render.add_argument('-f', '--format', nargs='+', choices=['png', 'svg', 'pdf'], default=['png'],
+                        help="Ausgabeformate; 'pdf' erzeugt ein mehrseitiges PDF (Standard: png)")
+    render.add_argument('-w', '--workers', type=int, default=None, help="Anzahl der Worker-Prozesse (Standard: Anzahl der CPU-Kerne)")
+    render.add_argument('-s', '--scenarios', type=parse_range, default=None, help="Szenariobereich, z. B. '1-100' (Standard: alle)")
+    render.add_argument('--per-page', type=int, default=4, help="Szenarien pro PDF-Seite (Standard: %(default)s)")
+    render.add_argument('--dpi', type=int, default=100, help="Auflösung der Rastergrafiken (Standard: %(default)s)")
+    render.add_argument('--method', choices=['geometric', 'millman'], default='geometric', help="Berechnung von N' (Standard: %(default)s)")
+    render.add_argument('--no-cache', action='store_true', help="Cache der Excel-Datei nicht verwenden")
+    render.add_argument('--skip-inconsistent', action='store_true',
+                        help="Szenarien mit widersprüchlichen Messwerten (Solver-Status weder 'converged' noch 'no_shift') nicht rendern, sondern auflisten")
+    render.add_argument('--validation', choices=['raise', 'quarantine', 'off'], default='raise', help=VALIDATION_HELP)
+    render.add_argument('--systems', action='store_true', help=SYSTEMS_HELP + " in einem eigenen Unterverzeichnis")
+    render.set_defaults(func=run_render)
+
+    timeseries = subparsers.add_parser('timeseries', help="Messprotokoll (CSV/Parquet) als Animation anzeigen oder als Video exportieren")
+    timeseries.add_argument('-i', '--input', required=True, help="Pfad zur CSV- oder Parquet-Datei mit einer Zeile pro Messung")
+    timeseries.add_argument('-o', '--output', default=None,
+                            help="Videodatei (.mp4 benötigt ffmpeg, sonst .gif); ohne Angabe wird die Animation im Fenster gezeigt")
+    timeseries.add_argument('--time-column', default=None, help="Name der Zeitspalte (Standard: Zeit/Time/Timestamp, falls vorhanden)")
+    timeseries.add_argument('--sample-rate', type=float, default=1.0, help="Abtastrate in Hz, falls es keine Zeitspalte gibt (Standard: %(default)s)")
+    timeseries.add_argument('--step', type=int, default=1, help="Nur jede n-te Messung als Bild verwenden (Standard: %(default)s)")
+    timeseries.add_argument('--trail', type=int, default=None, help="Länge des angezeigten Verlaufs von N' in Messungen (Standard: gesamter Verlauf)")
+    timeseries.add_argument('--fps', type=float, default=25, help="Bilder pro Sekunde (Standard: %(default)s)")
+    timeseries.add_argument('--dpi', type=int, default=100, help="Auflösung des Videos (Standard: %(default)s)")
+    timeseries.add_argument('--method', choices=['geometric', 'millman'], default='geometric', help="Berechnung von N' (Standard: %(default)s)")
+    timeseries.add_argument('--validation', choices=['raise', 'quarantine', 'off'], default='raise', help=VALIDATION_HELP)
+    timeseries.set_defaults(func=run_timeseries)
+
+    export = subparsers.add_parser('export', help="Berechnete Werte (N', U_NN, I_NN, Unsymmetrie) als Tabelle exportieren")
+    export.add_argument('-i', '--input', default='./data/input.xlsx', help="Excel-, CSV- oder Parquet-Datei (Standard: %(default)s)")
+    export.add_argument('-o', '--output', default='./output/ergebnisse.csv', help="Ergebnisdatei .csv, .parquet oder .xlsx (Standard: %(default)s)")
+    export.add_argument('--method', choices=['geometric', 'millman'], default='geometric', help="Berechnung von N' (Standard: %(default)s)")
+    export.add_argument('--chunk-size', type=int, default=100000, help="Szenarien pro Block bei CSV/Parquet (Standard: %(default)s)")
+    export.add_argument('--no-cache', action='store_true', help="Cache der Excel-Datei nicht verwenden")
+    export.add_argument('--multi-start', action='store_true', help="Inkonsistente Szenarien von mehreren Startpunkten aus neu berechnen")
+    export.add_argument('--validation', choices=['raise', 'quarantine', 'off'], default='raise', help=VALIDATION_HELP)
+    export.add_argument('--systems', action='store_true', help=SYSTEMS_HELP + " mit den Spalten 'System' und 'Amplitude'")
+    export.set_defaults(func=run_export)
+
+    report = subparsers.add_parser('report', help="Alle Diagramme als eigenständige HTML-Datei mit Navigation und Übersicht exportieren")
+    report.add_argument('-i', '--input', default='./data/input.xlsx', help="Excel-, CSV- oder Parquet-Datei, auch mit mehreren Sternsystemen (Standard: %(default)s)")
+    report.add_argument('-o', '--output', default='./output/bericht.html', help="HTML-Datei (Standard: %(default)s)")
+    report.add_argument('-s', '--scenarios', type=parse_range, default=None, help="Szenariobereich, z. B. '1-100' (Standard: alle)")
+    report.add_argument('--method', choices=['geometric', 'millman'], default='geometric', help="Berechnung von N' (Standard: %(default)s)")
+    report.add_argument('--title', default=None, help="Überschrift des Berichts (Standard: Name der Eingabedatei)")
+    report.add_argument('--no-cache', action='store_true', help="Cache der Excel-Datei nicht verwenden")
+    report.add_argument('--validation', choices=['raise', 'quarantine', 'off'], default='raise', help=VALIDATION_HELP)
+    report.set_defaults(func=run_report)
+
+    live = subparsers.add_parser('live', help="Diagramm einem laufenden Messdatenstrom (stdin, TCP, Unix-Socket) folgen lassen")
+    live.add_argument('--source', default='-',
+                      help="Quelle: '-' (stdin), tcp://host:port, tcp-listen://host:port, unix:///pfad oder unix-listen:///pfad (Standard: stdin)")
+    live.add_argument('--replay', default=None, help="Aufzeichnung (JSON-Lines, Line-Protokoll, CSV oder Parquet) statt einer Messquelle abspielen")
+    live.add_argument('--rate', type=float, default=10, help="Messungen pro Sekunde beim Abspielen (Standard: %(default)s)")
+    live.add_argument('--repeat', action='store_true', help="Aufzeichnung in einer Schleife abspielen")
+    live.add_argument('--buffer', type=int, default=10000, help="Anzahl der Messungen im Ringpuffer (Standard: %(default)s)")
+    live.add_argument('--fps', type=float, default=10, help="Höchstens so viele Bilder pro Sekunde (Standard: %(default)s)")
+    live.add_argument('--trail', type=int, default=200, help="Länge des angezeigten Verlaufs von N' (Standard: %(default)s)")
+    live.add_argument('--method', choices=['geometric', 'millman'], default='geometric', help="Berechnung von N' (Standard: %(default)s)")
+    live.set_defaults(func=run_live)
+
+    return parser
+
+def main(argv=None):
+    """
+    Einstiegspunkt der Kommandozeile.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile:
+        import instrumentation
+        instrumentation.enable(args.profile if isinstance(args.profile, str) else None)
+    if hasattr(args, 'input') and not os.path.exists(args.input):
+        print(f"Fehler: Die Datei {args.input} wurde nicht gefunden.")
+        return 1
+    from validation import ScenarioValidationError
+    try:
+        args.func(args)
+    except ScenarioValidationError as e:
+        print(f"Fehler: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+import html
+import json
+import os
+import numpy as np
+from calculations import calculate_current_arrows, calculate_diagram_limits
+from network import load_network, solve_network
+from instrumentation import timed
+
+# Der Bericht ist eine einzelne HTML-Datei ohne externe Abhängigkeiten: Die Geometrie aller Szenarien (Eckpunkte, N',
+# Achsengrenzen, Endpunkte der Strompfeile nach dem Kürzen) wird hier einmal berechnet und als JSON eingebettet,
+# die Diagramme zeichnet der Browser als SVG. Es wird weder matplotlib noch ein Server benötigt.
+
+DEFAULT_CURRENT_SCALE = 1.5  # wie ZeigerDiagram.global_current_scale
+OVERVIEW_ROWS = 3            # wie OverviewBrowser
+OVERVIEW_COLS = 4
+COORDINATE_DIGITS = 4        # Nachkommastellen der Koordinaten im eingebetteten JSON
+
+def _round(values, digits=COORDINATE_DIGITS):
+    """
+    Rundet Zahlen (auch verschachtelte Listen) für das JSON; NaN und unendliche Werte werden zu None.
+    """
+    if isinstance(values, (list, tuple, np.ndarray)):
+        return [_round(value, digits) for value in values]
+    value = float(values)
+    return round(value, digits) if np.isfinite(value) else None
+
+def _arrows(n_prime, currents, angles, current_scale, xlim, ylim):
+    """
+    Strompfeile ab N' wie in draw_currents: Liste von [Ende x, Ende y, gekürzt, Winkel].
+    """
+    return [
+        [*_round((end_x, end_y)), bool(clipped), _round(angle, 2)]
+        for (end_x, end_y, clipped), angle in zip(calculate_current_arrows(n_prime, currents, angles, current_scale, xlim, ylim), angles)
+    ]
+
+def scenario_geometry(scenarios, triangle_pts, solved, current_scale=DEFAULT_CURRENT_SCALE, system=0):
+    """
+    Berechnet die Geometrie aller Szenarien eines Systems mit denselben Regeln wie plot_diagram
+    (Achsengrenzen aus N, N' und den Eckpunkten mit 10 % Rand, Strompfeile ab N', an den Achsengrenzen gekürzt).
+
+    Parameter:
+    scenarios: ScenarioSet
+    triangle_pts: Koordinaten der Eckpunkte
+    solved: Ergebnis von solve_scenarios mit diagnostics (n_primes, shift_enabled, inn_angles, solver)
+    current_scale: float, Skalierung der Strompfeile
+    system: int, Index des Systems im Bericht
+
+    Rückgabewert:
+    Liste von dicts (ein Eintrag pro Szenario, Schlüssel siehe REPORT_TEMPLATE).
+    """
+    n_primes, shift_enabled, inn_angles, solver = solved
+    numbers = scenarios.scenario_numbers()
+    geometry = []
+    for index, scenario in enumerate(scenarios):
+        n_prime = n_primes[index]
+        xlim, ylim = calculate_diagram_limits(triangle_pts, n_prime, shift_enabled[index])
+        inn = None
+        if scenario.inn_values > 0:
+            inn = _arrows(n_prime, [scenario.inn_values], [inn_angles[index]], current_scale, xlim, ylim)[0]
+        geometry.append({
+            'k': system,
+            'n': int(numbers[index]),
+            'p': _round(n_prime),
+            'e': bool(shift_enabled[index]),
+            'lim': _round((*xlim, *ylim)),
+            'u': _round(scenario.voltages, 2),
+            'c': _arrows(n_prime, scenario.currents, scenario.angles, current_scale, xlim, ylim),
+            'inn': inn,
+            'unn': _round(scenario.unn_values),
+            'innv': _round(scenario.inn_values),
+            'st': str(solver.status[index]),
+            'r': _round(solver.residual[index])
+        })
+    return geometry
+
+@timed('report.write')
+def write_report(file_path, output_path, method='geometric', triangle_amplitude=50, current_scale=DEFAULT_CURRENT_SCALE, scenario_range=None,
+                 use_cache=True, validate='raise', title=None):
+    """
+    Schreibt einen eigenständigen HTML-Bericht mit den Diagrammen aller Szenarien.
+    Im Browser wird wie im Fenster von zeigerdiagramme.py mit den Pfeiltasten geblättert; die Übersicht ('o' oder
+    Schaltfläche) zeigt die Szenarien seitenweise als Vorschaubilder, ein Klick öffnet das Szenario. Die Adresse
+    enthält die Nummer des angezeigten Szenarios (#3 bzw. #System/3), sodass sich Links auf einzelne Szenarien teilen lassen.
+    Dateien mit mehreren Sternsystemen (siehe network.load_network) werden erkannt, jedes System erhält sein eigenes Vieleck.
+
+    Parameter:
+    file_path: str, Pfad zur Eingabedatei (Excel, CSV oder Parquet)
+    output_path: str, Pfad der HTML-Datei
+    method: Methode zur Berechnung von N' ('geometric' oder 'millman')
+    triangle_amplitude: float, Amplitude des Dreiecks (für Systeme ohne eigene Amplitude)
+    current_scale: float, Skalierung der Strompfeile
+    scenario_range: range der Szenario-Indizes, bezogen auf die Nummern in der Eingabedatei (None = alle)
+    use_cache: bool, Cache beim Laden der Excel-Datei verwenden
+    validate: Prüfung der Eingangsdaten: 'raise', 'quarantine' (fehlerhafte Szenarien auslassen) oder 'off'
+    title: str, Überschrift des Berichts (Standard: Name der Eingabedatei)
+
+    Rückgabewert:
+    Anzahl der Szenarien im Bericht.
+    """
+    network = load_network(file_path, default_amplitude=triangle_amplitude, use_cache=use_cache, validate=validate)
+    systems, scenarios = [], []
+    for index, (system, solved) in enumerate(zip(network, solve_network(network, method, diagnostics=True))):
+        triangle_pts = system.polygon_points()
+        geometry = scenario_geometry(system.scenarios, triangle_pts, solved, current_scale, index)
+        if scenario_range is not None:
+            geometry = [entry for entry in geometry if entry['n'] - 1 in scenario_range]
+        systems.append({'name': system.name, 'amplitude': system.amplitude, 'points': _round(triangle_pts)})
+        scenarios.extend(geometry)
+    if not scenarios:
+        raise ValueError(f"Der Szenariobereich enthält keine Szenarien der Datei {file_path}.")
+
+    title = title or f"Zeigerdiagramme - {os.path.basename(file_path)}"
+    data = {
+        'title': title,
+        'method': method,
+        'rows': OVERVIEW_ROWS,
+        'cols': OVERVIEW_COLS,
+        'systems': systems,
+        'scenarios': scenarios
+    }
+    # '</' würde das Script-Element vorzeitig beenden
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(REPORT_TEMPLATE.replace('__TITLE__', html.escape(title)).replace('__DATA__', payload))
+    return len(scenarios)
+
+# HTML-Gerüst des Berichts. Jedes Szenario im JSON enthält:
+# k: Index des Systems, n: Nummer in der Eingabedatei, p: N', e: Sternpunktverschiebung, lim: [x0, x1, y0, y1],
+# u: Spannungen U1N'..UnN', c: Strompfeile [x, y, gekürzt, Winkel], inn: Pfeil von I_NN oder null,
+# unn/innv: gemessene Werte, st/r: Status und Residuum des Solvers
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="de">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  body { font-family: sans-serif; margin: 0; color: #222; }
+  header { display: flex; align-items: center; gap: 1em; padding: 0.5em 1em; background: #f0f0f0; border-bottom: 1px solid #ccc; }
+  header h1 { font-size: 1.1em; margin: 0; flex: 1; }
+  button { font-size: 1em; }
+  #single { display: flex; gap: 1em; padding: 1em; }
+  #diagram { width: min(80vh, 65vw); height: min(80vh, 65vw); border: 1px solid #ccc; }
+  #legend { list-style: none; padding: 0; margin: 0; font-size: 0.9em; }
+  #legend li { white-space: nowrap; }
+  #legend .swatch { display: inline-block; width: 2em; margin-right: 0.4em; vertical-align: middle; }
+  #info { margin-top: 1em; font-size: 0.9em; }
+  #info .inconsistent, #info .failed, #info .at_bound { color: #b00; font-weight: bold; }
+  #overview { display: none; padding: 1em; }
+  #grid { display: grid; gap: 0.5em; }
+  #grid figure { margin: 0; border: 1px solid #ccc; cursor: pointer; text-align: center; font-size: 0.8em; }
+  #grid figure:hover { border-color: #36c; }
+  #grid svg { width: 100%; aspect-ratio: 1; display: block; }
+  .hint { color: #666; font-size: 0.85em; }
+</style>
+</head>
+<body>
+<header>
+  <h1 id="title"></h1>
+  <button id="prev" title="Vorheriges Szenario (←)">&larr;</button>
+  <button id="next" title="Nächstes Szenario (→)">&rarr;</button>
+  <button id="toggle" title="Übersicht ein/aus (o)">Übersicht</button>
+</header>
+<svg width="0" height="0" style="position: absolute">
+  <defs>
+    <marker id="head-blue" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="blue"/></marker>
+    <marker id="head-green" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="green"/></marker>
+    <marker id="head-red" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="red"/></marker>
+    <marker id="head-purple" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="purple"/></marker>
+  </defs>
+</svg>
+<main>
+  <section id="single">
+    <svg id="diagram" xmlns="http://www.w3.org/2000/svg"></svg>
+    <div>
+      <ul id="legend"></ul>
+      <div id="info"></div>
+      <p class="hint">← / →: Szenario wechseln, o: Übersicht</p>
+    </div>
+  </section>
+  <section id="overview">
+    <p class="hint" id="page"></p>
+    <div id="grid"></div>
+  </section>
+</main>
+<script>
+"use strict";
+const DATA = __DATA__;
+const SCENARIOS = DATA.scenarios, SYSTEMS = DATA.systems;
+const PER_PAGE = DATA.rows * DATA.cols;
+const NS = "http://www.w3.org/2000/svg";
+let current = 0, page = 0, overview = false;
+
+function node(name, attrs, parent, text) {
+  const element = document.createElementNS(NS, name);
+  for (const key in attrs) element.setAttribute(key, attrs[key]);
+  if (text !== undefined) element.textContent = text;
+  if (parent) parent.appendChild(element);
+  return element;
+}
+
+function label(scenario) {
+  const name = SYSTEMS[scenario.k].name;
+  return (name ? name + " - " : "") + "Szenario " + scenario.n;
+}
+
+function title(index) {
+  // wie ZeigerDiagram.scenario_title
+  const scenario = SCENARIOS[index];
+  const contiguous = SYSTEMS.length === 1 && scenario.n === index + 1 && SCENARIOS[SCENARIOS.length - 1].n === SCENARIOS.length;
+  return contiguous ? "Szenario " + scenario.n + " von " + SCENARIOS.length
+                    : label(scenario) + " (" + (index + 1) + " von " + SCENARIOS.length + ")";
+}
+
+// Zeichnet ein Szenario wie plot_diagram; ohne labels nur die Linien (Vorschaubilder)
+function draw(svg, scenario, labels) {
+  svg.replaceChildren();
+  const points = SYSTEMS[scenario.k].points, phases = points.length;
+  const [x0, x1, y0, y1] = scenario.lim;
+  const size = Math.max(x1 - x0, y1 - y0);
+  svg.setAttribute("viewBox", [x0, -y1, x1 - x0, y1 - y0].join(" "));
+  svg.setAttribute("preserveAspectRatio", "xMidYMid meet");
+  const stroke = size * (labels ? 0.002 : 0.006), fontSize = size * 0.022;
+  const n = scenario.e ? scenario.p : [0, 0];
+
+  function line(from, to, color, dashed, arrow) {
+    node("line", {x1: from[0], y1: -from[1], x2: to[0], y2: -to[1], stroke: color, "stroke-width": stroke,
+                  "stroke-dasharray": dashed ? [4 * stroke, 3 * stroke].join(" ") : "none",
+                  "marker-end": arrow ? "url(#head-" + color + ")" : "none"}, svg);
+  }
+  function text(at, value, color, anchor, baseline) {
+    if (labels) node("text", {x: at[0], y: -at[1], fill: color, "font-size": fontSize, "text-anchor": anchor || "middle",
+                              "dominant-baseline": baseline || "auto"}, svg, value);
+  }
+  function middle(a, b) { return [(a[0] + b[0]) / 2, (a[1] + b[1]) / 2]; }
+  function dot(at, color, radius) { node("circle", {cx: at[0], cy: -at[1], r: radius * size, fill: color}, svg); }
+
+  dot([0, 0], "blue", 0.006);
+  text([0, 0], "N", "black", "end");
+  if (scenario.e) {
+    dot(n, "black", 0.006);
+    text(n, "N'", "black", "start");
+    line([0, 0], n, "green", false, true);
+    text(middle([0, 0], n), "U_NN", "black");
+  }
+  node("polygon", {points: points.map(p => p[0] + "," + (-p[1])).join(" "), fill: "none", stroke: "orange",
+                   "stroke-width": stroke, "stroke-dasharray": [4 * stroke, 3 * stroke].join(" ")}, svg);
+  points.forEach((point, i) => {
+    dot(point, "black", 0.008);
+    text(point, "L" + (i + 1), "black", "end");
+  });
+  points.forEach((point, i) => {
+    const next = points[(i + 1) % phases];
+    line(point, next, "blue", false, true);
+    text(middle(point, next), "U" + (i + 1) + "_" + ((i + 2) <= phases ? i + 2 : 1), "blue");
+  });
+  points.forEach((point, i) => {
+    line(n, point, "green", false, true);
+    text(middle(n, point), "U" + (i + 1) + "_N'", "black");
+  });
+  const currents = [...scenario.c.map((arrow, i) => [arrow, "red", "I" + (scenario.c.length > 1 ? i + 1 : "")]),
+                    ...(scenario.inn ? [[scenario.inn, "purple", "I_NN"]] : [])];
+  for (const [[x, y, clipped], color, name] of currents) {
+    if (x === null || y === null) continue;
+    line(n, [x, y], color, clipped, true);
+    text(middle(n, [x, y]), name, "black");
+  }
+}
+
+function degrees(value) {
+  return value === null ? "-" : value.toFixed(2) + "°";
+}
+
+function legend(scenario) {
+  // Einträge wie in plot_diagram
+  const items = [["blue", "dot", "Star Point N"]];
+  const clipped = scenario.c.some(arrow => arrow[2]) || (scenario.inn !== null && scenario.inn[2]);
+  if (clipped) items.push(["black", "dashed", "Shortened Arrow"]);
+  scenario.u.forEach((value, i) => items.push(["green", "solid", "U" + (i + 1) + "_N' (" + degrees(value) + ")"]));
+  scenario.c.forEach(arrow => items.push(["red", arrow[2] ? "dashed" : "solid", "I (" + degrees(arrow[3]) + ")"]));
+  if (scenario.inn) items.push(["purple", scenario.inn[2] ? "dashed" : "solid", "I_NN (" + degrees(scenario.inn[3]) + ")"]);
+  const list = document.getElementById("legend");
+  list.replaceChildren();
+  for (const [color, style, name] of items) {
+    const item = document.createElement("li");
+    const swatch = node("svg", {class: "swatch", viewBox: "0 0 20 10", height: "10"}, item);
+    if (style === "dot") node("circle", {cx: 10, cy: 5, r: 4, fill: color}, swatch);
+    else node("line", {x1: 0, y1: 5, x2: 20, y2: 5, stroke: color, "stroke-width": 2, "stroke-dasharray": style === "dashed" ? "4 3" : "none"}, swatch);
+    item.appendChild(document.createTextNode(name));
+    list.appendChild(item);
+  }
+}
+
+function info(scenario) {
+  const system = SYSTEMS[scenario.k];
+  const rows = [];
+  if (system.name) rows.push(["System", system.name + " (Amplitude " + system.amplitude + ", " + system.points.length + " Phasen)"]);
+  rows.push(["UNN (gemessen)", scenario.unn], ["INN (gemessen)", scenario.innv], ["N'", scenario.p.join(", ")],
+            ["Status", scenario.st], ["Residuum", scenario.r]);
+  const element = document.getElementById("info");
+  element.replaceChildren();
+  for (const [name, value] of rows) {
+    const row = document.createElement("div");
+    row.textContent = name + ": " + value;
+    if (name === "Status") row.className = scenario.st;
+    element.appendChild(row);
+  }
+}
+
+function showScenario(index) {
+  current = (index + SCENARIOS.length) % SCENARIOS.length;
+  const scenario = SCENARIOS[current];
+  draw(document.getElementById("diagram"), scenario, true);
+  legend(scenario);
+  info(scenario);
+  document.getElementById("title").textContent = DATA.title + " - " + title(current);
+  const name = SYSTEMS[scenario.k].name;
+  history.replaceState(null, "", "#" + (name ? encodeURIComponent(name) + "/" : "") + scenario.n);
+}
+
+function showPage(number) {
+  const pages = Math.ceil(SCENARIOS.length / PER_PAGE);
+  page = (number + pages) % pages;
+  const grid = document.getElementById("grid");
+  grid.style.gridTemplateColumns = "repeat(" + DATA.cols + ", 1fr)";
+  grid.replaceChildren();
+  SCENARIOS.slice(page * PER_PAGE, (page + 1) * PER_PAGE).forEach((scenario, offset) => {
+    const figure = document.createElement("figure");
+    draw(node("svg", {}, figure), scenario, false);
+    const caption = document.createElement("figcaption");
+    caption.textContent = label(scenario) + (scenario.st === "converged" || scenario.st === "no_shift" ? "" : " (" + scenario.st + ")");
+    figure.appendChild(caption);
+    figure.addEventListener("click", () => { setOverview(false); showScenario(page * PER_PAGE + offset); });
+    grid.appendChild(figure);
+  });
+  document.getElementById("title").textContent = DATA.title + " - Übersicht";
+  document.getElementById("page").textContent = "Seite " + (page + 1) + " von " + pages + " (← / → oder Bild auf / Bild ab zum Blättern, Klick öffnet das Szenario)";
+}
+
+function setOverview(enabled) {
+  overview = enabled;
+  document.getElementById("single").style.display = enabled ? "none" : "flex";
+  document.getElementById("overview").style.display = enabled ? "block" : "none";
+  document.getElementById("toggle").textContent = enabled ? "Einzeldiagramm" : "Übersicht";
+  if (enabled) showPage(Math.floor(current / PER_PAGE)); else showScenario(current);
+}
+
+function step(direction) {
+  if (overview) showPage(page + direction); else showScenario(current + direction);
+}
+
+document.addEventListener("keydown", event => {
+  // wie ZeigerDiagram.on_key bzw. OverviewBrowser
+  if (event.key === "ArrowRight" || (overview && event.key === "PageDown")) step(1);
+  else if (event.key === "ArrowLeft" || (overview && event.key === "PageUp")) step(-1);
+  else if (event.key === "o" || (overview && event.key === "Escape")) setOverview(!overview);
+  else return;
+  event.preventDefault();
+});
+document.getElementById("prev").addEventListener("click", () => step(-1));
+document.getElementById("next").addEventListener("click", () => step(1));
+document.getElementById("toggle").addEventListener("click", () => setOverview(!overview));
+
+// Szenario aus der Adresse (#3 oder #System/3)
+const target = decodeURIComponent(location.hash.slice(1)).split("/");
+const number = Number(target.pop()), system = target.join("/");
+const start = SCENARIOS.findIndex(s => s.n === number && (!system || SYSTEMS[s.k].name === system));
+showScenario(start >= 0 ? start : 0);
+</script>
+</body>
+</html>
+"""
@@ -1,52 +1,446 @@
-import pandas as pd
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from scenario_set import ScenarioSet
+from validation import ScenarioValidationError, ValidationIssue, apply_validation, check_shapes, check_sheets, validate_chunks
+from instrumentation import timed
 
-def load_data_from_excel(file_path):
+CACHE_VERSION = 2  # Erhöhen, wenn sich das Format des Caches ändert (2: fehlende Werte bleiben NaN)
+
+# Leere Zellen bedeuten bei UNN und INN 0 (keine Sternpunktverschiebung bzw. kein Strom im Neutralleiter),
+# bei allen anderen Größen fehlt der Wert und das Szenario wird bei der Prüfung gemeldet
+ZERO_IF_MISSING = ('unn_values', 'inn_values')
+
+# Blätter der Excel-Datei und zugehörige Attribute des ScenarioSet
+SCENARIO_SHEETS = {
+    'currents': 'Currents',
+    'angles': 'Current Angles',
+    'voltages': 'Voltages',
+    'unn_values': 'UNN',
+    'inn_values': 'INN'
+}
+
+# Optionale Blätter mit den Phasenimpedanzen (Betrag und Winkel)
+IMPEDANCE_SHEETS = ('Impedances', 'Impedance Angles')
+
+def get_cache_dir(file_path):
+    """
+    Gibt den Pfad des Cache-Verzeichnisses neben der Excel-Datei zurück (z. B. data/.input.xlsx.cache).
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, f'.{name}.cache')
+
+@timed('load.file_hash')
+def file_hash(file_path):
+    """
+    Berechnet den SHA-256-Hash des Dateiinhalts.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def clear_cache(file_path):
+    """
+    Löscht den Cache einer Excel-Datei, falls vorhanden.
+    """
+    shutil.rmtree(get_cache_dir(file_path), ignore_errors=True)
+
+@timed('load.read_cache')
+def read_cache(file_path):
+    """
+    Lädt ein ScenarioSet aus dem Cache, falls dieser zur aktuellen Excel-Datei passt.
+    Größe und Änderungszeit werden zuerst verglichen; stimmt nur die Änderungszeit nicht überein,
+    entscheidet der Hash des Inhalts. Die Arrays werden per Memory-Mapping geladen.
+
+    Rückgabewert:
+    ScenarioSet oder None, wenn kein gültiger Cache existiert.
+    """
+    cache_dir = get_cache_dir(file_path)
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    stat = os.stat(file_path)
+    if meta.get('version') != CACHE_VERSION or meta.get('size') != stat.st_size:
+        return None
+    if meta.get('mtime_ns') != stat.st_mtime_ns:
+        # Datei wurde angefasst, aber evtl. nicht verändert
+        if meta.get('sha256') != file_hash(file_path):
+            return None
+        meta['mtime_ns'] = stat.st_mtime_ns
+        write_cache_meta(cache_dir, meta)
+
+    try:
+        arrays = {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r') for name in meta['arrays']}
+    except (OSError, ValueError):
+        return None
+    return ScenarioSet(**arrays)
+
+@timed('load.write_cache')
+def write_cache(file_path, scenarios):
+    """
+    Schreibt ein ScenarioSet als .npy-Dateien in das Cache-Verzeichnis der Excel-Datei.
+    meta.json wird zuletzt geschrieben, damit ein abgebrochener Schreibvorgang keinen gültigen Cache hinterlässt.
+    """
+    cache_dir = get_cache_dir(file_path)
+    clear_cache(file_path)
+    os.makedirs(cache_dir)
+
+    arrays = scenarios.arrays()
+    for name, values in arrays.items():
+        np.save(os.path.join(cache_dir, f'{name}.npy'), values)
+
+    stat = os.stat(file_path)
+    write_cache_meta(cache_dir, {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_hash(file_path),
+        'arrays': list(arrays)
+    })
+
+def write_cache_meta(cache_dir, meta):
+    """
+    Schreibt meta.json atomar in das Cache-Verzeichnis.
+    """
+    tmp_path = os.path.join(cache_dir, 'meta.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(cache_dir, 'meta.json'))
+
+def read_scenario_sheet(xls, sheet_name, single_row=False):
+    """
+    Liest ein Blatt der Excel-Datei als float64-Array ein.
+    Die erste Spalte (Beschreibung) wird verworfen, jede weitere Spalte ist ein Szenario.
+
+    Parameter:
+    xls: pd.ExcelFile
+    sheet_name: str, Name des Blatts
+    single_row: bool, nur die erste Zeile lesen (für UNN und INN)
+
+    Rückgabewert:
+    Array der Form (Szenarien, Zeilen) bzw. (Szenarien,) bei single_row.
+    """
+    import pandas as pd
+    values = pd.read_excel(xls, sheet_name).iloc[:, 1:].to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[0] if single_row else values.T
+
+@timed('load.load_scenarios')
+def load_scenarios_from_excel(file_path, use_cache=True, refresh_cache=False, validate='raise'):
     """
-    Lädt Daten aus einer Excel-Datei.
+    Lädt Daten aus einer Excel-Datei in ein ScenarioSet.
     Die Excel-Datei sollte folgende Blätter enthalten:
     - 'Currents': Ströme in jedem Szenario
     - 'Current Angles': Winkel der Ströme in jedem Szenario
     - 'UNN': UNN-Wert für jedes Szenario
     - 'Voltages': Spannungswerte für jedes Szenario
     - 'INN': INN-Wert für jedes Szenario
+    Optional (für die Berechnung von N' nach Millman):
+    - 'Impedances': Beträge der Phasenimpedanzen in jedem Szenario
+    - 'Impedance Angles': Winkel der Phasenimpedanzen in jedem Szenario
+
+    Das Ergebnis wird neben der Excel-Datei zwischengespeichert (siehe get_cache_dir) und beim
+    nächsten Aufruf aus dem Cache geladen, solange sich die Excel-Datei nicht verändert hat.
+    Fehlende Blätter oder unterschiedlich viele Szenarien in den Blättern führen immer zu einem
+    ScenarioValidationError; die Werte selbst werden danach geprüft (siehe validation.validate_scenarios).
 
     Parameter:
     file_path: str, Pfad zur Excel-Datei
+    use_cache: bool, Cache lesen und schreiben (False deaktiviert den Cache vollständig)
+    refresh_cache: bool, vorhandenen Cache verwerfen und die Excel-Datei neu einlesen
+    validate: 'raise' (alle fehlerhaften Szenarien in einem ScenarioValidationError melden),
+              'quarantine' (fehlerhafte Szenarien aussortieren) oder 'off'
 
     Rückgabewert:
-    Ein Dictionary mit den geladenen Daten.
+    ScenarioSet mit den geladenen Daten.
+    """
+    scenarios = read_cache(file_path) if use_cache and not refresh_cache else None
+    if scenarios is None:
+        scenarios = parse_scenarios_from_excel(file_path)
+        if use_cache:
+            try:
+                write_cache(file_path, scenarios)
+            except OSError as e:
+                print(f"Warnung: Cache für {file_path} konnte nicht geschrieben werden: {e}")
+    return apply_validation(scenarios, validate, source=file_path)
+
+@timed('load.excel_parse')
+def parse_scenarios_from_excel(file_path):
     """
-    # Excel-Datei laden
-    xls = pd.ExcelFile(file_path)
+    Liest die Excel-Datei ohne Cache in ein ScenarioSet ein (Blätter siehe load_scenarios_from_excel).
+    Fehlende Werte bleiben NaN (außer bei UNN und INN, siehe ZERO_IF_MISSING). Vor dem Lesen der Werte wird geprüft, ob alle Blätter vorhanden sind,
+    danach, ob alle Blätter gleich viele Szenarien enthalten (sonst ScenarioValidationError).
+
+    Parameter:
+    file_path: str, Pfad zur Excel-Datei
+
+    Rückgabewert:
+    ScenarioSet mit den geladenen Daten.
+    """
+    import pandas as pd
+    return read_scenario_sheets(pd.ExcelFile(file_path), file_path)
+
+def read_scenario_sheets(xls, source, prefix=''):
+    """
+    Liest die Blätter eines Sternsystems (SCENARIO_SHEETS und optional IMPEDANCE_SHEETS) aus einer geöffneten
+    Excel-Datei in ein ScenarioSet ein. Die Anzahl der Phasen ergibt sich aus der Anzahl der Zeilen der Blätter.
+
+    Parameter:
+    xls: pd.ExcelFile
+    source: Bezeichnung der Daten für Meldungen (z. B. Dateiname)
+    prefix: str, Präfix der Blattnamen (bei Netzen mit mehreren Sternsystemen, z. B. 'Trafo 1 ' für 'Trafo 1 Currents')
+
+    Rückgabewert:
+    ScenarioSet mit den geladenen Daten.
+    """
+    sheets = {name: prefix + sheet_name for name, sheet_name in SCENARIO_SHEETS.items()}
+    impedance_sheets = tuple(prefix + sheet_name for sheet_name in IMPEDANCE_SHEETS)
+
+    # Vor dem Einlesen der Werte die Blätter prüfen
+    issues = check_sheets(xls.sheet_names, sheets.values(), [impedance_sheets])
+    if issues:
+        raise ScenarioValidationError(issues, source)
 
     # Daten aus den verschiedenen Blättern laden
-    currents_df = pd.read_excel(xls, 'Currents')
-    currents_df = currents_df.iloc[:, 1:].astype('float64').fillna(0.0)  # Ersetze NaN durch 0.0 und setze Typ auf float64
-    currents = currents_df.T.values.tolist()
-
-    angles_df = pd.read_excel(xls, 'Current Angles')
-    angles_df = angles_df.iloc[:, 1:].astype('float64').fillna(0.0)  # Ersetze NaN durch 0.0 und setze Typ auf float64
-    angles = angles_df.T.values.tolist()
-
-    unn_values_df = pd.read_excel(xls, 'UNN')
-    unn_values_df = unn_values_df.iloc[0, 1:].astype('float64').fillna(0.0)  # Ersetze NaN durch 0.0 und setze Typ auf float64
-    unn_values = unn_values_df.tolist()
-
-    voltages_df = pd.read_excel(xls, 'Voltages')
-    voltages_df = voltages_df.iloc[:, 1:].astype('float64').fillna(0.0)  # Ersetze NaN durch 0.0 und setze Typ auf float64
-    voltages = voltages_df.T.values.tolist()
-
-    inn_values_df = pd.read_excel(xls, 'INN')
-    inn_values_df = inn_values_df.iloc[0, 1:].astype('float64').fillna(0.0)  # Ersetze NaN durch 0.0 und setze Typ auf float64
-    inn_values = inn_values_df.tolist()
-
-    # Daten in ein Dictionary packen
-    data = {
-        'currents': currents,
-        'angles': angles,
-        'unn_values': unn_values,
-        'voltages': voltages,
-        'inn_values': inn_values
+    arrays = {
+        name: read_scenario_sheet(xls, sheet_name, single_row=name in ZERO_IF_MISSING)
+        for name, sheet_name in sheets.items()
+    }
+    fill_missing_zeros(arrays)
+
+    # Komplexe Phasenimpedanzen (optional)
+    impedance_arrays = {}
+    if all(sheet_name in xls.sheet_names for sheet_name in impedance_sheets):
+        impedance_arrays = {sheet_name: read_scenario_sheet(xls, sheet_name) for sheet_name in impedance_sheets}
+
+    issues = check_shapes({**arrays, **impedance_arrays}, sheets)
+    if issues:
+        raise ScenarioValidationError(issues, source)
+    if impedance_arrays:
+        impedance_values, impedance_angles = impedance_arrays.values()
+        arrays['impedances'] = impedance_values * np.exp(1j * np.radians(impedance_angles))
+    return ScenarioSet(**arrays)
+
+def fill_missing_zeros(arrays):
+    """
+    Ersetzt fehlende Werte in den Arrays aus ZERO_IF_MISSING durch 0 (in dict arrays, Attributname -> Array).
+    """
+    for name in ZERO_IF_MISSING:
+        if name in arrays:
+            arrays[name] = np.nan_to_num(arrays[name], nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+def load_data_from_excel(file_path, use_cache=True, validate='raise'):
+    """
+    Lädt Daten aus einer Excel-Datei (siehe load_scenarios_from_excel).
+
+    Parameter:
+    file_path: str, Pfad zur Excel-Datei
+    use_cache: bool, Cache verwenden
+    validate: Prüfmodus, siehe load_scenarios_from_excel
+
+    Rückgabewert:
+    Ein Dictionary mit den geladenen Daten als verschachtelte Listen.
+    """
+    return load_scenarios_from_excel(file_path, use_cache=use_cache, validate=validate).to_dict()
+
+def scenario_columns(num_phases=3):
+    """
+    Spalten für CSV/Parquet-Dateien (eine Zeile pro Szenario) bei num_phases Phasen:
+    I1..In, Winkel I1..Winkel In, U1N..UnN, UNN und INN.
+    """
+    phases = range(1, num_phases + 1)
+    return {
+        'currents': [f'I{k}' for k in phases],
+        'angles': [f'Winkel I{k}' for k in phases],
+        'voltages': [f'U{k}N' for k in phases],
+        'unn_values': 'UNN',
+        'inn_values': 'INN'
+    }
+
+def count_phases(columns):
+    """
+    Anzahl der Phasen einer CSV/Parquet-Datei: die Anzahl der fortlaufend nummerierten Stromspalten I1, I2, ...
+    (3, wenn es keine gibt; fehlende Spalten werden dann von scenarios_from_frame gemeldet).
+    """
+    columns = set(columns)
+    num_phases = 0
+    while f'I{num_phases + 1}' in columns:
+        num_phases += 1
+    return num_phases or 3
+
+def impedance_columns(num_phases=3):
+    """
+    Optionale Spalten mit den Phasenimpedanzen (für die Berechnung von N' nach Millman):
+    Tupel (Beträge Z1..Zn, Winkel Winkel Z1..Winkel Zn).
+    """
+    phases = range(1, num_phases + 1)
+    return [f'Z{k}' for k in phases], [f'Winkel Z{k}' for k in phases]
+
+# Spalten für CSV/Parquet-Dateien mit drei Phasen
+SCENARIO_COLUMNS = scenario_columns(3)
+
+def check_method(scenarios, method, source=None):
+    """
+    Prüft vor der Berechnung, ob die Daten für die Methode ausreichen: 'millman' benötigt die Phasenimpedanzen
+    (Blätter IMPEDANCE_SHEETS bzw. Spalten siehe impedance_columns). Löst sonst einen ValueError aus.
+    """
+    if method == 'millman' and scenarios.impedances is None:
+        magnitudes, angles = impedance_columns(scenarios.num_phases)
+        raise ValueError(f"Die Methode 'millman' benötigt die Phasenimpedanzen{f' in {source}' if source else ''} "
+                         f"(Blätter {' und '.join(repr(sheet) for sheet in IMPEDANCE_SHEETS)} bzw. Spalten "
+                         f"{', '.join(magnitudes)}, {', '.join(angles)}); ohne Impedanzen bitte --method geometric verwenden.")
+
+def iter_scenarios(file_path, chunk_size=10000, validate='raise'):
+    """
+    Liest Szenarien blockweise ein und gibt sie als ScenarioSet-Blöcke zurück (Generator).
+    Unterstützt werden Excel-Dateien (.xlsx/.xlsm, Aufbau wie bei load_scenarios_from_excel)
+    sowie CSV- und Parquet-Dateien mit einer Zeile pro Szenario (Spalten siehe scenario_columns).
+
+    Parameter:
+    file_path: str, Pfad zur Datei
+    chunk_size: int, Anzahl der Szenarien pro Block
+    validate: Prüfmodus, siehe validation.validate_chunks ('raise' meldet alle fehlerhaften Szenarien der Datei auf einmal,
+              'quarantine' sortiert sie aus und überspringt vollständig fehlerhafte Blöcke)
+
+    Rückgabewert:
+    Generator über ScenarioSet-Blöcke mit höchstens chunk_size Szenarien.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        chunks = iter_scenarios_from_excel(file_path, chunk_size)
+    elif extension in ('.csv', '.parquet'):
+        chunks = iter_scenarios_from_frames(file_path, chunk_size)
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: {extension}")
+    return validate_chunks(chunks, validate, source=file_path)
+
+@timed('load.scenarios_from_frame')
+def scenarios_from_frame(df, first_number=1):
+    """
+    Erstellt ein ScenarioSet aus einem DataFrame mit einer Zeile pro Szenario (Spalten siehe scenario_columns,
+    die Anzahl der Phasen ergibt sich aus den Stromspalten, siehe count_phases). Sind Impedanzspalten vorhanden
+    (siehe impedance_columns), müssen alle vorhanden sein; sie ergeben die komplexen Phasenimpedanzen.
+    Fehlende Werte bleiben NaN (außer bei UNN und INN, siehe ZERO_IF_MISSING).
+    first_number ist die Nummer der ersten Zeile (bei blockweisem Lesen).
+    """
+    num_phases = count_phases(df.columns)
+    columns_by_name = scenario_columns(num_phases)
+    missing = [column for columns in columns_by_name.values() for column in np.atleast_1d(columns) if column not in df.columns]
+    impedance_magnitudes, impedance_angles = impedance_columns(num_phases)
+    if any(column in df.columns for column in impedance_magnitudes + impedance_angles):
+        missing += [column for column in impedance_magnitudes + impedance_angles if column not in df.columns]
+    if missing:
+        raise ScenarioValidationError([ValidationIssue(None, column, f"Spalte '{column}' fehlt") for column in missing])
+    arrays = {
+        name: df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        for name, columns in columns_by_name.items()
     }
+    fill_missing_zeros(arrays)
+    if impedance_magnitudes[0] in df.columns:
+        magnitudes = df[impedance_magnitudes].to_numpy(dtype=np.float64, na_value=np.nan)
+        angles = df[impedance_angles].to_numpy(dtype=np.float64, na_value=np.nan)
+        arrays['impedances'] = magnitudes * np.exp(1j * np.radians(angles))
+    return ScenarioSet(numbers=np.arange(first_number, first_number + len(df)), **arrays)
 
-    return data
\ No newline at end of file
+def iter_frames(file_path, chunk_size=10000):
+    """
+    Liest eine CSV- oder Parquet-Datei blockweise als DataFrames ein (Parquet benötigt pyarrow).
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        import pandas as pd
+        yield from pd.read_csv(file_path, chunksize=chunk_size)
+    elif extension == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Zum Lesen von Parquet-Dateien wird pyarrow benötigt (pip install pyarrow).") from e
+
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: {extension}")
+
+def iter_scenarios_from_frames(file_path, chunk_size=10000):
+    """
+    Liest eine CSV- oder Parquet-Datei blockweise ein (siehe iter_scenarios und iter_frames).
+    """
+    first_number = 1
+    for df in iter_frames(file_path, chunk_size):
+        yield scenarios_from_frame(df, first_number)
+        first_number += len(df)
+
+def iter_scenarios_from_excel(file_path, chunk_size=10000):
+    """
+    Liest eine Excel-Datei mit openpyxl im Read-Only-Modus blockweise ein (siehe iter_scenarios), einschließlich
+    der optionalen Impedanzblätter (IMPEDANCE_SHEETS). In der Excel-Datei stehen die Szenarien in Spalten, openpyxl
+    liest aber zeilenweise: Jedes Blatt wird deshalb genau einmal mit iter_rows gelesen (siehe read_sheet_values),
+    die Blöcke sind Ausschnitte dieser Arrays. Zeilen und Anzahl der Szenarien werden so für die ganze Datei
+    festgelegt, alle Blöcke haben dieselbe Anzahl Phasen.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        issues = check_sheets(workbook.sheetnames, SCENARIO_SHEETS.values(), [IMPEDANCE_SHEETS])
+        if issues:
+            raise ScenarioValidationError(issues, file_path)
+        sheets = dict(SCENARIO_SHEETS)
+        if IMPEDANCE_SHEETS[0] in workbook.sheetnames:
+            sheets.update(zip(('impedance_values', 'impedance_angles'), IMPEDANCE_SHEETS))
+        arrays = {name: read_sheet_values(workbook[sheet_name]) for name, sheet_name in sheets.items()}
+    finally:
+        workbook.close()
+
+    for name in ZERO_IF_MISSING:
+        values = arrays[name]
+        arrays[name] = values[0] if len(values) else np.full(values.shape[1], np.nan)
+    for name in set(arrays) - set(ZERO_IF_MISSING):
+        arrays[name] = arrays[name].T
+    fill_missing_zeros(arrays)
+
+    issues = check_shapes(arrays, sheets)
+    if issues:
+        raise ScenarioValidationError(issues, file_path)
+    if 'impedance_values' in arrays:
+        arrays['impedances'] = arrays.pop('impedance_values') * np.exp(1j * np.radians(arrays.pop('impedance_angles')))
+    scenarios = ScenarioSet(**arrays)
+    for start in range(0, len(scenarios), chunk_size):
+        yield scenarios[start:start + chunk_size]
+
+def read_sheet_values(worksheet):
+    """
+    Liest ein Blatt in einem Durchgang als float64-Array (Zeilen, Szenarien) ein, ohne Kopfzeile und Beschreibungsspalte.
+    Leere Zeilen (weder Beschreibung noch Werte) werden übersprungen, leere Zellen werden NaN. Die Anzahl der Szenarien
+    reicht bis zur letzten ausgefüllten Zelle der Kopfzeile oder einer Datenzeile, Lücken in der Kopfzeile zählen mit.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, ())
+    num_scenarios = count_filled(header[1:])
+    values = []
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        cells = row[1:]
+        num_scenarios = max(num_scenarios, count_filled(cells))
+        values.append(np.array(cells, dtype=np.float64))  # None wird NaN
+    data = np.full((len(values), num_scenarios), np.nan)
+    for i, row_values in enumerate(values):
+        row_values = row_values[:num_scenarios]
+        data[i, :len(row_values)] = row_values
+    return data
+
+def count_filled(cells):
+    """
+    Anzahl der Zellen bis einschließlich der letzten ausgefüllten (0, wenn alle leer sind).
+    """
+    for i in range(len(cells) - 1, -1, -1):
+        if cells[i] is not None:
+            return i + 1
+    return 0
@@ -0,0 +1,172 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Messung aktivieren mit der Umgebungsvariable ZEIGER_PROFILE oder cli.py --profile:
+#   ZEIGER_PROFILE=1            Zusammenfassung beim Beenden auf der Konsole
+#   ZEIGER_PROFILE=trace.json   zusätzlich Chrome-Trace (chrome://tracing, Perfetto) in die Datei
+ENV_VAR = 'ZEIGER_PROFILE'
+MAX_EVENTS = 1_000_000  # Obergrenze für Trace-Ereignisse, die Statistik läuft danach weiter
+
+_enabled = False
+_trace_path = None
+_atexit_registered = False
+_lock = threading.Lock()
+_origin = time.perf_counter()
+_stats = {}    # Name -> [Aufrufe, Gesamtzeit, Minimum, Maximum]
+_counters = {}  # Name -> Summe
+_events = []
+
+def is_enabled():
+    return _enabled
+
+def enable(trace_path=None):
+    """
+    Aktiviert die Messung. Beim Beenden des Programms wird die Zusammenfassung ausgegeben und,
+    falls trace_path gesetzt ist, ein Chrome-Trace geschrieben.
+    """
+    global _enabled, _trace_path, _atexit_registered
+    _enabled = True
+    _trace_path = trace_path or _trace_path
+    if not _atexit_registered:
+        atexit.register(report)
+        _atexit_registered = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def reset():
+    """
+    Verwirft alle bisher gesammelten Messwerte.
+    """
+    with _lock:
+        _stats.clear()
+        _counters.clear()
+        _events.clear()
+
+def enable_from_env():
+    """
+    Aktiviert die Messung, wenn ZEIGER_PROFILE gesetzt ist (siehe oben).
+    """
+    value = os.environ.get(ENV_VAR, '').strip()
+    if value and value.lower() not in ('0', 'false', 'no', 'off'):
+        enable(value if value.lower().endswith('.json') else None)
+
+def record(name, start, duration):
+    """
+    Trägt eine gemessene Dauer (Sekunden, Start als perf_counter-Wert) für eine Phase ein.
+    """
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            _stats[name] = [1, duration, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = min(entry[2], duration)
+            entry[3] = max(entry[3], duration)
+        if len(_events) < MAX_EVENTS:
+            _events.append((name, start, duration, threading.get_ident()))
+
+def count(name, value=1):
+    """
+    Erhöht einen Zähler (z. B. Iterationen des Optimierers oder fehlgeschlagene Berechnungen).
+    Ohne aktivierte Messung passiert nichts.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+@contextmanager
+def _measure(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, start, time.perf_counter() - start)
+
+@contextmanager
+def _nothing():
+    yield
+
+def stage(name):
+    """
+    Kontextmanager, der die Laufzeit eines Abschnitts unter dem Namen name erfasst:
+
+        with stage('plot.tight_layout'):
+            plt.tight_layout()
+    """
+    return _measure(name) if _enabled else _nothing()
+
+def timed(name):
+    """
+    Dekorator, der jeden Aufruf der Funktion unter dem Namen name erfasst.
+    Ohne aktivierte Messung wird die Funktion direkt aufgerufen.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def summary():
+    """
+    Zusammenfassung als Text: Laufzeiten pro Phase (nach Gesamtzeit sortiert) und Zähler.
+    """
+    with _lock:
+        stats = sorted(_stats.items(), key=lambda item: item[1][1], reverse=True)
+        counters = sorted(_counters.items())
+    lines = [f"{'Phase':<36} {'Aufrufe':>9} {'Gesamt [ms]':>13} {'Mittel [ms]':>12} {'Min [ms]':>10} {'Max [ms]':>10}"]
+    lines.append('-' * len(lines[0]))
+    for name, (calls, total, minimum, maximum) in stats:
+        lines.append(f"{name:<36} {calls:>9} {total * 1e3:>13.2f} {total / calls * 1e3:>12.3f} {minimum * 1e3:>10.3f} {maximum * 1e3:>10.3f}")
+    if counters:
+        lines.append('')
+        lines.append(f"{'Zähler':<36} {'Wert':>9}")
+        lines.append('-' * 46)
+        for name, value in counters:
+            lines.append(f"{name:<36} {value:>9}")
+    return '\n'.join(lines)
+
+def write_chrome_trace(path):
+    """
+    Schreibt alle erfassten Abschnitte im Chrome-Trace-Format (Laden in chrome://tracing oder ui.perfetto.dev).
+    """
+    pid = os.getpid()
+    with _lock:
+        events = [
+            {'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+             'ts': (start - _origin) * 1e6, 'dur': duration * 1e6}
+            for name, start, duration, tid in _events
+        ]
+        counters = dict(_counters)
+    if counters:
+        events.append({'name': 'Zähler', 'ph': 'C', 'pid': pid, 'tid': 0, 'ts': 0, 'args': counters})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+def report():
+    """
+    Gibt die Zusammenfassung aus und schreibt gegebenenfalls den Chrome-Trace (wird beim Beenden aufgerufen).
+    """
+    if not _stats and not _counters:
+        return
+    print(summary())
+    if _trace_path:
+        write_chrome_trace(_trace_path)
+        print(f"Chrome-Trace geschrieben: {_trace_path}")
+
+enable_from_env()
@@ -0,0 +1,416 @@
+import asyncio
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+import numpy as np
+import matplotlib.pyplot as plt
+from batch_render import DEFAULT_SETTINGS
+from input_excel_data import SCENARIO_COLUMNS, fill_missing_zeros, impedance_columns, iter_frames
+from scenario_set import ScenarioSet
+from validation import validate_scenarios
+from plotting_functions import calculate_inn_angle, calculate_triangle_points, DiagramRenderer
+from timeseries import NPrimeTracker
+from instrumentation import count, timed
+
+# Optionale Impedanzen einer Messung (Z1..Z3, Winkel Z1..Winkel Z3), nötig für die Methode 'millman'
+IMPEDANCE_FIELDS = [column for columns in impedance_columns(3) for column in columns]
+# Feldnamen einer Messung in der Reihenfolge der Zeilen im Ringpuffer (I1..I3, Winkel I1..I3, U1N..U3N, UNN, INN, Impedanzen)
+SAMPLE_FIELDS = [column for columns in SCENARIO_COLUMNS.values() for column in np.atleast_1d(columns).tolist()] + IMPEDANCE_FIELDS
+# Kurzformen für das Line-Protokoll, in dem Feldnamen keine Leerzeichen enthalten sollten
+FIELD_ALIASES = {'WI1': 'Winkel I1', 'WI2': 'Winkel I2', 'WI3': 'Winkel I3', 'WZ1': 'Winkel Z1', 'WZ2': 'Winkel Z2', 'WZ3': 'Winkel Z3'}
+TIME_FIELDS = ('Zeit', 'Time', 'time', 'Timestamp', 'timestamp')
+
+def parse_time(value):
+    """
+    Zeitstempel einer Messung in Sekunden: Zahlen werden als Sekunden übernommen, Texte als ISO-8601 gelesen.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.datetime.fromisoformat(str(value)).timestamp()
+
+def parse_json_sample(line):
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("JSON-Messung muss ein Objekt sein")
+    timestamp = next((parse_time(data[field]) for field in TIME_FIELDS if field in data), None)
+    if 'currents' in data:
+        # Verschachtelte Form mit den Attributnamen des ScenarioSet (ohne Impedanzen)
+        values = [*data['currents'], *data['angles'], *data['voltages'], data['unn_values'], data['inn_values'], *[np.nan] * len(IMPEDANCE_FIELDS)]
+    else:
+        data = {FIELD_ALIASES.get(key, key): value for key, value in data.items()}
+        values = [data.get(field, np.nan) for field in SAMPLE_FIELDS]
+    return timestamp, values
+
+def split_unescaped(text, separator):
+    """
+    Teilt text an separator, mit Backslash maskierte Trennzeichen bleiben erhalten (Line-Protokoll).
+    """
+    parts, current, escaped = [], [], False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == separator:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+def parse_line_protocol_sample(line):
+    """
+    Liest eine Messung im Line-Protokoll (wie InfluxDB):
+        phasor I1=12.1,I2=11.8,I3=12.4,WI1=-5,WI2=-127,WI3=114,U1N=230,U2N=229,U3N=231,UNN=1.2,INN=0.4 1718000000000000000
+    Der Zeitstempel am Ende (Nanosekunden) ist optional, ebenso die Impedanzen (Z1=..., WZ1=... usw.).
+    """
+    parts = [part for part in split_unescaped(line.strip(), ' ') if part]
+    if len(parts) < 2:
+        raise ValueError("Line-Protokoll erwartet '<Messung> <Feld>=<Wert>,... [Zeitstempel]'")
+    fields = {}
+    for item in split_unescaped(parts[1], ','):
+        key, _, value = item.partition('=')
+        fields[FIELD_ALIASES.get(key, key)] = float(value.rstrip('i'))
+    timestamp = int(parts[2]) / 1e9 if len(parts) > 2 else None
+    return timestamp, [fields.get(field, np.nan) for field in SAMPLE_FIELDS]
+
+def parse_sample(line, require_impedances=False):
+    """
+    Liest eine Messung als JSON-Objekt oder im Line-Protokoll (wird am ersten Zeichen erkannt) und prüft sie wie
+    die geladenen Szenarien mit validate_scenarios: Fehlende UNN und INN bedeuten 0, jeder andere fehlende oder
+    ungültige Wert führt zu einem ValueError. Mit require_impedances müssen auch die Impedanzen vorhanden sein.
+
+    Rückgabewert:
+    Tupel (timestamp, values): Zeitstempel in Sekunden oder None und float64-Array mit den Werten in der Reihenfolge SAMPLE_FIELDS
+    (fehlende Impedanzen als NaN).
+    """
+    line = line.strip()
+    timestamp, values = parse_json_sample(line) if line.startswith('{') else parse_line_protocol_sample(line)
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape != (len(SAMPLE_FIELDS),):
+        raise ValueError(f"Erwartet werden {len(SAMPLE_FIELDS)} Werte, erhalten {values.size}")
+    scenarios = scenarios_from_rows(values[None, :])
+    if require_impedances and scenarios.impedances is None:
+        raise ValueError(f"Die Methode 'millman' benötigt die Impedanzen {', '.join(IMPEDANCE_FIELDS)}")
+    _, issues = validate_scenarios(scenarios)
+    if issues:
+        raise ValueError('; '.join(issue.message for issue in issues))
+    return timestamp, values
+
+class SampleBuffer:
+    """
+    Ringpuffer der letzten Messungen. Der Empfang (asyncio-Thread) schreibt, die GUI liest; ist der
+    Puffer voll, wird die älteste Messung verworfen. Alle Methoden sind threadsicher.
+    """
+
+    def __init__(self, maxlen=10000, require_impedances=False):
+        self.maxlen = maxlen
+        self.require_impedances = require_impedances  # Messungen ohne Impedanzen als ungültig zählen (für 'millman')
+        self.received = 0  # Anzahl aller empfangenen Messungen (auch bereits verworfene)
+        self.invalid = 0   # Anzahl der Zeilen, die nicht gelesen werden konnten
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def append(self, timestamp, values):
+        with self._lock:
+            self._samples.append((timestamp, values))
+            self.received += 1
+
+    def add_line(self, line):
+        """
+        Liest eine empfangene Zeile und legt die Messung im Puffer ab; ungültige oder unvollständige Messungen
+        (siehe parse_sample) werden gezählt und übersprungen.
+        """
+        if not line.strip():
+            return
+        try:
+            timestamp, values = parse_sample(line, self.require_impedances)
+        except (ValueError, KeyError, TypeError) as e:
+            with self._lock:
+                self.invalid += 1
+            count('live.invalid_samples')
+            if self.invalid <= 10:
+                print(f"Warnung: Ungültige Messung übersprungen ({e}): {line.strip()[:80]}")
+            return
+        self.append(time.time() if timestamp is None else timestamp, values)
+
+    def latest(self):
+        """
+        Letzte Messung als (laufende Nummer, Zeitstempel, Werte) oder None, solange der Puffer leer ist.
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            timestamp, values = self._samples[-1]
+            return self.received, timestamp, values
+
+    def snapshot(self):
+        """
+        Alle Messungen im Puffer als (times, ScenarioSet), z. B. zum Speichern oder für solve_time_series.
+        """
+        with self._lock:
+            samples = list(self._samples)
+        times = np.array([timestamp for timestamp, _ in samples], dtype=np.float64)
+        return times, scenarios_from_rows(np.array([values for _, values in samples]).reshape(-1, len(SAMPLE_FIELDS)))
+
+def scenarios_from_rows(rows):
+    """
+    Erstellt ein ScenarioSet aus Zeilen in der Reihenfolge SAMPLE_FIELDS. Fehlende UNN und INN werden wie beim Laden
+    der Dateien zu 0 (siehe fill_missing_zeros); Impedanzen werden übernommen, wenn jede Zeile welche enthält.
+    """
+    arrays = {'currents': rows[:, 0:3], 'angles': rows[:, 3:6], 'voltages': rows[:, 6:9], 'unn_values': rows[:, 9], 'inn_values': rows[:, 10]}
+    fill_missing_zeros(arrays)
+    impedance_rows = rows[:, 11:17]
+    if len(rows) and (~np.isnan(impedance_rows)).any(axis=1).all():
+        arrays['impedances'] = impedance_rows[:, 0:3] * np.exp(1j * np.radians(impedance_rows[:, 3:6]))
+    return ScenarioSet(**arrays)
+
+async def read_lines(reader, buffer):
+    """
+    Liest Zeilen aus einem asyncio.StreamReader in den Puffer, bis die Gegenseite die Verbindung schließt.
+    """
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        buffer.add_line(line.decode('utf-8', errors='replace'))
+
+async def read_stdin(buffer):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    await read_lines(reader, buffer)
+
+async def read_client(open_connection, buffer, retry_interval=1.0):
+    """
+    Verbindet sich mit einer Messquelle und liest deren Zeilen; bei Verbindungsabbruch wird es erneut versucht.
+    """
+    while True:
+        try:
+            reader, writer = await open_connection()
+        except OSError as e:
+            print(f"Warnung: Verbindung zur Messquelle fehlgeschlagen ({e}), neuer Versuch in {retry_interval:g} s")
+            await asyncio.sleep(retry_interval)
+            continue
+        try:
+            await read_lines(reader, buffer)
+        finally:
+            writer.close()
+        await asyncio.sleep(retry_interval)
+
+async def serve(start_server, buffer):
+    """
+    Nimmt Verbindungen an (z. B. von einem Messgeräte-Gateway) und liest deren Zeilen in den Puffer.
+    """
+    async def handle(reader, writer):
+        try:
+            await read_lines(reader, buffer)
+        finally:
+            writer.close()
+
+    server = await start_server(handle)
+    async with server:
+        await server.serve_forever()
+
+async def replay_file(file_path, buffer, rate=10.0, repeat=False):
+    """
+    Spielt eine aufgezeichnete Datei als Messquelle ab (Ersatz für ein Messgerät beim Testen).
+    JSON-Lines- bzw. Line-Protokoll-Dateien werden zeilenweise gesendet, CSV/Parquet-Dateien
+    (Spalten siehe SCENARIO_COLUMNS) Zeile für Zeile als JSON.
+
+    Parameter:
+    file_path: str, Pfad zur Aufzeichnung
+    buffer: SampleBuffer
+    rate: float, Messungen pro Sekunde
+    repeat: bool, nach dem Ende von vorne beginnen
+    """
+    while True:
+        for line in recorded_lines(file_path):
+            buffer.add_line(line)
+            await asyncio.sleep(1 / rate)
+        if not repeat:
+            return
+
+def recorded_lines(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.csv', '.parquet'):
+        for df in iter_frames(file_path):
+            for record in df.to_dict('records'):
+                yield json.dumps({key: value.isoformat() if hasattr(value, 'isoformat') else value for key, value in record.items()})
+    else:
+        with open(file_path, encoding='utf-8') as f:
+            yield from f
+
+def parse_source(source):
+    """
+    Wandelt eine Quellenangabe in eine Coroutine-Funktion buffer -> None um:
+    - '-' oder 'stdin': Standardeingabe (z. B. 'messgeraet | python cli.py live')
+    - 'tcp://host:port': mit einem TCP-Server verbinden
+    - 'tcp-listen://host:port': selbst auf TCP-Verbindungen warten
+    - 'unix:///pfad' bzw. 'unix-listen:///pfad': dasselbe über einen Unix-Socket
+    """
+    if source in ('-', 'stdin'):
+        return read_stdin
+    scheme, separator, address = source.partition('://')
+    if not separator:
+        raise ValueError(f"Ungültige Quelle: {source!r}")
+    if scheme in ('tcp', 'tcp-listen'):
+        host, _, port = address.rpartition(':')
+        host, port = host or '0.0.0.0', int(port)
+        if scheme == 'tcp':
+            return lambda buffer: read_client(lambda: asyncio.open_connection(host, port), buffer)
+        return lambda buffer: serve(lambda handle: asyncio.start_server(handle, host, port), buffer)
+    if scheme in ('unix', 'unix-listen'):
+        if scheme == 'unix':
+            return lambda buffer: read_client(lambda: asyncio.open_unix_connection(address), buffer)
+        return lambda buffer: serve(lambda handle: asyncio.start_unix_server(handle, address), buffer)
+    raise ValueError(f"Unbekanntes Protokoll der Quelle: {scheme!r}")
+
+class LiveFeed:
+    """
+    Empfängt Messungen in einem eigenen Thread mit asyncio-Ereignisschleife und legt sie im Ringpuffer ab.
+    Die GUI liest den Puffer unabhängig davon, der Empfang blockiert sie also nie.
+    """
+
+    def __init__(self, reader, buffer_size=10000, require_impedances=False):
+        """
+        Parameter:
+        reader: Coroutine-Funktion buffer -> None, z. B. aus parse_source oder functools.partial(replay_file, pfad)
+        buffer_size: int, Anzahl der Messungen im Ringpuffer
+        require_impedances: bool, Messungen ohne Impedanzen als ungültig überspringen (nötig für die Methode 'millman')
+        """
+        self.reader = reader
+        self.buffer = SampleBuffer(buffer_size, require_impedances)
+        self.error = None
+        self.finished = False
+        self._loop = None
+        self._task = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name='LiveFeed')
+        self._thread.start()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self.reader(self.buffer))
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+            print(f"Fehler beim Empfang der Messungen: {e}")
+        finally:
+            self.finished = True
+            self._loop.close()
+
+    def stop(self):
+        """
+        Beendet den Empfang.
+        """
+        if self._loop is not None and not self._loop.is_closed() and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+class LiveDiagram:
+    """
+    Zeigt jeweils die neueste Messung eines LiveFeed als Zeigerdiagramm an.
+    Ein GUI-Timer fragt den Puffer mit höchstens fps Bildern pro Sekunde ab; kommen dazwischen mehrere
+    Messungen an, wird nur die neueste berechnet und gezeichnet. N' wird mit Warmstart von der
+    zuletzt angezeigten Messung berechnet (NPrimeTracker), der Verlauf von N' wird als Linie gezeigt.
+    """
+
+    def __init__(self, feed, settings=None, fps=10, trail=200, method='geometric'):
+        """
+        Parameter:
+        feed: LiveFeed, dessen Puffer angezeigt wird
+        settings: dict, überschreibt Einträge aus DEFAULT_SETTINGS
+        fps: float, höchstens so viele Bilder pro Sekunde
+        trail: int, Anzahl der angezeigten Bilder im Verlauf von N'
+        method: Methode zur Berechnung von N' ('geometric' oder 'millman'; 'millman' nur mit einem LiveFeed, der
+                Messungen ohne Impedanzen überspringt, siehe require_impedances)
+        """
+        if method == 'millman' and not feed.buffer.require_impedances:
+            raise ValueError("Die Methode 'millman' benötigt einen LiveFeed mit require_impedances=True")
+        self.feed = feed
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.last_sequence = 0
+        self.first_timestamp = None
+        self.trail = deque(maxlen=trail)
+        self.frame_times = deque(maxlen=20)
+
+        triangle_pts = calculate_triangle_points(self.settings['triangle_amplitude'])
+        self.tracker = NPrimeTracker(triangle_pts, method)
+        self.fig, self.ax = plt.subplots(figsize=(10, 10))
+        self.renderer = DiagramRenderer(self.ax, triangle_pts, current_scale=self.settings['current_scale'],
+                                        label_fontsize=self.settings['overview_label_fontsize'], blit=False)
+        self.trajectory, = self.ax.plot([], [], '-', color='gray', linewidth=1, alpha=0.7)
+        self.renderer.show_placeholder("Warte auf Messungen ...")
+        self.timer = self.fig.canvas.new_timer(interval=int(1000 / fps))
+        self.timer.add_callback(self.poll)
+        self.fig.canvas.mpl_connect('close_event', lambda event: self.timer.stop())
+
+    def start(self):
+        self.timer.start()
+
+    @timed('live.frame')
+    def poll(self):
+        """
+        Zeichnet die neueste Messung, falls seit dem letzten Bild eine neue angekommen ist.
+        """
+        latest = self.feed.buffer.latest()
+        if latest is None or latest[0] == self.last_sequence:
+            return
+        sequence, timestamp, values = latest
+        skipped = sequence - self.last_sequence - 1
+        if skipped > 0:
+            count('live.skipped_samples', skipped)
+        self.last_sequence = sequence
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+
+        scenario = scenarios_from_rows(values[None, :])[0]
+        optimal_n_prime, shift_enabled = self.tracker.update(scenario)
+        inn_angle = float(calculate_inn_angle(scenario))
+        if shift_enabled:
+            self.trail.append(tuple(optimal_n_prime))
+
+        self.renderer.update(optimal_n_prime, scenario.voltages, scenario.currents, scenario.angles,
+                             scenario.inn_values, inn_angle, shift_enabled, redraw=False)
+        self.trajectory.set_data(*np.array(self.trail).reshape(-1, 2).T)
+
+        self.frame_times.append(time.perf_counter())
+        fps = (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0]) if len(self.frame_times) > 1 else 0
+        buffer = self.feed.buffer
+        self.fig.canvas.manager.set_window_title(
+            f"Zeigerdiagramme - Live (t = {timestamp - self.first_timestamp:.1f} s, {buffer.received} Messungen, "
+            f"{buffer.invalid} ungültig, {fps:.1f} Bilder/s)")
+        self.fig.canvas.draw_idle()
+
+def run_live(reader, buffer_size=10000, fps=10, trail=200, method='geometric', settings=None):
+    """
+    Startet den Empfang und zeigt das Live-Diagramm an, bis das Fenster geschlossen wird.
+
+    Rückgabewert:
+    SampleBuffer mit den zuletzt empfangenen Messungen.
+    """
+    feed = LiveFeed(reader, buffer_size, require_impedances=method == 'millman')
+    feed.start()
+    diagram = LiveDiagram(feed, settings=settings, fps=fps, trail=trail, method=method)
+    diagram.start()
+    try:
+        plt.show()
+    finally:
+        feed.stop()
+    return feed.buffer
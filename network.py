@@ -0,0 +1,283 @@
+import os
+import numpy as np
+from calculations import SolverResult, calculate_polygon_points, solve_scenarios
+from input_excel_data import (
+    count_phases, impedance_columns, iter_frames, load_scenarios_from_excel, read_scenario_sheets, scenario_columns, scenarios_from_frame
+)
+from scenario_set import ScenarioSet
+from validation import ScenarioValidationError, ValidationIssue, apply_validation
+from instrumentation import timed
+
+# Ein Netz besteht aus mehreren unabhängigen Sternsystemen (z. B. mehrere Transformatoren oder Abgänge einer Anlage),
+# jedes mit eigener Amplitude und beliebiger Anzahl von Phasen.
+#
+# Excel: Das Blatt 'Systems' listet die Systeme (Spalten 'Name' und 'Amplitude'), die Blätter eines Systems tragen
+# dessen Namen als Präfix, z. B. 'Trafo 1 Currents', 'Trafo 1 Current Angles', ... Ohne das Blatt 'Systems' enthält
+# die Datei ein einzelnes System mit den gewohnten Blättern.
+# CSV/Parquet: Die optionale Spalte 'System' ordnet jede Zeile einem System zu, die optionale Spalte 'Amplitude'
+# gibt dessen Amplitude an. Hat ein System weniger Phasen als die Datei Stromspalten, bleiben die übrigen Spalten leer.
+
+SYSTEMS_SHEET = 'Systems'
+SYSTEM_COLUMN = 'System'
+AMPLITUDE_COLUMN = 'Amplitude'
+DEFAULT_AMPLITUDE = 50
+MIN_PHASES = 3  # Bei zwei Phasen liegen N, L1 und L2 auf einer Geraden, N' wäre nicht eindeutig
+
+class StarSystem:
+    """
+    Ein Sternsystem eines Netzes: Name, Amplitude der Strangspannungen und die Szenarien (ScenarioSet).
+    Die Anzahl der Phasen ergibt sich aus den Szenarien, die Quellen liegen auf einem regelmäßigen Vieleck.
+    """
+    __slots__ = ('name', 'amplitude', 'scenarios')
+
+    def __init__(self, name, amplitude, scenarios):
+        self.name = name
+        self.amplitude = float(amplitude)
+        self.scenarios = scenarios
+
+    @property
+    def num_phases(self):
+        return self.scenarios.num_phases
+
+    def polygon_points(self):
+        """
+        Koordinaten der Quellen L1..Ln (siehe calculate_polygon_points).
+        """
+        return calculate_polygon_points(self.amplitude, self.num_phases)
+
+    def __len__(self):
+        return len(self.scenarios)
+
+    def __repr__(self):
+        return f"StarSystem({self.name!r}, Amplitude {self.amplitude:g}, {self.num_phases} Phasen, {len(self)} Szenarien)"
+
+class Network:
+    """
+    Alle Sternsysteme einer Eingabedatei in der Reihenfolge der Datei.
+    """
+
+    def __init__(self, systems):
+        self.systems = list(systems)
+        names = [system.name for system in self.systems]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Doppelte Systemnamen: {', '.join(duplicates)}")
+
+    @property
+    def names(self):
+        return [system.name for system in self.systems]
+
+    @property
+    def num_scenarios(self):
+        return sum(len(system) for system in self.systems)
+
+    def phase_groups(self):
+        """
+        Indizes der Systeme, gruppiert nach der Anzahl der Phasen (dict Phasen -> Liste von Indizes).
+        Systeme einer Gruppe lassen sich gemeinsam berechnen und rendern.
+        """
+        groups = {}
+        for index, system in enumerate(self.systems):
+            groups.setdefault(system.num_phases, []).append(index)
+        return groups
+
+    def __len__(self):
+        return len(self.systems)
+
+    def __iter__(self):
+        return iter(self.systems)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for system in self.systems:
+                if system.name == key:
+                    return system
+            raise KeyError(key)
+        return self.systems[key]
+
+    def __repr__(self):
+        return f"Network({len(self)} Systeme, {self.num_scenarios} Szenarien)"
+
+def _amplitude(value, default):
+    """
+    Amplitude aus einer Zelle; leere Zellen ergeben default, ungültige Werte None.
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if np.isnan(value):
+        return default
+    return value if value > 0 else None
+
+def _check_phases(system):
+    """
+    Liste von ValidationIssue, wenn das System zu wenige Phasen hat.
+    """
+    if system.num_phases >= MIN_PHASES:
+        return []
+    label = f"System '{system.name}': " if system.name else ""
+    return [ValidationIssue(None, 'currents', f"{label}{system.num_phases} Phase(n), mindestens {MIN_PHASES} werden benötigt")]
+
+@timed('load.network')
+def load_network(file_path, default_amplitude=DEFAULT_AMPLITUDE, use_cache=True, validate='raise'):
+    """
+    Lädt ein Netz aus einer Excel-, CSV- oder Parquet-Datei (Aufbau siehe Anfang des Moduls).
+    Dateien ohne Systemangaben ergeben ein Netz mit einem einzigen System (Name '') und der Amplitude default_amplitude.
+    Die Szenarien werden je System geprüft, die Nummern der Szenarien zählen je System ab 1.
+
+    Parameter:
+    file_path: str, Pfad zur Datei
+    default_amplitude: float, Amplitude für Systeme ohne Angabe
+    use_cache: bool, Cache verwenden (nur für Excel-Dateien mit einem System)
+    validate: Prüfmodus, siehe load_scenarios_from_excel
+
+    Rückgabewert:
+    Network
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        systems = load_systems_from_excel(file_path, default_amplitude, use_cache)
+    elif extension in ('.csv', '.parquet'):
+        systems = load_systems_from_frames(file_path, default_amplitude)
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: {extension}")
+
+    for system in systems:
+        source = f"{file_path} [{system.name}]" if system.name else file_path
+        system.scenarios = apply_validation(system.scenarios, validate, source=source)
+    return Network(systems)
+
+def load_systems_from_excel(file_path, default_amplitude=DEFAULT_AMPLITUDE, use_cache=True):
+    """
+    Liest die Sternsysteme einer Excel-Datei (ohne Prüfung der Werte, siehe load_network).
+    """
+    import openpyxl
+
+    # Nur die Blattnamen lesen; Dateien mit einem System laufen weiter über den Cache
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    sheet_names = workbook.sheetnames
+    workbook.close()
+    if SYSTEMS_SHEET not in sheet_names:
+        system = StarSystem('', default_amplitude, load_scenarios_from_excel(file_path, use_cache=use_cache, validate='off'))
+        issues = _check_phases(system)
+        if issues:
+            raise ScenarioValidationError(issues, file_path)
+        return [system]
+
+    import pandas as pd
+    xls = pd.ExcelFile(file_path)
+    table = pd.read_excel(xls, SYSTEMS_SHEET)
+    if 'Name' not in table.columns:
+        raise ScenarioValidationError([ValidationIssue(None, 'Name', f"Spalte 'Name' fehlt im Blatt '{SYSTEMS_SHEET}'")], file_path)
+    amplitudes = table[AMPLITUDE_COLUMN] if AMPLITUDE_COLUMN in table.columns else [np.nan] * len(table)
+
+    systems, issues = [], []
+    for name, amplitude in zip(table['Name'], amplitudes):
+        if pd.isna(name):
+            continue
+        name = str(name).strip()
+        value = _amplitude(amplitude, default_amplitude)
+        if value is None:
+            issues.append(ValidationIssue(None, AMPLITUDE_COLUMN, f"System '{name}': ungültige Amplitude {amplitude!r}"))
+            continue
+        try:
+            system = StarSystem(name, value, read_scenario_sheets(xls, f"{file_path} [{name}]", prefix=f"{name} "))
+        except ScenarioValidationError as e:
+            issues.extend(e.issues)
+            continue
+        issues.extend(_check_phases(system))
+        systems.append(system)
+    if issues:
+        raise ScenarioValidationError(issues, file_path)
+    if not systems:
+        raise ScenarioValidationError([ValidationIssue(None, 'Name', f"Das Blatt '{SYSTEMS_SHEET}' enthält keine Systeme")], file_path)
+    return systems
+
+def load_systems_from_frames(file_path, default_amplitude=DEFAULT_AMPLITUDE):
+    """
+    Liest die Sternsysteme einer CSV- oder Parquet-Datei (ohne Prüfung der Werte, siehe load_network).
+    Die Zeilen eines Systems müssen nicht zusammenhängen, ihre Reihenfolge bleibt erhalten.
+    """
+    import pandas as pd
+    df = pd.concat(list(iter_frames(file_path, chunk_size=100000)), ignore_index=True)
+    groups = df.groupby(df[SYSTEM_COLUMN].astype(str), sort=False) if SYSTEM_COLUMN in df.columns else [('', df)]
+    total_phases = count_phases(df.columns)
+    phase_columns = [columns for columns in scenario_columns(total_phases).values() if isinstance(columns, list)]
+    phase_columns += [columns for columns in impedance_columns(total_phases) if columns[0] in df.columns]
+
+    systems, issues = [], []
+    for name, group in groups:
+        # Phasenspalten, die in diesem System leer sind, gehören zu Systemen mit mehr Phasen
+        num_phases = count_phases(column for column in group.columns if group[column].notna().any())
+        group = group.drop(columns=[column for columns in phase_columns for column in columns[num_phases:]])
+        label = f"System '{name}': " if name else ""
+
+        amplitude = default_amplitude
+        if AMPLITUDE_COLUMN in group.columns:
+            values = group[AMPLITUDE_COLUMN].dropna().unique()
+            amplitude = _amplitude(values[0], default_amplitude) if len(values) == 1 else default_amplitude
+            if len(values) > 1 or amplitude is None:
+                issues.append(ValidationIssue(None, AMPLITUDE_COLUMN, f"{label}Amplitude muss eindeutig und positiv sein "
+                                                                      f"({', '.join(map(str, values))})"))
+                continue
+        try:
+            system = StarSystem(name, amplitude, scenarios_from_frame(group))
+        except ScenarioValidationError as e:
+            issues.extend(ValidationIssue(issue.scenario, issue.field, f"{label}{issue.message}") for issue in e.issues)
+            continue
+        issues.extend(_check_phases(system))
+        systems.append(system)
+    if issues:
+        raise ScenarioValidationError(issues, file_path)
+    return systems
+
+def _normalized(system):
+    """
+    ScenarioSet des Systems mit auf die Amplitude 1 bezogenen Spannungen (Ströme, Winkel und Impedanzen unverändert).
+    """
+    arrays = system.scenarios.arrays()
+    arrays['voltages'] = arrays['voltages'] / system.amplitude
+    arrays['unn_values'] = arrays['unn_values'] / system.amplitude
+    arrays['numbers'] = system.scenarios.scenario_numbers()
+    return ScenarioSet(**arrays)
+
+@timed('solve.network')
+def solve_network(network, method='geometric', diagnostics=False, multi_start=False):
+    """
+    Berechnet N' und den Winkel von I_NN für alle Systeme eines Netzes (siehe solve_scenarios).
+    Die Geometrie eines Systems ist bis auf den Maßstab durch die Anzahl der Phasen festgelegt: Bezogen auf die
+    Amplitude 1 liegen alle Systeme mit gleich vielen Phasen auf demselben Vieleck. Diese Systeme werden daher
+    zusammen in einem einzigen vektorisierten Solver-Lauf berechnet und N' und die Residuen anschließend wieder mit
+    der Amplitude des Systems skaliert. Das gilt für beide Methoden, N' nach Millman ist linear in den Quellspannungen.
+
+    Parameter:
+    network: Network
+    method: Methode zur Berechnung von N' ('geometric' oder 'millman')
+    diagnostics: bool, zusätzlich je System ein SolverResult zurückgeben
+    multi_start: bool, inkonsistente Szenarien von mehreren Startpunkten aus neu berechnen
+
+    Rückgabewert:
+    Liste mit einem Tupel (n_primes, shift_enabled, inn_angles[, solver]) pro System, in der Reihenfolge des Netzes.
+    """
+    results = [None] * len(network)
+    groups = {}
+    for index, system in enumerate(network):
+        # Systeme ohne Impedanzen nicht mit solchen mit Impedanzen zusammenlegen (concatenate verwirft sie sonst)
+        groups.setdefault((system.num_phases, system.scenarios.impedances is not None), []).append(index)
+
+    for (num_phases, _), indices in groups.items():
+        combined = ScenarioSet.concatenate(_normalized(network[index]) for index in indices)
+        solved = solve_scenarios(calculate_polygon_points(1.0, num_phases), combined, method, diagnostics, multi_start)
+        amplitudes = np.repeat([network[index].amplitude for index in indices], [len(network[index]) for index in indices])
+        n_primes = solved[0] * amplitudes[:, None]
+        start = 0
+        for index in indices:
+            part = slice(start, start + len(network[index]))
+            start = part.stop
+            result = (n_primes[part], solved[1][part], solved[2][part])
+            if diagnostics:
+                solver = solved[3]
+                result += (SolverResult(n_primes[part], solver.residual[part] * amplitudes[part], solver.iterations[part], solver.status[part]),)
+            results[index] = result
+    return results
@@ -0,0 +1,252 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+import matplotlib.pyplot as plt
+from batch_render import DEFAULT_SETTINGS, init_worker, render_thumbnails
+
+class OverviewBrowser:
+    """
+    Seitenweise Übersicht aller Szenarien aus kleinen Vorschaubildern.
+    Die Vorschaubilder werden in einem Prozesspool gerendert und als PNG zwischengespeichert,
+    angezeigt wird immer nur eine Seite mit rows * cols Szenarien.
+
+    Bedienung:
+    - Pfeiltasten rechts/links bzw. Bild auf/ab: vorherige/nächste Seite
+    - Pos1/Ende: erste/letzte Seite
+    - Klick auf ein Vorschaubild: Szenario in voller Größe öffnen (on_open)
+    """
+
+    def __init__(self, scenarios, n_primes, shift_enabled, inn_angles, settings=None, rows=3, cols=4,
+                 thumbnail_size=4, thumbnail_dpi=50, workers=None, on_open=None, ready=None, result_func=None, on_page=None):
+        """
+        Parameter:
+        scenarios: ScenarioSet mit allen Szenarien
+        n_primes, shift_enabled, inn_angles: Ergebnisse von solve_scenarios (Werte noch nicht berechneter Szenarien beliebig)
+        settings: dict, überschreibt Einträge aus DEFAULT_SETTINGS
+        rows, cols: int, Anzahl der Zeilen und Spalten pro Seite
+        thumbnail_size: float, Kantenlänge eines Vorschaubilds in Zoll (vor der Rasterung)
+        thumbnail_dpi: int, Auflösung der Vorschaubilder
+        workers: int, Anzahl der Worker-Prozesse (Standard: Anzahl der CPU-Kerne)
+        on_open: Funktion index -> None, wird beim Klick auf ein Vorschaubild aufgerufen
+        ready: bool-Array, welche Ergebnisse bereits berechnet sind (None = alle)
+        result_func: Funktion index -> (optimal_n_prime, shift_enabled, inn_angle) oder None, solange das Ergebnis
+                     noch nicht berechnet ist; wird im GUI-Thread für die noch fehlenden Szenarien der angezeigten
+                     Seiten abgefragt, bis das Ergebnis vorliegt (löst sie eine Exception aus, erhält das Szenario einen Fehlerplatzhalter)
+        on_page: Funktion (Indizes der Seite) -> None, wird beim Blättern aufgerufen (z. B. um die Vorberechnung auszurichten)
+        """
+        self.num_scenarios = len(scenarios)
+        self.rows = rows
+        self.cols = cols
+        self.per_page = rows * cols
+        self.num_pages = max(1, -(-self.num_scenarios // self.per_page))
+        self.thumbnail_size = thumbnail_size
+        self.thumbnail_dpi = thumbnail_dpi
+        self.on_open = on_open
+        self.on_page = on_page
+        self.result_func = result_func
+        self.n_primes = np.array(n_primes, dtype=float).reshape(-1, 2)
+        self.shift_enabled = np.array(shift_enabled, dtype=bool)
+        self.inn_angles = np.array(inn_angles, dtype=float)
+        self.ready = np.ones(self.num_scenarios, dtype=bool) if ready is None else np.array(ready, dtype=bool)
+        self.waiting = set()  # Szenarien der angezeigten Seiten, deren Ergebnis noch fehlt
+        self.numbers = scenarios.scenario_numbers()  # Nummern in der Eingabedatei für die Beschriftung
+        self.page = 0
+        self.thumbnails = {}  # index -> PNG-Daten
+        self.errors = {}      # index -> Fehlermeldung, falls das Vorschaubild nicht gerendert werden konnte
+        self.requested = set()
+        self.futures = {}     # Future -> Indizes der darin gerenderten Szenarien
+
+        # Eigener Prozesspool; 'spawn', weil die GUI bereits Threads laufen hat.
+        # Die Ergebnisse gehen mit jeder Aufgabe an die Worker, damit später berechnete Szenarien dazukommen können.
+        workers = workers or os.cpu_count() or 1
+        arrays = {name: np.array(values) for name, values in scenarios.arrays().items()}
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(arrays, None, None, None, settings)
+        )
+        self.chunk_size = max(1, self.per_page // workers)
+
+        # Eine Achse pro Platz auf der Seite, die Bilder werden beim Blättern nur ausgetauscht
+        self.fig, axes = plt.subplots(rows, cols, figsize=(cols * 3, rows * 3))
+        self.axes = list(np.atleast_1d(axes).flatten())
+        pixels = int(round(thumbnail_size * thumbnail_dpi))
+        self.blank = np.ones((pixels, pixels, 3))
+        self.error_image = np.full((pixels, pixels, 3), (1.0, 0.85, 0.85))
+        self.images = []
+        for ax in self.axes:
+            self.images.append(ax.imshow(self.blank, interpolation='antialiased'))
+            ax.set_xticks([])
+            ax.set_yticks([])
+        self.fig.subplots_adjust(left=0.02, right=0.98, bottom=0.02, top=0.9, hspace=0.25, wspace=0.05)
+
+        self.fig.canvas.mpl_connect('key_press_event', self.on_key)
+        self.fig.canvas.mpl_connect('button_press_event', self.on_click)
+        self.fig.canvas.mpl_connect('close_event', self.on_close)
+        self.timer = self.fig.canvas.new_timer(interval=100)
+        self.timer.add_callback(self.poll)
+
+        self.show_page(0)
+
+    def page_indices(self, page):
+        start = page * self.per_page
+        return range(start, min(start + self.per_page, self.num_scenarios))
+
+    def result(self, index):
+        """
+        Ergebnis eines Szenarios als (optimal_n_prime, shift_enabled, inn_angle) oder None, solange es fehlt.
+        """
+        if not self.ready[index]:
+            return None
+        return tuple(self.n_primes[index]), bool(self.shift_enabled[index]), float(self.inn_angles[index])
+
+    def request_page(self, page):
+        """
+        Gibt das Rendern der noch fehlenden Vorschaubilder einer Seite in Auftrag.
+        Szenarien ohne Ergebnis werden vorgemerkt (waiting) und gerendert, sobald result_func es liefert.
+        """
+        if not 0 <= page < self.num_pages:
+            return
+        missing = [index for index in self.page_indices(page)
+                   if index not in self.thumbnails and index not in self.errors and index not in self.requested]
+        if self.result_func is not None:
+            self.waiting.update(index for index in missing if not self.ready[index])
+        missing = [index for index in missing if self.ready[index]]
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            results = [self.result(index) for index in chunk]
+            self.futures[self.executor.submit(render_thumbnails, chunk, self.thumbnail_size, self.thumbnail_dpi, results)] = chunk
+            self.requested.update(chunk)
+
+    def fetch_results(self):
+        """
+        Fragt die Ergebnisse der vorgemerkten Szenarien bei result_func ab und rendert die neu hinzugekommenen.
+
+        Rückgabewert:
+        Menge der Szenarien, die ein Ergebnis oder einen Fehler erhalten haben.
+        """
+        arrived = set()
+        for index in list(self.waiting):
+            try:
+                result = self.result_func(index)
+            except Exception as e:
+                self.errors[index] = str(e) or type(e).__name__
+                arrived.add(index)
+                continue
+            if result is not None:
+                self.n_primes[index], self.shift_enabled[index], self.inn_angles[index] = result
+                self.ready[index] = True
+                arrived.add(index)
+        self.waiting -= arrived
+        if arrived:
+            self.request_page(self.page)
+            self.request_page(self.page + 1)
+        return arrived
+
+    def show_page(self, page):
+        """
+        Zeigt eine Seite an; die aktuelle und die nächste Seite werden bei Bedarf im Hintergrund gerendert.
+        """
+        self.page = min(max(page, 0), self.num_pages - 1)
+        if self.on_page is not None:
+            self.on_page(self.page_indices(self.page))
+        self.waiting.clear()
+        self.request_page(self.page)
+        self.request_page(self.page + 1)
+        self.refresh()
+        if self.futures or self.waiting:
+            self.timer.start()
+
+    def refresh(self):
+        """
+        Überträgt die vorhandenen Vorschaubilder der aktuellen Seite in die Achsen.
+        """
+        indices = list(self.page_indices(self.page))
+        for slot, (ax, image) in enumerate(zip(self.axes, self.images)):
+            if slot >= len(indices):
+                ax.set_visible(False)
+                continue
+            index = indices[slot]
+            ax.set_visible(True)
+            if index in self.thumbnails:
+                image.set_data(plt.imread(io.BytesIO(self.thumbnails[index])))
+                ax.set_title(f"Szenario {self.numbers[index]}", fontsize=10)
+            elif index in self.errors:
+                image.set_data(self.error_image)
+                ax.set_title(f"Szenario {self.numbers[index]} (Fehler: {self.errors[index]})", fontsize=10, color='darkred')
+            elif not self.ready[index]:
+                image.set_data(self.blank)
+                ax.set_title(f"Szenario {self.numbers[index]} (wird berechnet ...)", fontsize=10)
+            else:
+                image.set_data(self.blank)
+                ax.set_title(f"Szenario {self.numbers[index]} (wird gerendert ...)", fontsize=10)
+        self.fig.suptitle(f"Übersicht - Seite {self.page + 1} von {self.num_pages} (Pfeiltasten/Bild auf/ab zum Blättern, Klick öffnet das Szenario)")
+        self.fig.canvas.draw_idle()
+
+    def poll(self):
+        """
+        Übernimmt fertig gerenderte Vorschaubilder und neu berechnete Ergebnisse (siehe fetch_results) und aktualisiert
+        die Seite, falls sie betroffen ist.
+        Schlägt das Rendern fehl (z. B. abgestürzter Worker), erhalten die betroffenen Szenarien einen Fehlerplatzhalter.
+        """
+        visible = set(self.page_indices(self.page))
+        changed = bool(self.waiting) and not visible.isdisjoint(self.fetch_results())
+        done = [future for future in self.futures if future.done()]
+        for future in done:
+            chunk = self.futures.pop(future)
+            self.requested.difference_update(chunk)
+            changed = changed or not visible.isdisjoint(chunk)
+            try:
+                rendered = future.result()
+            except Exception as e:
+                print(f"Warnung: Vorschaubilder der Szenarien {', '.join(str(self.numbers[index]) for index in chunk)} "
+                      f"konnten nicht gerendert werden: {e}")
+                self.errors.update((index, str(e) or type(e).__name__) for index in chunk)
+                continue
+            for index, png in rendered:
+                self.thumbnails[index] = png
+        if changed:
+            self.refresh()
+        if not self.futures and not self.waiting:
+            self.timer.stop()
+
+    def wait(self, poll_interval=0.05):
+        """
+        Wartet, bis alle angeforderten Vorschaubilder gerendert sind (z. B. ohne laufende GUI-Ereignisschleife),
+        einschließlich der Szenarien, deren Ergebnis noch von result_func kommt.
+        """
+        while self.futures or self.waiting:
+            wait(list(self.futures), timeout=poll_interval)
+            self.poll()
+
+    def on_key(self, event):
+        if event.key in ('right', 'pagedown', 'down', ' '):
+            self.show_page(self.page + 1)
+        elif event.key in ('left', 'pageup', 'up'):
+            self.show_page(self.page - 1)
+        elif event.key == 'home':
+            self.show_page(0)
+        elif event.key == 'end':
+            self.show_page(self.num_pages - 1)
+
+    def on_click(self, event):
+        if event.inaxes is None or self.on_open is None:
+            return
+        slot = self.axes.index(event.inaxes)
+        indices = self.page_indices(self.page)
+        if slot < len(indices) and self.ready[indices[slot]]:
+            self.on_open(indices[slot])
+
+    def on_close(self, event):
+        self.close()
+
+    def close(self):
+        """
+        Beendet den Prozesspool.
+        """
+        self.timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
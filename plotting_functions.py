@@ -1,98 +1,17 @@
-import math
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
-from scipy.optimize import minimize
-
-# Calculate the angle (in degrees) between two points
-def calculate_angle(x1, y1, x2, y2):
-    """
-    Calculate the angle (in degrees) between two points.
-    
-    Parameters:
-    x1, y1, x2, y2: Coordinates of the two points.
-    
-    Returns:
-    Angle in degrees between the two points.
-    """
-    return math.degrees(math.atan2(y2 - y1, x2 - x1))
-
-# Calculate the quadratic deviations of the distances for the given point p
-def combined_distance_error(p, triangle_pts, u_nn, u_values):
-    """
-    Calculate the quadratic deviations of the distances for the given point.
-    
-    Parameters:
-    p: Coordinates of the point.
-    triangle_pts: Coordinates of the triangle vertices.
-    u_nn: Distance from the origin to the point.
-    u_values: Distances from triangle vertices to the point.
-    
-    Returns:
-    Sum of squared errors of distances.
-    """
-    x, y = p
-    # Distance from N to p
-    dist_n = abs(np.sqrt((x - 0) ** 2 + (y - 0) ** 2) - u_nn)
-    # Distances from the triangle points L1, L2, L3 to p
-    dist_errors = [abs(np.sqrt((x - pt[0]) ** 2 + (y - pt[1]) ** 2) - u_value) for pt, u_value in zip(triangle_pts, u_values)]
-    # Sum of squared errors
-    return dist_n ** 2 + sum(dist ** 2 for dist in dist_errors)
-
-# Calculate the vertices of the equilateral triangle based on the amplitude of the input voltages
-def calculate_triangle_points(triangle_amplitude):
-    """
-    Calculate the vertices of an equilateral triangle based on the amplitude of the input voltages.
-    
-    Parameters:
-    triangle_amplitude: Amplitude of the input voltages.
-    
-    Returns:
-    List of coordinates of the triangle vertices.
-    """
-    return [
-        (triangle_amplitude * np.cos(np.radians(0)), triangle_amplitude * np.sin(np.radians(0))),
-        (triangle_amplitude * np.cos(np.radians(120)), triangle_amplitude * np.sin(np.radians(120))),
-        (triangle_amplitude * np.cos(np.radians(240)), triangle_amplitude * np.sin(np.radians(240)))
-    ]
-
-# Calculate the optimal point N' by minimizing the distance error
-def calculate_optimal_n_prime(triangle_pts, u_nn, u_values):
-    """
-    Calculate the optimal point N' by minimizing the distance error.
-    
-    Parameters:
-    triangle_pts: Coordinates of the triangle vertices.
-    u_nn: Distance from the origin to the point.
-    u_values: Distances from triangle vertices to the point.
-    
-    Returns:
-    Coordinates of the optimal point N'.
-    """
-    centroid = np.mean(triangle_pts, axis=0)  # Calculate centroid of the triangle using NumPy
-    initial_guess = (centroid[0], centroid[1])  # Initial guess for optimization based on the centroid
-    result = minimize(combined_distance_error, initial_guess, args=(triangle_pts, u_nn, u_values), method='Powell', options={'maxiter': 1000, 'disp': True})
-    if not result.success:
-        print("Warning: Optimization unsuccessful. Setting N' to centroid.")
-        return centroid
-    return result.x
-
-# Calculate the angle of I_NN based on the given currents and angles
-def calculate_inn_angle(currents, current_angles):
-    """
-    Calculate the angle of I_NN based on the given currents and angles.
-    
-    Parameters:
-    currents: List of current magnitudes.
-    current_angles: List of current angles in degrees.
-    
-    Returns:
-    Angle of I_NN in degrees.
-    """
-    real_sum = sum(current * np.cos(np.radians(angle)) for current, angle in zip(currents, current_angles))
-    imag_sum = sum(current * np.sin(np.radians(angle)) for current, angle in zip(currents, current_angles))
-    return np.degrees(np.arctan2(imag_sum, real_sum))
+from instrumentation import stage, timed
+# The calculations live in calculations.py (no matplotlib needed) and are re-exported here for existing imports
+from calculations import (
+    calculate_angle, combined_distance_error, _scenario_inputs, calculate_triangle_points, calculate_polygon_points, calculate_optimal_n_prime,
+    calculate_optimal_n_prime_batch, calculate_n_prime_millman, calculate_n_prime, check_n_prime_consistency,
+    calculate_inn_angle, solve_scenarios, solve_scenario_chunks, calculate_current_arrows, calculate_diagram_limits,
+    widen_limits
+)
 
 # Plot the diagram of the triangle, star point, and currents
+@timed('plot.plot_diagram')
 def plot_diagram(triangle_pts, optimal_n_prime, angles, currents, current_angles, inn_value, inn_angle, current_scale=1, shift_enabled=True, ax=None, label_fontsize=10):
     """
     Draw the complete diagram for a scenario.
@@ -143,16 +62,17 @@ def plot_diagram(triangle_pts, optimal_n_prime, angles, currents, current_angles
         ax.plot(point[0], point[1], 'ko')
         texts.append(ax.text(point[0], point[1], f"L{i}", fontsize=label_fontsize, verticalalignment='bottom', horizontalalignment='right'))
 
-    # Draw the voltages U1_2, U2_3, U3_1 (correctly between the points)
-    for i in range(3):
+    # Draw the voltages U1_2, U2_3, ..., Un_1 (correctly between the points)
+    num_phases = len(triangle_pts)
+    for i in range(num_phases):
         start_point = triangle_pts[i]
-        end_point = triangle_pts[(i + 1) % 3]
+        end_point = triangle_pts[(i + 1) % num_phases]
         mid_x = (start_point[0] + end_point[0]) / 2
         mid_y = (start_point[1] + end_point[1]) / 2
 
         # Draw the arrow between the points
         ax.annotate('', xy=end_point, xytext=start_point, arrowprops=dict(arrowstyle="->", color='blue'))
-        texts.append(ax.text(mid_x, mid_y, f"U{i + 1}_{(i + 2) if (i + 2) <= 3 else 1}", fontsize=label_fontsize, color='blue', ha='center'))
+        texts.append(ax.text(mid_x, mid_y, f"U{i + 1}_{(i + 2) if (i + 2) <= num_phases else 1}", fontsize=label_fontsize, color='blue', ha='center'))
 
     # Use ax.margins() to automatically add buffer to the axes
     ax.margins(0.1)
@@ -175,7 +95,7 @@ def plot_diagram(triangle_pts, optimal_n_prime, angles, currents, current_angles
 
     # Draw current I_NN with the measured value and angle (only if I_NN exists)
     if inn_value > 0:
-        clipped = draw_currents(ax, optimal_n_prime, [inn_value], [inn_angle], current_scale, label_fontsize, current_legend, current_label_prefix="I_NN", current_color='purple')
+        clipped = draw_currents(ax, optimal_n_prime, [inn_value], [inn_angle], current_scale, label_fontsize, current_legend, current_label_prefix="I_NN", current_color='purple') or clipped
 
     ax.set_xticks([])
     ax.set_yticks([])
@@ -189,11 +109,14 @@ def plot_diagram(triangle_pts, optimal_n_prime, angles, currents, current_angles
     if clipped:
         main_legend.append(plt.Line2D([0], [0], color='black', linestyle='dashed', label='Shortened Arrow'))
 
-    ax.legend(handles=main_legend + voltage_legend + current_legend, loc="upper right", fontsize=label_fontsize)
+    with stage('plot.legend'):
+        ax.legend(handles=main_legend + voltage_legend + current_legend, loc="upper right", fontsize=label_fontsize)
 
-    plt.tight_layout()
+    with stage('plot.tight_layout'):
+        plt.tight_layout()
 
 # Draw currents with limitation
+@timed('plot.draw_currents')
 def draw_currents(ax, optimal_n_prime, currents, current_angles, current_scale, label_fontsize, current_legend, current_label_prefix, current_color):
     """
     Draw the currents with optional limitation based on axis boundaries.
@@ -208,31 +131,14 @@ def draw_currents(ax, optimal_n_prime, currents, current_angles, current_scale,
     current_legend: List to store legend entries for currents.
     current_label_prefix: Prefix for current labels.
     current_color: Color for current arrows.
+    
+    Returns:
+    True if at least one arrow was shortened.
     """
+    arrows = calculate_current_arrows(optimal_n_prime, currents, current_angles, current_scale, ax.get_xlim(), ax.get_ylim())
 
-    clipped = False
-
-    for i, (current, angle) in enumerate(zip(currents, current_angles), start=1):
-        scaled_current = current / current_scale
-        dx = scaled_current * np.cos(np.radians(angle))
-        dy = scaled_current * np.sin(np.radians(angle))
-        end_x = optimal_n_prime[0] + dx
-        end_y = optimal_n_prime[1] + dy
-
-        # Check if the arrow needs to be shortened
-        linestyle = 'solid'
-        if dx != 0 or dy != 0:
-            scale = np.inf
-            if dx != 0:
-                scale = min(scale, (ax.get_xlim()[1] - optimal_n_prime[0]) / dx if dx > 0 else (ax.get_xlim()[0] - optimal_n_prime[0]) / dx)
-            if dy != 0:
-                scale = min(scale, (ax.get_ylim()[1] - optimal_n_prime[1]) / dy if dy > 0 else (ax.get_ylim()[0] - optimal_n_prime[1]) / dy)
-
-            if scale < 1:
-                end_x = optimal_n_prime[0] + dx * scale
-                end_y = optimal_n_prime[1] + dy * scale
-                linestyle = 'dashed'  # Change style for shortened arrows
-                clipped = True
+    for i, ((end_x, end_y, clipped), angle) in enumerate(zip(arrows, current_angles), start=1):
+        linestyle = 'dashed' if clipped else 'solid'  # Change style for shortened arrows
 
         # Draw the arrow
         if np.isfinite(end_x) and np.isfinite(end_y):
@@ -242,5 +148,264 @@ def draw_currents(ax, optimal_n_prime, currents, current_angles, current_scale,
 
         # Add to current legend
         current_legend.append(plt.Line2D([0], [0], color=current_color, linestyle=linestyle, label=f"{current_label_prefix} ({angle:.2f}°)"))
-    if clipped:
-        return clipped
+    return any(clipped for _, _, clipped in arrows)
+
+# Backends without a window, blitting makes no sense there
+NON_INTERACTIVE_BACKENDS = ('agg', 'cairo', 'pdf', 'pgf', 'ps', 'svg', 'template')
+
+class DiagramRenderer:
+    """
+    Draw the diagram of a scenario with persistent artists.
+    All artists (triangle, arrows, labels, legend) are created once; update() only changes their
+    coordinates, texts and visibility. This keeps switching between scenarios fast compared to
+    clearing the axis and calling plot_diagram again.
+    On interactive backends that support it, only the changing artists (including the legend) are
+    redrawn by blitting. To keep that possible, the axis boundaries only ever widen during a session:
+    a full redraw is only needed when a scenario does not fit into the boundaries shown so far.
+    """
+
+    def __init__(self, ax, triangle_pts, current_scale=1, label_fontsize=10, blit=True, limits=None):
+        """
+        Create all artists of the diagram.
+        
+        Parameters:
+        ax: Matplotlib axis to draw on.
+        triangle_pts: Coordinates of the triangle vertices.
+        current_scale: Scaling factor for currents.
+        label_fontsize: Font size for labels.
+        blit: Use blitting if the backend supports it.
+        limits: Fixed axis boundaries (xlim, ylim), e.g. for an animation; None widens them as needed.
+        """
+        self.ax = ax
+        self.fig = ax.figure
+        self.triangle_pts = [tuple(point) for point in triangle_pts]
+        self.current_scale = current_scale
+        self.label_fontsize = label_fontsize
+        self.legend = None
+        self.legend_signature = None
+        self.limits = None
+        self.fixed_limits = limits
+        self.background = None
+        num_phases = len(self.triangle_pts)
+
+        ax.clear()
+        # Point N
+        ax.plot(0, 0, 'bo', markersize=5)
+        ax.text(0, 0, 'N', fontsize=label_fontsize, verticalalignment='bottom', horizontalalignment='right')
+
+        # N' and U_NN
+        self.n_prime_point, = ax.plot([0], [0], 'ko', markersize=5)
+        self.n_prime_text = ax.text(0, 0, "N'", fontsize=label_fontsize, verticalalignment='bottom', horizontalalignment='left')
+        self.unn_arrow = ax.annotate('', xy=(0, 0), xytext=(0, 0), arrowprops=dict(arrowstyle="->", color='green'))
+        self.unn_text = ax.text(0, 0, "U_NN", fontsize=label_fontsize, color='black', ha='center')
+
+        # Triangle, L1, L2, L3 and the voltages between them do not change between scenarios
+        ax.add_artist(plt.Polygon(self.triangle_pts, fill=None, edgecolor='orange', linestyle='--'))
+        for i, point in enumerate(self.triangle_pts, start=1):
+            ax.plot(point[0], point[1], 'ko')
+            ax.text(point[0], point[1], f"L{i}", fontsize=label_fontsize, verticalalignment='bottom', horizontalalignment='right')
+        for i in range(num_phases):
+            start_point = self.triangle_pts[i]
+            end_point = self.triangle_pts[(i + 1) % num_phases]
+            ax.annotate('', xy=end_point, xytext=start_point, arrowprops=dict(arrowstyle="->", color='blue'))
+            ax.text((start_point[0] + end_point[0]) / 2, (start_point[1] + end_point[1]) / 2, f"U{i + 1}_{(i + 2) if (i + 2) <= num_phases else 1}", fontsize=label_fontsize, color='blue', ha='center')
+
+        # Voltages from N' to L1, L2, L3
+        self.voltage_arrows = [ax.annotate('', xy=point, xytext=(0, 0), arrowprops=dict(arrowstyle="->", color='green')) for point in self.triangle_pts]
+        self.voltage_texts = [ax.text(0, 0, f"U{i}_N'", fontsize=label_fontsize, color='black', ha='center') for i in range(1, num_phases + 1)]
+
+        # Currents and I_NN
+        self.current_arrows = [ax.annotate('', xy=(0, 0), xytext=(0, 0), arrowprops=dict(arrowstyle="->", color='red')) for _ in range(num_phases)]
+        self.current_texts = [ax.text(0, 0, f"I{i}", fontsize=label_fontsize, color='black', ha='center') for i in range(1, num_phases + 1)]
+        self.inn_arrow = ax.annotate('', xy=(0, 0), xytext=(0, 0), arrowprops=dict(arrowstyle="->", color='purple'))
+        self.inn_text = ax.text(0, 0, "I_NN", fontsize=label_fontsize, color='black', ha='center')
+
+        # Placeholder while the scenario is still being calculated
+        self.placeholder = ax.text(0.5, 0.5, '', transform=ax.transAxes, fontsize=label_fontsize + 4, ha='center', va='center', visible=False)
+
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.grid(False)
+        ax.set_aspect('equal', adjustable='box')
+        ax.set_autoscale_on(False)
+        xlim, ylim = limits or calculate_diagram_limits(self.triangle_pts, (0, 0), False)
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        self.fig.tight_layout()
+
+        self.dynamic_artists = [self.n_prime_point, self.n_prime_text, self.unn_arrow, self.unn_text,
+                                *self.voltage_arrows, *self.voltage_texts, *self.current_arrows, *self.current_texts,
+                                self.inn_arrow, self.inn_text, self.placeholder]
+
+        self.blit = (blit and getattr(self.fig.canvas, 'supports_blit', False)
+                     and matplotlib.get_backend().lower() not in NON_INTERACTIVE_BACKENDS)
+        if self.blit:
+            for artist in self.dynamic_artists:
+                artist.set_animated(True)
+            self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        """
+        Store the background without the changing artists after a full redraw and draw them on top.
+        """
+        self.background = self.fig.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_dynamic_artists()
+
+    def draw_dynamic_artists(self):
+        for artist in self.dynamic_artists + [self.legend]:
+            if artist is not None:
+                self.fig.draw_artist(artist)
+
+    @timed('render.update')
+    def update(self, optimal_n_prime, angles, currents, current_angles, inn_value, inn_angle, shift_enabled=True, redraw=True, geometry=None):
+        """
+        Show a scenario: move the artists and update texts and legend.
+        
+        Parameters:
+        optimal_n_prime: Coordinates of the optimal point N'.
+        angles: List of voltage angles.
+        currents: List of current magnitudes.
+        current_angles: List of current angles in degrees.
+        inn_value: Magnitude of I_NN.
+        inn_angle: Angle of I_NN in degrees.
+        shift_enabled: Boolean indicating if star point displacement is enabled.
+        redraw: Redraw the figure; False if the caller draws it (e.g. an animation writer).
+        geometry: Precomputed tuple (limits, current_arrows, inn_arrow), e.g. from a cached ScenarioResult,
+                  computed with the same triangle and current scale. Only used if its limits match the
+                  boundaries shown (otherwise the arrows are shortened against those again).
+        """
+        n_x, n_y = optimal_n_prime[0], optimal_n_prime[1]
+        self.placeholder.set_visible(False)
+        for artist in self.voltage_arrows + self.voltage_texts:
+            artist.set_visible(True)
+        if self.fixed_limits:
+            limits = self.fixed_limits
+        elif geometry is not None:
+            limits = geometry[0]
+        else:
+            limits = calculate_diagram_limits(self.triangle_pts, (n_x, n_y), shift_enabled)
+        limits = tuple(map(tuple, limits))
+        if self.limits is not None and not self.fixed_limits:
+            limits = widen_limits(self.limits, limits)
+        if geometry is not None and tuple(map(tuple, geometry[0])) != limits:
+            geometry = None
+        if geometry is not None:
+            _, arrows, inn_end = geometry
+        xlim, ylim = limits
+        limits_changed = limits != self.limits
+        if limits_changed:
+            self.ax.set_xlim(xlim)
+            self.ax.set_ylim(ylim)
+            self.limits = limits
+
+        # N' and U_NN (only if displacement is enabled)
+        self.n_prime_point.set_data([n_x], [n_y])
+        self.n_prime_text.set_position((n_x, n_y))
+        self.set_arrow(self.unn_arrow, (0, 0), (n_x, n_y))
+        self.unn_text.set_position((n_x / 2, n_y / 2))
+        for artist in (self.n_prime_point, self.n_prime_text, self.unn_arrow, self.unn_text):
+            artist.set_visible(bool(shift_enabled))
+
+        # Voltages from N' to L1, L2, L3
+        voltage_legend = []
+        for i, (arrow, text, point) in enumerate(zip(self.voltage_arrows, self.voltage_texts, self.triangle_pts)):
+            self.set_arrow(arrow, (n_x, n_y), point)
+            text.set_position(((point[0] + n_x) / 2, (point[1] + n_y) / 2))
+            voltage_legend.append(('green', '-', f"U{i + 1}_N' ({angles[i]:.2f}°)"))
+
+        # Currents and I_NN
+        current_legend = []
+        if geometry is None:
+            arrows = calculate_current_arrows((n_x, n_y), currents, current_angles, self.current_scale, xlim, ylim)
+        for arrow, text, (end_x, end_y, clipped), angle in zip(self.current_arrows, self.current_texts, arrows, current_angles):
+            linestyle = self.set_current_arrow(arrow, text, (n_x, n_y), end_x, end_y, clipped)
+            current_legend.append(('red', linestyle, f"I ({angle:.2f}°)"))
+        any_clipped = any(clipped for _, _, clipped in arrows)
+
+        has_inn = inn_value > 0
+        self.inn_arrow.set_visible(has_inn)
+        self.inn_text.set_visible(has_inn)
+        if has_inn:
+            if geometry is None:
+                inn_end, = calculate_current_arrows((n_x, n_y), [inn_value], [inn_angle], self.current_scale, xlim, ylim)
+            end_x, end_y, clipped = inn_end
+            linestyle = self.set_current_arrow(self.inn_arrow, self.inn_text, (n_x, n_y), end_x, end_y, clipped)
+            current_legend.append(('purple', linestyle, f"I_NN ({inn_angle:.2f}°)"))
+            any_clipped = any_clipped or clipped
+
+        self.update_legend(any_clipped, voltage_legend + current_legend)
+        self.legend.set_visible(True)
+        if redraw:
+            self.redraw(limits_changed)
+
+    def show_placeholder(self, text):
+        """
+        Hide everything that depends on the scenario and show a text instead (e.g. while it is being calculated).
+        """
+        for artist in self.dynamic_artists:
+            artist.set_visible(False)
+        if self.legend is not None:
+            self.legend.set_visible(False)
+        self.placeholder.set_text(text)
+        self.placeholder.set_visible(True)
+        self.redraw(False)
+
+    def redraw(self, full):
+        """
+        Redraw the figure; only the changing artists are blitted unless a full redraw is required.
+        """
+        if self.blit and self.background is not None and not full:
+            with stage('render.blit'):
+                self.fig.canvas.restore_region(self.background)
+                self.draw_dynamic_artists()
+                self.fig.canvas.blit(self.ax.bbox)
+        else:
+            with stage('render.draw_idle'):
+                self.fig.canvas.draw_idle()
+
+    @staticmethod
+    def set_arrow(arrow, start, end):
+        arrow.xy = end
+        arrow.xyann = start
+
+    def set_current_arrow(self, arrow, text, start, end_x, end_y, clipped):
+        """
+        Move a current arrow and its label; hide both if the end point is not finite.
+        
+        Returns:
+        Line style of the arrow ('dashed' for shortened arrows).
+        """
+        linestyle = 'dashed' if clipped else 'solid'
+        visible = bool(np.isfinite(end_x) and np.isfinite(end_y))
+        arrow.set_visible(visible)
+        text.set_visible(visible)
+        if visible:
+            self.set_arrow(arrow, start, (end_x, end_y))
+            arrow.arrow_patch.set_linestyle(linestyle)
+            text.set_position(((start[0] + end_x) / 2, (start[1] + end_y) / 2))
+        return linestyle
+
+    def update_legend(self, clipped, entries):
+        """
+        Update the legend texts and line styles in place. The legend is only rebuilt if its entries change
+        (shortened arrows appear or disappear, I_NN is shown or hidden); as it is blitted like the arrows,
+        neither case requires a full redraw.
+        
+        Parameters:
+        clipped: True if at least one arrow was shortened.
+        entries: List of tuples (color, linestyle, label) for voltages and currents.
+        """
+        signature = (clipped, tuple(color for color, _, _ in entries))
+        if signature != self.legend_signature:
+            handles = [plt.Line2D([0], [0], marker='o', color='blue', linestyle='None', markersize=8, label='Star Point N')]
+            if clipped:
+                handles.append(plt.Line2D([0], [0], color='black', linestyle='dashed', label='Shortened Arrow'))
+            handles += [plt.Line2D([0], [0], color=color, linestyle=linestyle, label=label) for color, linestyle, label in entries]
+            self.legend = self.ax.legend(handles=handles, loc="upper right", fontsize=self.label_fontsize)
+            self.legend.set_animated(self.blit)
+            self.legend_signature = signature
+            return
+        offset = 1 + clipped
+        for text, line, (_, linestyle, label) in zip(self.legend.get_texts()[offset:], self.legend.get_lines()[offset:], entries):
+            text.set_text(label)
+            line.set_linestyle(linestyle)
@@ -0,0 +1,161 @@
+import heapq
+import os
+import threading
+from instrumentation import count
+
+class ScenarioPrecomputer:
+    """
+    Berechnet die Ergebnisse aller Szenarien in Hintergrund-Threads und legt sie im ResultCache ab.
+    Die Reihenfolge richtet sich nach dem aktuell angezeigten Szenario (set_focus): Szenarien im Umkreis von
+    lookahead Szenarien darum werden zuerst berechnet, nächste zuerst, danach die übrigen aus der Warteschlange.
+    set_focus sortiert die Warteschlange nicht um, sondern merkt sich nur das Szenario (konstanter Aufwand pro Tastendruck).
+    Jeder Thread nimmt bis zu batch_size Szenarien auf einmal und berechnet sie mit einem Aufruf von compute_func.
+    """
+
+    def __init__(self, num_scenarios, key_func, compute_func, results, workers=None, batch_size=16, lookahead=256):
+        """
+        Parameter:
+        num_scenarios: int, Anzahl der Szenarien
+        key_func: Funktion index -> Schlüssel im ResultCache
+        compute_func: Funktion Liste von Indizes -> Liste von ScenarioResult in derselben Reihenfolge
+        results: ResultCache, in den die Ergebnisse geschrieben werden
+        workers: int, Anzahl der Threads (Standard: Anzahl der CPU-Kerne, höchstens 4)
+        batch_size: int, höchstens so viele Szenarien pro Aufruf von compute_func
+        lookahead: int, Umkreis um das aktuelle Szenario, der vor der übrigen Warteschlange berechnet wird
+        """
+        self.num_scenarios = num_scenarios
+        self.key_func = key_func
+        self.compute_func = compute_func
+        self.results = results
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.lookahead = min(lookahead, num_scenarios // 2)
+        self.errors = {}  # index -> Exception bei fehlgeschlagener Berechnung
+        self._focus = 0
+        self._pending = set(range(num_scenarios))
+        self._in_progress = set()
+        self._queue = [(self.distance(index), index) for index in range(num_scenarios)]  # Abstand zum Fokus beim Einreihen
+        heapq.heapify(self._queue)
+        self._running = 0  # Anzahl der laufenden Threads
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def distance(self, index):
+        """
+        Abstand eines Szenarios zum aktuellen Szenario (mit Umlauf, wie bei der Navigation mit den Pfeiltasten).
+        """
+        offset = abs(index - self._focus)
+        return min(offset, self.num_scenarios - offset)
+
+    def start(self):
+        """
+        Startet die Hintergrund-Threads. Bereits im Cache vorhandene Ergebnisse werden übersprungen.
+        Die Threads beenden sich, wenn alles berechnet ist; request startet sie bei Bedarf wieder.
+        """
+        with self._lock:
+            new_threads = self.workers - self._running
+            self._running += new_threads
+        for _ in range(new_threads):
+            threading.Thread(target=self._run, daemon=True, name='ScenarioPrecomputer').start()
+
+    def stop(self):
+        """
+        Beendet die Hintergrund-Threads nach der laufenden Berechnung.
+        """
+        with self._lock:
+            self._stopped = True
+
+    def set_focus(self, index):
+        """
+        Setzt das aktuell angezeigte Szenario; sein Umkreis (lookahead) wird als Nächstes berechnet.
+        """
+        with self._lock:
+            self._focus = index
+
+    def request(self, indices):
+        """
+        Reiht bereits berechnete Szenarien erneut ein (z. B. wenn ihr Ergebnis aus dem Cache verdrängt wurde),
+        ohne auf die Berechnung zu warten. Fehlgeschlagene Szenarien (errors) werden nicht wiederholt.
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            for index in indices:
+                if index not in self._pending and index not in self._in_progress and index not in self.errors:
+                    self._pending.add(index)
+                    heapq.heappush(self._queue, (self.distance(index), index))
+        self.start()
+
+    def is_done(self, index):
+        """
+        True, wenn die Berechnung des Szenarios abgeschlossen (oder fehlgeschlagen) ist.
+        """
+        with self._lock:
+            return index not in self._pending and index not in self._in_progress
+
+    @property
+    def remaining(self):
+        """
+        Anzahl der noch nicht berechneten Szenarien.
+        """
+        with self._lock:
+            return len(self._pending) + len(self._in_progress)
+
+    def _next_batch(self):
+        """
+        Die nächsten bis zu batch_size Szenarien: zuerst die noch offenen im Umkreis des aktuellen Szenarios,
+        dann die übrigen aus der Warteschlange (leer, wenn alle berechnet sind oder stop() aufgerufen wurde;
+        der Thread beendet sich dann).
+        """
+        batch = []
+        with self._lock:
+            if not self._stopped and self._pending:
+                for offset in range(self.lookahead + 1):
+                    for index in {(self._focus + offset) % self.num_scenarios, (self._focus - offset) % self.num_scenarios}:
+                        if index in self._pending and len(batch) < self.batch_size:
+                            batch.append(index)
+                            self._pending.discard(index)
+                    if len(batch) >= self.batch_size:
+                        break
+                while self._queue and len(batch) < self.batch_size:
+                    _, index = heapq.heappop(self._queue)
+                    if index in self._pending:
+                        batch.append(index)
+                        self._pending.discard(index)
+            # Als in Arbeit markieren, damit kein anderer Thread dasselbe Szenario berechnet
+            self._in_progress.update(batch)
+            if not batch:
+                self._running -= 1
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                keys = {index: self.key_func(index) for index in batch}
+                missing = [index for index in batch if keys[index] not in self.results]
+                if missing:
+                    self._compute(missing, keys)
+            finally:
+                with self._lock:
+                    self._in_progress.difference_update(batch)
+
+    def _compute(self, indices, keys):
+        """
+        Berechnet die Szenarien gemeinsam; schlägt das fehl, einzeln, damit nur die fehlerhaften Szenarien in errors landen.
+        """
+        try:
+            results = self.compute_func(indices)
+        except Exception as e:
+            if len(indices) == 1:
+                self.errors[indices[0]] = e
+                count('precompute.errors')
+                return
+            for index in indices:
+                self._compute([index], keys)
+            return
+        count('precompute.batches')
+        for index, result in zip(indices, results):
+            self.results.put(keys[index], result)
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+from calculations import calculate_n_prime, calculate_inn_angle, calculate_diagram_limits, calculate_current_arrows, solve_scenarios
+
+RESULT_VERSION = 1  # Erhöhen, wenn sich die Berechnung oder der Aufbau von ScenarioResult ändert (alte Einträge werden dann nicht mehr gefunden)
+
+# Berechnete Werte eines Szenarios
+ScenarioResult = namedtuple('ScenarioResult', [
+    'optimal_n_prime',  # Koordinaten von N'
+    'shift_enabled',    # Sternpunktverschiebung aktiv (U_NN != 0 bzw. Millman)
+    'inn_angle',        # Winkel von I_NN in Grad
+    'limits',           # Achsengrenzen (xlim, ylim)
+    'current_arrows',   # Endpunkte der Strompfeile [(end_x, end_y, clipped), ...]
+    'inn_arrow'         # Endpunkt des I_NN-Pfeils (end_x, end_y, clipped) oder None
+])
+
+def scenario_key(scenario, triangle_amplitude, current_scale, method):
+    """
+    Erzeugt einen Schlüssel aus den Eingangsdaten eines Szenarios und den Einstellungen der Berechnung.
+    Gleiche Eingangsdaten ergeben denselben Schlüssel, unabhängig vom Index des Szenarios; RESULT_VERSION geht mit ein.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'v{RESULT_VERSION}|'.encode())
+    for values in (scenario.currents, scenario.angles, scenario.voltages, scenario.unn_values, scenario.inn_values, scenario.impedances):
+        if values is not None:
+            digest.update(np.ascontiguousarray(values).tobytes())
+        digest.update(b'|')
+    digest.update(repr((float(triangle_amplitude), float(current_scale), method)).encode())
+    return digest.hexdigest()
+
+def compute_scenario_result(scenario, triangle_pts, current_scale, method='geometric'):
+    """
+    Berechnet N', den Winkel von I_NN und die Geometrie der Pfeile für ein Szenario.
+    Bei der Methode 'geometric' und U_NN = 0 gibt es keine Sternpunktverschiebung (N' bleibt N).
+    """
+    if method == 'geometric' and scenario.unn_values == 0:
+        optimal_n_prime = (0.0, 0.0)
+        shift_enabled = False
+    else:
+        optimal_n_prime = tuple(calculate_n_prime(triangle_pts, scenario, method=method))
+        shift_enabled = True
+    return scenario_result(scenario, triangle_pts, current_scale, optimal_n_prime, shift_enabled, float(calculate_inn_angle(scenario)))
+
+def compute_scenario_results(scenarios, triangle_pts, current_scale, method='geometric'):
+    """
+    Berechnet die ScenarioResults mehrerer Szenarien (ScenarioSet): N' aller Szenarien mit einem gemeinsamen Aufruf
+    von solve_scenarios, die Geometrie der Pfeile je Szenario. Ergibt dieselben Werte wie compute_scenario_result.
+
+    Rückgabewert:
+    Liste von ScenarioResult in der Reihenfolge der Szenarien.
+    """
+    n_primes, shift_enabled, inn_angles = solve_scenarios(triangle_pts, scenarios, method)
+    return [
+        scenario_result(scenario, triangle_pts, current_scale, tuple(map(float, n_prime)), bool(shift), float(inn_angle))
+        for scenario, n_prime, shift, inn_angle in zip(scenarios, n_primes, shift_enabled, inn_angles)
+    ]
+
+def scenario_result(scenario, triangle_pts, current_scale, optimal_n_prime, shift_enabled, inn_angle):
+    """
+    Ergänzt N' und den Winkel von I_NN eines Szenarios um die Achsengrenzen und die Geometrie der Pfeile.
+    """
+    limits = calculate_diagram_limits(triangle_pts, optimal_n_prime, shift_enabled)
+    current_arrows = calculate_current_arrows(optimal_n_prime, scenario.currents, scenario.angles, current_scale, *limits)
+    inn_arrow = None
+    if scenario.inn_values > 0:
+        inn_arrow = calculate_current_arrows(optimal_n_prime, [scenario.inn_values], [inn_angle], current_scale, *limits)[0]
+    return ScenarioResult(optimal_n_prime, shift_enabled, inn_angle, limits, current_arrows, inn_arrow)
+
+class ResultCache:
+    """
+    LRU-Cache für berechnete Szenarien (ScenarioResult), optional auf der Festplatte gespeichert.
+    Ist maxsize erreicht, wird das am längsten nicht verwendete Ergebnis verworfen.
+    Alle Methoden sind threadsicher.
+    """
+
+    def __init__(self, maxsize=4096, path=None):
+        """
+        Parameter:
+        maxsize: int, maximale Anzahl gespeicherter Ergebnisse
+        path: str, Datei für die Speicherung auf der Festplatte (None = nur im Speicher).
+              Existiert die Datei, werden die Ergebnisse daraus geladen.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """
+        Gibt das Ergebnis zum Schlüssel zurück (None, falls nicht vorhanden) und markiert es als zuletzt verwendet.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """
+        Speichert ein Ergebnis und verwirft bei Bedarf das am längsten nicht verwendete.
+        """
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        Gibt das Ergebnis zum Schlüssel zurück oder berechnet es mit compute() und speichert es.
+        """
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def save(self, path=None):
+        """
+        Speichert den Cache auf der Festplatte (Standard: der beim Erstellen angegebene Pfad).
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("Kein Pfad für den Ergebnis-Cache angegeben.")
+        with self._lock:
+            entries = [(key, tuple(result)) for key, result in self._entries.items()]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load(self, path=None):
+        """
+        Lädt gespeicherte Ergebnisse von der Festplatte. Ein unlesbarer Cache wird ignoriert.
+        """
+        path = path or self.path
+        try:
+            with open(path, 'rb') as f:
+                entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError) as e:
+            print(f"Warnung: Ergebnis-Cache {path} konnte nicht geladen werden: {e}")
+            return
+        for key, values in entries:
+            self.put(key, ScenarioResult(*values))
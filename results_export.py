@@ -0,0 +1,185 @@
+import os
+import numpy as np
+import pandas as pd
+from calculations import (
+    calculate_magnitude_unbalance, calculate_triangle_points, calculate_unbalance, check_n_prime_consistency, solve_scenarios
+)
+from input_excel_data import check_method, iter_scenarios, load_scenarios_from_excel
+from instrumentation import timed
+
+# Die Ergebnistabelle kommt ohne matplotlib aus und kann daher auch auf Servern ohne Grafik erzeugt werden.
+
+EXCEL_MAX_ROWS = 1048575  # Excel erlaubt 1048576 Zeilen, eine davon ist die Kopfzeile
+
+@timed('export.compute')
+def compute_results_table(scenarios, triangle_pts, method='geometric', multi_start=False, solved=None):
+    """
+    Berechnet die Ergebnisse aller Szenarien vektorisiert und gibt sie als Tabelle zurück.
+
+    Spalten:
+    - Szenario: Nummer des Szenarios in der Eingabedatei
+    - N' x, N' y: Koordinaten von N'; Sternpunktverschiebung: False, wenn N' bei N bleibt (U_NN = 0)
+    - UNN (gemessen), UNN (berechnet), Winkel UNN: gemessener Wert, Betrag und Winkel des Zeigers N -> N'
+    - U1N'..UnN', Winkel U1N'..UnN': Sternspannungen als Zeiger N' -> L1..Ln
+    - INN (gemessen), INN (Zeigersumme), Winkel INN: gemessener Wert und Summe der Stromzeiger
+    - Residuum: mittlere quadratische Abweichung der Abstände von N' zu N, L1..Ln von den Messwerten (leer ohne Sternpunktverschiebung)
+    - Status, Iterationen: Ergebnis des Solvers (siehe SOLVER_STATUSES); 'inconsistent' bedeutet, dass sich die
+      gemessenen Abstände nicht in einem Punkt schneiden, das Diagramm also irreführend wäre, 'no_shift', dass
+      wegen U_NN = 0 nichts berechnet wurde
+    - Spannungsunsymmetrie U0/U1: Nullsystem der Sternspannungen bezogen auf das Mitsystem (Sternpunktverschiebung)
+    - Spannungsunsymmetrie (Beträge): größte Abweichung der gemessenen Sternspannungen vom Mittelwert
+    - Stromunsymmetrie I2/I1, Stromunsymmetrie I0/I1: Gegen- bzw. Nullsystem der Ströme bezogen auf das Mitsystem
+    - Abweichung Millman, Konsistent (Millman): nur wenn die Eingabedatei Impedanzen enthält; Abstand des
+      geometrisch bestimmten N' vom N' nach Millman und ob er innerhalb von 5 % der Amplitude liegt
+      (check_n_prime_consistency; False deutet auf Messwerte und Impedanzen hin, die nicht zusammenpassen)
+
+    Parameter:
+    scenarios: ScenarioSet
+    triangle_pts: Koordinaten der Dreieckspunkte
+    method: Methode zur Berechnung von N' ('geometric' oder 'millman')
+    multi_start: bool, inkonsistente Szenarien von mehreren Startpunkten aus neu berechnen
+    solved: bereits berechnetes Ergebnis von solve_scenarios mit diagnostics (z. B. aus solve_network), sonst None
+
+    Rückgabewert:
+    pd.DataFrame mit einer Zeile pro Szenario.
+    """
+    if solved is None:
+        solved = solve_scenarios(triangle_pts, scenarios, method, diagnostics=True, multi_start=multi_start)
+    n_primes, shift_enabled, inn_angles, solver = solved
+    n_prime = n_primes[:, 0] + 1j * n_primes[:, 1]
+    triangle_pts = np.asarray(triangle_pts, dtype=float)
+    sources = triangle_pts[:, 0] + 1j * triangle_pts[:, 1]
+    star_voltages = sources[None, :] - n_prime[:, None]
+    inn = scenarios.current_phasors.sum(axis=1)
+    voltage_zero_factor = calculate_unbalance(star_voltages, triangle_pts)[1]
+    current_negative_factor, current_zero_factor = calculate_unbalance(scenarios.current_phasors, triangle_pts)
+
+    columns = {
+        'Szenario': scenarios.scenario_numbers(),
+        "N' x": n_primes[:, 0],
+        "N' y": n_primes[:, 1],
+        'Sternpunktverschiebung': shift_enabled,
+        'UNN (gemessen)': scenarios.unn_values,
+        'UNN (berechnet)': np.abs(n_prime),
+        'Winkel UNN': np.degrees(np.angle(n_prime)),
+    }
+    for i in range(star_voltages.shape[1]):
+        columns[f"U{i + 1}N'"] = np.abs(star_voltages[:, i])
+    for i in range(star_voltages.shape[1]):
+        columns[f"Winkel U{i + 1}N'"] = np.degrees(np.angle(star_voltages[:, i]))
+    columns.update({
+        'INN (gemessen)': scenarios.inn_values,
+        'INN (Zeigersumme)': np.abs(inn),
+        'Winkel INN': inn_angles,
+        'Residuum': solver.residual,
+        'Status': solver.status,
+        'Iterationen': solver.iterations,
+        'Spannungsunsymmetrie U0/U1': voltage_zero_factor,
+        'Spannungsunsymmetrie (Beträge)': calculate_magnitude_unbalance(scenarios.voltages),
+        'Stromunsymmetrie I2/I1': current_negative_factor,
+        'Stromunsymmetrie I0/I1': current_zero_factor,
+    })
+    if scenarios.impedances is not None:
+        # Mit method='millman' stammt N' selbst aus den Impedanzen, der geometrische Fit wird dann eigens berechnet
+        deviation, consistent = check_n_prime_consistency(triangle_pts, scenarios, geometric=n_primes if method == 'geometric' else None)
+        columns['Abweichung Millman'] = deviation
+        columns['Konsistent (Millman)'] = consistent
+    return pd.DataFrame(columns)
+
+def iter_results(file_path, triangle_pts, method='geometric', chunk_size=100000, use_cache=True, multi_start=False, validate='raise'):
+    """
+    Berechnet die Ergebnistabelle blockweise (Generator über DataFrames).
+    Excel-Dateien werden über den Cache geladen, CSV- und Parquet-Dateien blockweise gelesen.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        chunks = [load_scenarios_from_excel(file_path, use_cache=use_cache, validate=validate)]
+    else:
+        chunks = iter_scenarios(file_path, chunk_size, validate=validate)
+    for chunk in chunks:
+        check_method(chunk, method, source=file_path)
+        yield compute_results_table(chunk, triangle_pts, method, multi_start)
+
+def compute_network_table(network, method='geometric', multi_start=False):
+    """
+    Berechnet die Ergebnistabelle aller Systeme eines Netzes (N' gemeinsam über solve_network) mit den zusätzlichen
+    Spalten 'System' und 'Amplitude' vorne. Systeme mit weniger Phasen haben in den Spalten der übrigen Phasen NaN.
+
+    Rückgabewert:
+    pd.DataFrame mit einer Zeile pro Szenario, nach System geordnet.
+    """
+    from network import solve_network
+    tables = []
+    for system, solved in zip(network, solve_network(network, method, diagnostics=True, multi_start=multi_start)):
+        table = compute_results_table(system.scenarios, system.polygon_points(), method, solved=solved)
+        table.insert(0, 'System', system.name)
+        table.insert(1, 'Amplitude', system.amplitude)
+        tables.append(table)
+    # Spaltenreihenfolge des Systems mit den meisten Phasen, es enthält alle Spalten der übrigen
+    columns = max((table.columns for table in tables), key=len)
+    return pd.concat(tables, ignore_index=True)[columns]
+
+@timed('export.write')
+def export_results(file_path, output_path, method='geometric', triangle_amplitude=50, chunk_size=100000, use_cache=True, multi_start=False,
+                   validate='raise', systems=False):
+    """
+    Schreibt die Ergebnistabelle aller Szenarien (siehe compute_results_table) in eine Datei.
+    Das Format richtet sich nach der Endung: .csv und .parquet werden blockweise geschrieben
+    (Parquet benötigt pyarrow), .xlsx am Stück (höchstens 1048575 Szenarien).
+
+    Parameter:
+    file_path: str, Pfad zur Eingabedatei (Excel, CSV oder Parquet)
+    output_path: str, Pfad der Ergebnisdatei
+    method: Methode zur Berechnung von N' ('geometric' oder 'millman')
+    triangle_amplitude: float, Amplitude des Dreiecks
+    chunk_size: int, Anzahl der Szenarien pro Block
+    use_cache: bool, Cache beim Laden der Excel-Datei verwenden
+    multi_start: bool, inkonsistente Szenarien von mehreren Startpunkten aus neu berechnen
+    validate: Prüfung der Eingangsdaten: 'raise', 'quarantine' (fehlerhafte Szenarien nicht exportieren) oder 'off'
+    systems: bool, die Datei als Netz mit mehreren Sternsystemen lesen (siehe network.load_network und
+             compute_network_table; triangle_amplitude gilt dann für Systeme ohne eigene Amplitude)
+
+    Rückgabewert:
+    Anzahl der geschriebenen Szenarien.
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension not in ('.csv', '.parquet', '.xlsx', '.xlsm'):
+        raise ValueError(f"Nicht unterstütztes Ausgabeformat: {extension} (erwartet .csv, .parquet oder .xlsx)")
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    if systems:
+        from network import load_network
+        network = load_network(file_path, default_amplitude=triangle_amplitude, use_cache=use_cache, validate=validate)
+        tables = [compute_network_table(network, method, multi_start)]
+    else:
+        triangle_pts = calculate_triangle_points(triangle_amplitude)
+        tables = iter_results(file_path, triangle_pts, method, chunk_size, use_cache, multi_start, validate)
+    rows = 0
+
+    if extension == '.csv':
+        for table in tables:
+            table.to_csv(output_path, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+            rows += len(table)
+    elif extension == '.parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Zum Schreiben von Parquet-Dateien wird pyarrow benötigt (pip install pyarrow).") from e
+        writer = None
+        try:
+            for table in tables:
+                batch = pa.Table.from_pandas(table, preserve_index=False)
+                writer = writer or pq.ParquetWriter(output_path, batch.schema)
+                writer.write_table(batch)
+                rows += len(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif extension in ('.xlsx', '.xlsm'):
+        table = pd.concat(list(tables), ignore_index=True)
+        if len(table) > EXCEL_MAX_ROWS:
+            raise ValueError(f"{len(table)} Szenarien passen nicht in ein Excel-Blatt (höchstens {EXCEL_MAX_ROWS}), bitte CSV oder Parquet verwenden.")
+        table.to_excel(output_path, sheet_name='Ergebnisse', index=False)
+        rows = len(table)
+    return rows
@@ -0,0 +1,168 @@
+import numpy as np
+
+class Scenario:
+    """
+    Ansicht auf ein einzelnes Szenario eines ScenarioSet.
+    Die Attribute verweisen direkt auf die Zeilen der Arrays des ScenarioSet, es werden keine Daten kopiert.
+    """
+    __slots__ = ('_scenarios', 'index')
+
+    def __init__(self, scenarios, index):
+        self._scenarios = scenarios
+        self.index = index
+
+    @property
+    def currents(self):
+        return self._scenarios.currents[self.index]
+
+    @property
+    def angles(self):
+        return self._scenarios.angles[self.index]
+
+    @property
+    def voltages(self):
+        return self._scenarios.voltages[self.index]
+
+    @property
+    def unn_values(self):
+        return self._scenarios.unn_values[self.index]
+
+    @property
+    def inn_values(self):
+        return self._scenarios.inn_values[self.index]
+
+    @property
+    def impedances(self):
+        impedances = self._scenarios.impedances
+        return None if impedances is None else impedances[self.index]
+
+    @property
+    def number(self):
+        """
+        Nummer des Szenarios in der Eingabedatei (1-basiert).
+        """
+        numbers = self._scenarios.numbers
+        return self.index + 1 if numbers is None else int(numbers[self.index])
+
+    @property
+    def current_phasors(self):
+        return self.currents * np.exp(1j * np.radians(self.angles))
+
+    def __repr__(self):
+        return f"Scenario(index={self.index}, number={self.number}, unn={self.unn_values}, inn={self.inn_values})"
+
+class ScenarioSet:
+    """
+    Spaltenorientierter Speicher für alle Szenarien einer Studie.
+    Jede Größe liegt als zusammenhängendes NumPy-Array vor (eine Zeile pro Szenario),
+    damit die Berechnungen vektorisiert über alle Szenarien laufen können.
+
+    Attribute (n: Anzahl der Phasen, meist 3):
+    currents: float64-Array (N, n), Beträge der Ströme
+    angles: float64-Array (N, n), Winkel der Ströme in Grad
+    voltages: float64-Array (N, n), Spannungen U1N'..UnN'
+    unn_values: float64-Array (N,), U_NN-Werte
+    inn_values: float64-Array (N,), I_NN-Werte
+    impedances: complex128-Array (N, n) der Phasenimpedanzen oder None
+    numbers: int64-Array (N,) mit den Nummern der Szenarien in der Eingabedatei (1-basiert) oder None für 1..N;
+             bleibt beim Auswählen von Szenarien (Bereiche, aussortierte Szenarien) erhalten
+    """
+    __slots__ = ('currents', 'angles', 'voltages', 'unn_values', 'inn_values', 'impedances', 'numbers')
+
+    def __init__(self, currents, angles, voltages, unn_values, inn_values, impedances=None, numbers=None):
+        self.currents = np.ascontiguousarray(currents, dtype=np.float64)
+        self.angles = np.ascontiguousarray(angles, dtype=np.float64)
+        self.voltages = np.ascontiguousarray(voltages, dtype=np.float64)
+        self.unn_values = np.ascontiguousarray(unn_values, dtype=np.float64).reshape(-1)
+        self.inn_values = np.ascontiguousarray(inn_values, dtype=np.float64).reshape(-1)
+        self.impedances = None if impedances is None else np.ascontiguousarray(impedances, dtype=np.complex128)
+        self.numbers = None if numbers is None else np.ascontiguousarray(numbers, dtype=np.int64).reshape(-1)
+
+        num_scenarios = len(self.unn_values)
+        for name in ('currents', 'angles', 'voltages', 'inn_values', 'impedances', 'numbers'):
+            values = getattr(self, name)
+            if values is not None and len(values) != num_scenarios:
+                raise ValueError(f"'{name}' enthält {len(values)} Szenarien, erwartet werden {num_scenarios}.")
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Erstellt ein ScenarioSet aus einem Dictionary im Format von load_data_from_excel.
+        """
+        return cls(data['currents'], data['angles'], data['voltages'], data['unn_values'], data['inn_values'], data.get('impedances'))
+
+    @classmethod
+    def concatenate(cls, scenario_sets):
+        """
+        Fügt mehrere ScenarioSets (z. B. die Blöcke von iter_scenarios) zu einem zusammen.
+        Impedanzen und Nummern bleiben nur erhalten, wenn alle Blöcke welche enthalten.
+        """
+        scenario_sets = list(scenario_sets)
+        arrays = {
+            name: np.concatenate([getattr(scenarios, name) for scenarios in scenario_sets])
+            for name in ('currents', 'angles', 'voltages', 'unn_values', 'inn_values')
+        }
+        for name in ('impedances', 'numbers'):
+            if scenario_sets and all(getattr(scenarios, name) is not None for scenarios in scenario_sets):
+                arrays[name] = np.concatenate([getattr(scenarios, name) for scenarios in scenario_sets])
+        return cls(**arrays)
+
+    def arrays(self):
+        """
+        Gibt alle vorhandenen Arrays als Dictionary (Attributname -> Array) zurück, z. B. zum Speichern.
+        Mit ScenarioSet(**arrays) lässt sich das ScenarioSet wiederherstellen.
+        """
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+
+    def scenario_numbers(self):
+        """
+        Nummern aller Szenarien in der Eingabedatei (int64-Array (N,), 1-basiert).
+        """
+        return np.arange(1, len(self) + 1) if self.numbers is None else self.numbers
+
+    def to_dict(self):
+        """
+        Gibt die Daten als Dictionary mit verschachtelten Listen zurück (Format von load_data_from_excel).
+        """
+        return {
+            'currents': self.currents.tolist(),
+            'angles': self.angles.tolist(),
+            'unn_values': self.unn_values.tolist(),
+            'voltages': self.voltages.tolist(),
+            'inn_values': self.inn_values.tolist(),
+            'impedances': None if self.impedances is None else self.impedances.tolist()
+        }
+
+    @property
+    def num_phases(self):
+        """
+        Anzahl der Phasen (Spalten der Ströme).
+        """
+        return self.currents.shape[1]
+
+    @property
+    def current_phasors(self):
+        """
+        Ströme als komplexe Zeiger (complex128-Array (N, n)).
+        """
+        return self.currents * np.exp(1j * np.radians(self.angles))
+
+    def __len__(self):
+        return len(self.unn_values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) or isinstance(index, np.ndarray):
+            return ScenarioSet(
+                self.currents[index], self.angles[index], self.voltages[index],
+                self.unn_values[index], self.inn_values[index],
+                None if self.impedances is None else self.impedances[index],
+                self.scenario_numbers()[index]
+            )
+        index = range(len(self))[index]  # Negative Indizes auflösen, IndexError bei ungültigem Index
+        return Scenario(self, index)
+
+    def __iter__(self):
+        return (Scenario(self, index) for index in range(len(self)))
+
+    def __repr__(self):
+        return f"ScenarioSet({len(self)} Szenarien)"
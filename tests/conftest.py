@@ -0,0 +1,23 @@
+import os
+import sys
+
+# Die Module liegen flach im Wurzelverzeichnis des Repositorys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from benchmarks.synthetic import generate_scenarios
+from calculations import calculate_triangle_points
+
+AMPLITUDE = 50
+
+
+@pytest.fixture
+def triangle_pts():
+    return np.asarray(calculate_triangle_points(AMPLITUDE))
+
+
+@pytest.fixture
+def scenarios():
+    # Unsymmetrische Last ohne Messrauschen: alle Szenarien sind gültig und konsistent
+    return generate_scenarios(30, seed=7, triangle_amplitude=AMPLITUDE, noise=0)
@@ -0,0 +1,56 @@
+import json
+import numpy as np
+from benchmarks.synthetic import write_csv
+from calculations import calculate_current_arrows, calculate_diagram_limits, solve_scenarios
+from html_report import scenario_geometry, write_report
+from scenario_set import ScenarioSet
+
+
+def test_geometry_follows_plot_rules(scenarios, triangle_pts):
+    solved = solve_scenarios(triangle_pts, scenarios, diagnostics=True)
+    geometry = scenario_geometry(scenarios, triangle_pts, solved, current_scale=1.5, system=2)
+
+    assert len(geometry) == len(scenarios)
+    for index, entry in enumerate(geometry):
+        n_prime = solved[0][index]
+        xlim, ylim = calculate_diagram_limits(triangle_pts, n_prime, solved[1][index])
+        assert entry['k'] == 2
+        assert entry['n'] == index + 1
+        assert np.allclose(entry['p'], n_prime, atol=1e-4)
+        assert np.allclose(entry['lim'], (*xlim, *ylim), atol=1e-4)
+        arrows = calculate_current_arrows(n_prime, scenarios.currents[index], scenarios.angles[index], 1.5, xlim, ylim)
+        assert [arrow[2] for arrow in entry['c']] == [bool(clipped) for _, _, clipped in arrows]
+        assert np.allclose([arrow[:2] for arrow in entry['c']], [arrow[:2] for arrow in arrows], atol=1e-4)
+        # Gekürzte Pfeile enden innerhalb der Achsengrenzen
+        for end_x, end_y, clipped, _ in entry['c']:
+            assert xlim[0] - 1e-3 <= end_x <= xlim[1] + 1e-3 and ylim[0] - 1e-3 <= end_y <= ylim[1] + 1e-3
+        assert entry['st'] == solved[3].status[index]
+
+
+def test_geometry_without_shift_and_inn(scenarios, triangle_pts):
+    unn_values = scenarios.unn_values.copy()
+    inn_values = scenarios.inn_values.copy()
+    unn_values[0] = 0
+    inn_values[0] = 0
+    scenarios = ScenarioSet(scenarios.currents, scenarios.angles, scenarios.voltages, unn_values, inn_values)
+    entry = scenario_geometry(scenarios, triangle_pts, solve_scenarios(triangle_pts, scenarios, diagnostics=True))[0]
+
+    assert entry['e'] is False
+    assert entry['p'] == [0.0, 0.0]
+    assert entry['inn'] is None
+    assert entry['st'] == 'no_shift'
+
+
+def test_report_embeds_geometry(scenarios, tmp_path):
+    input_path = str(tmp_path / 'input.csv')
+    output_path = str(tmp_path / 'report' / 'bericht.html')
+    write_csv(scenarios, input_path)
+
+    assert write_report(input_path, output_path, scenario_range=range(5, 10), title='Test </script>') == 5
+    with open(output_path, encoding='utf-8') as f:
+        content = f.read()
+    assert 'Test &lt;/script&gt;' in content
+    data = json.loads(content.split('const DATA = ', 1)[1].split(';\n', 1)[0])
+    assert data['title'] == 'Test </script>'
+    assert [entry['n'] for entry in data['scenarios']] == [6, 7, 8, 9, 10]
+    assert data['systems'][0]['amplitude'] == 50
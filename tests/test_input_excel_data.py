@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import openpyxl
+import pytest
+import input_excel_data
+from benchmarks.synthetic import write_csv, write_excel
+from input_excel_data import (
+    get_cache_dir, iter_scenarios, load_scenarios_from_excel, parse_scenarios_from_excel, read_cache, write_cache
+)
+from scenario_set import ScenarioSet
+
+
+@pytest.fixture
+def excel_file(scenarios, tmp_path):
+    path = str(tmp_path / 'input.xlsx')
+    write_excel(scenarios, path)
+    return path
+
+
+def assert_same_scenarios(actual, expected):
+    for name in ('currents', 'angles', 'voltages', 'unn_values', 'inn_values', 'impedances'):
+        assert np.allclose(getattr(actual, name), getattr(expected, name), equal_nan=True), name
+    assert np.array_equal(actual.scenario_numbers(), expected.scenario_numbers())
+
+
+def touch(path, offset=10):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset * 10**9))
+
+
+# Cache
+
+def test_cache_round_trip(excel_file):
+    assert read_cache(excel_file) is None
+    loaded = load_scenarios_from_excel(excel_file)
+    assert os.path.exists(os.path.join(get_cache_dir(excel_file), 'meta.json'))
+    assert_same_scenarios(read_cache(excel_file), loaded)
+    assert_same_scenarios(loaded, parse_scenarios_from_excel(excel_file))
+
+
+def test_cache_invalid_after_size_change(scenarios, excel_file):
+    write_cache(excel_file, scenarios)
+    write_excel(scenarios[:10], excel_file)
+    assert read_cache(excel_file) is None
+    assert len(load_scenarios_from_excel(excel_file)) == 10
+
+
+def test_cache_survives_touch_without_change(scenarios, excel_file, monkeypatch):
+    write_cache(excel_file, scenarios)
+    touch(excel_file)
+    calls = []
+    original = input_excel_data.file_hash
+    monkeypatch.setattr(input_excel_data, 'file_hash', lambda file_path: calls.append(file_path) or original(file_path))
+
+    assert read_cache(excel_file) is not None
+    # Die neue Änderungszeit wird übernommen, beim nächsten Laden wird nicht mehr gehasht
+    assert read_cache(excel_file) is not None
+    assert len(calls) == 1
+
+
+def test_cache_invalid_after_change_of_same_size(scenarios, excel_file):
+    write_cache(excel_file, scenarios)
+    with open(excel_file, 'r+b') as f:
+        content = f.read()
+        f.seek(0)
+        f.write(content[:-1] + bytes([content[-1] ^ 1]))
+    touch(excel_file)
+    assert read_cache(excel_file) is None
+
+
+def test_cache_invalid_after_version_change(scenarios, excel_file, monkeypatch):
+    write_cache(excel_file, scenarios)
+    monkeypatch.setattr(input_excel_data, 'CACHE_VERSION', input_excel_data.CACHE_VERSION + 1)
+    assert read_cache(excel_file) is None
+
+
+# Blockweises Einlesen
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 30, 100])
+def test_excel_chunks_match_full_parse(excel_file, chunk_size):
+    chunks = list(iter_scenarios(excel_file, chunk_size))
+    assert [len(chunk) for chunk in chunks[:-1]] == [chunk_size] * (len(chunks) - 1)
+    assert 0 < len(chunks[-1]) <= chunk_size
+    assert_same_scenarios(ScenarioSet.concatenate(chunks), parse_scenarios_from_excel(excel_file))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 30, 100])
+def test_csv_chunks_keep_numbers(scenarios, tmp_path, chunk_size):
+    path = str(tmp_path / 'input.csv')
+    write_csv(scenarios, path)
+    chunks = list(iter_scenarios(path, chunk_size))
+    assert [len(chunk) for chunk in chunks] == [min(chunk_size, len(scenarios) - start) for start in range(0, len(scenarios), chunk_size)]
+    combined = ScenarioSet.concatenate(chunks)
+    assert np.array_equal(combined.scenario_numbers(), np.arange(1, len(scenarios) + 1))
+    assert np.allclose(combined.voltages, scenarios.voltages)
+
+
+def test_excel_empty_cells(excel_file):
+    workbook = openpyxl.load_workbook(excel_file)
+    workbook['UNN'].cell(row=2, column=3).value = None      # Szenario 2: keine Sternpunktverschiebung
+    workbook['INN'].cell(row=2, column=4).value = None      # Szenario 3: kein Strom im Neutralleiter
+    workbook['Currents'].cell(row=3, column=5).value = None  # Szenario 4: I2 fehlt
+    workbook.save(excel_file)
+
+    combined = ScenarioSet.concatenate(iter_scenarios(excel_file, 3, validate='off'))
+    assert combined.unn_values[1] == 0
+    assert combined.inn_values[2] == 0
+    assert np.isnan(combined.currents[3, 1])
+    assert_same_scenarios(combined, parse_scenarios_from_excel(excel_file))
+
+
+def test_excel_header_gaps_and_trailing_columns(scenarios, excel_file):
+    # Fehlende Überschriften zählen mit, die Anzahl der Szenarien reicht bis zur letzten ausgefüllten Spalte
+    workbook = openpyxl.load_workbook(excel_file)
+    for worksheet in workbook.worksheets:
+        worksheet.cell(row=1, column=3).value = None
+        worksheet.cell(row=1, column=len(scenarios) + 1).value = None
+    workbook.save(excel_file)
+
+    chunks = list(iter_scenarios(excel_file, 4))
+    assert sum(len(chunk) for chunk in chunks) == len(scenarios)
+    assert_same_scenarios(ScenarioSet.concatenate(chunks), scenarios)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import generate_scenarios
+from calculations import calculate_polygon_points, solve_scenarios
+from input_excel_data import impedance_columns, scenario_columns
+from network import Network, StarSystem, load_network, load_systems_from_frames, solve_network
+from validation import ScenarioValidationError
+
+
+def frame(scenarios, name, amplitude):
+    data = {'System': name, 'Amplitude': amplitude}
+    for attribute, columns in scenario_columns(scenarios.num_phases).items():
+        values = getattr(scenarios, attribute)
+        if values.ndim == 1:
+            data[columns] = values
+        else:
+            data.update({column: values[:, i] for i, column in enumerate(columns)})
+    magnitudes, angles = impedance_columns(scenarios.num_phases)
+    data.update({column: np.abs(scenarios.impedances[:, i]) for i, column in enumerate(magnitudes)})
+    data.update({column: np.degrees(np.angle(scenarios.impedances[:, i])) for i, column in enumerate(angles)})
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def systems():
+    # Zwei Systeme mit drei, eines mit fünf Phasen, jeweils mit eigener Amplitude
+    return [
+        ('Trafo 1', 50, generate_scenarios(12, seed=1, triangle_amplitude=50, noise=0)),
+        ('Trafo 2', 230, generate_scenarios(8, seed=2, triangle_amplitude=230, noise=0, num_phases=5)),
+        ('Trafo 3', 400, generate_scenarios(10, seed=3, triangle_amplitude=400, noise=0)),
+    ]
+
+
+@pytest.fixture
+def network_file(systems, tmp_path):
+    path = str(tmp_path / 'network.csv')
+    # Die Zeilen der Systeme dürfen gemischt sein, die Reihenfolge innerhalb eines Systems bleibt erhalten
+    df = pd.concat([frame(scenarios, name, amplitude) for name, amplitude, scenarios in systems], ignore_index=True)
+    df = df.iloc[np.argsort(df.groupby('System').cumcount().to_numpy(), kind='stable')]
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_load_systems_with_mixed_phase_counts(systems, network_file):
+    loaded = load_systems_from_frames(network_file)
+
+    assert [system.name for system in loaded] == ['Trafo 1', 'Trafo 2', 'Trafo 3']
+    for system, (name, amplitude, scenarios) in zip(loaded, systems):
+        assert system.amplitude == amplitude
+        assert system.num_phases == scenarios.num_phases
+        assert np.allclose(system.scenarios.voltages, scenarios.voltages)
+        assert np.array_equal(system.scenarios.scenario_numbers(), np.arange(1, len(scenarios) + 1))
+
+
+def test_solve_network_matches_single_systems(network_file):
+    network = load_network(network_file)
+    assert network.phase_groups() == {3: [0, 2], 5: [1]}
+
+    for system, solved in zip(network, solve_network(network, diagnostics=True)):
+        expected = solve_scenarios(system.polygon_points(), system.scenarios, diagnostics=True)
+        assert np.allclose(solved[0], expected[0], atol=1e-6 * system.amplitude)
+        assert np.array_equal(solved[1], expected[1])
+        assert np.allclose(solved[3].residual, expected[3].residual, atol=1e-6 * system.amplitude)
+        assert set(solved[3].status) <= {'converged', 'no_shift'}
+
+
+def test_solve_network_millman_scales_with_amplitude(network_file):
+    network = load_network(network_file)
+    for system, (n_primes, _, _) in zip(network, solve_network(network, method='millman')):
+        expected = solve_scenarios(calculate_polygon_points(system.amplitude, system.num_phases), system.scenarios, 'millman')[0]
+        assert np.allclose(n_primes, expected)
+
+
+def test_systems_need_three_phases_and_unique_amplitude(systems, tmp_path):
+    path = str(tmp_path / 'network.csv')
+    name, amplitude, scenarios = systems[0]
+    two_phases = frame(scenarios, 'Zwei Phasen', amplitude).drop(columns=['I3', 'Winkel I3', 'U3N', 'Z3', 'Winkel Z3'])
+    ambiguous = frame(scenarios, 'Mehrdeutig', amplitude)
+    ambiguous.loc[0, 'Amplitude'] = 2 * amplitude
+    pd.concat([frame(scenarios, name, amplitude), two_phases, ambiguous], ignore_index=True).to_csv(path, index=False)
+
+    with pytest.raises(ScenarioValidationError) as error:
+        load_systems_from_frames(path)
+    messages = [issue.message for issue in error.value.issues]
+    assert any("System 'Zwei Phasen'" in message and 'Phase' in message for message in messages)
+    assert any("System 'Mehrdeutig'" in message and 'Amplitude' in message for message in messages)
+
+
+def test_duplicate_system_names(systems):
+    name, amplitude, scenarios = systems[0]
+    with pytest.raises(ValueError, match=name):
+        Network([StarSystem(name, amplitude, scenarios), StarSystem(name, amplitude, scenarios)])
@@ -0,0 +1,63 @@
+import result_cache
+from result_cache import ResultCache, ScenarioResult, compute_scenario_result, compute_scenario_results, scenario_key
+from scenario_set import ScenarioSet
+
+
+def test_key_depends_on_inputs_and_settings(scenarios):
+    key = scenario_key(scenarios[0], 50, 1.5, 'geometric')
+    # Gleiche Eingangsdaten an anderer Stelle ergeben denselben Schlüssel, andere Eingangsdaten einen anderen
+    moved = ScenarioSet.concatenate([scenarios[1:3], scenarios[0:1]])
+    assert scenario_key(moved[2], 50, 1.5, 'geometric') == key
+    assert scenario_key(moved[0], 50, 1.5, 'geometric') != key
+
+    assert scenario_key(scenarios[0], 60, 1.5, 'geometric') != key
+    assert scenario_key(scenarios[0], 50, 1.0, 'geometric') != key
+    assert scenario_key(scenarios[0], 50, 1.5, 'millman') != key
+
+
+def test_key_changes_with_result_version(scenarios, monkeypatch):
+    key = scenario_key(scenarios[0], 50, 1.5, 'geometric')
+    monkeypatch.setattr(result_cache, 'RESULT_VERSION', result_cache.RESULT_VERSION + 1)
+    assert scenario_key(scenarios[0], 50, 1.5, 'geometric') != key
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' ist jetzt zuletzt verwendet
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.get('b') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_get_or_compute_computes_once():
+    cache = ResultCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute('a', lambda: calls.append(1) or 'result') == 'result'
+    assert len(calls) == 1
+
+
+def test_save_and_load(scenarios, triangle_pts, tmp_path):
+    path = str(tmp_path / 'results.pkl')
+    cache = ResultCache(path=path)
+    result = compute_scenario_result(scenarios[0], triangle_pts, 1.5)
+    cache.put('a', result)
+    cache.save()
+
+    loaded = ResultCache(path=path).get('a')
+    assert isinstance(loaded, ScenarioResult)
+    assert loaded == result
+
+
+def test_batch_results_match_single(scenarios, triangle_pts):
+    batch = compute_scenario_results(scenarios[:5], triangle_pts, 1.5)
+    for scenario, result in zip(scenarios[:5], batch):
+        single = compute_scenario_result(scenario, triangle_pts, 1.5)
+        assert result.shift_enabled == single.shift_enabled
+        assert abs(result.optimal_n_prime[0] - single.optimal_n_prime[0]) < 1e-6
+        assert abs(result.optimal_n_prime[1] - single.optimal_n_prime[1]) < 1e-6
@@ -0,0 +1,28 @@
+import numpy as np
+from benchmarks.synthetic import generate_scenarios
+from results_export import compute_results_table
+from scenario_set import ScenarioSet
+
+AMPLITUDE = 50
+
+
+def test_consistency_columns_only_with_impedances(triangle_pts):
+    scenarios = generate_scenarios(20, seed=5, triangle_amplitude=AMPLITUDE, noise=0)
+    table = compute_results_table(scenarios, triangle_pts)
+    assert table['Konsistent (Millman)'].all()
+    assert np.all(table['Abweichung Millman'] < 1e-3 * AMPLITUDE)
+
+    without = ScenarioSet(scenarios.currents, scenarios.angles, scenarios.voltages, scenarios.unn_values, scenarios.inn_values)
+    assert 'Konsistent (Millman)' not in compute_results_table(without, triangle_pts).columns
+
+
+def test_consistency_flags_mismatched_impedances(triangle_pts):
+    # Impedanzen eines anderen Szenarios: die gemessenen Spannungen passen nicht mehr zum N' nach Millman
+    scenarios = generate_scenarios(20, seed=6, kind='unbalanced', triangle_amplitude=AMPLITUDE, noise=0)
+    shuffled = ScenarioSet(scenarios.currents, scenarios.angles, scenarios.voltages, scenarios.unn_values, scenarios.inn_values,
+                           np.roll(scenarios.impedances, 1, axis=0))
+    geometric = compute_results_table(shuffled, triangle_pts)
+    millman = compute_results_table(shuffled, triangle_pts, method='millman')
+
+    assert not geometric['Konsistent (Millman)'].all()
+    assert np.allclose(geometric['Abweichung Millman'], millman['Abweichung Millman'], atol=1e-3 * AMPLITUDE)
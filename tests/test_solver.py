@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from benchmarks.synthetic import generate_scenarios
+from calculations import (
+    _solver_status, calculate_n_prime_millman, calculate_triangle_points, solve_n_prime, solve_n_prime_batch, solve_scenarios
+)
+
+AMPLITUDE = 50
+
+
+@pytest.mark.parametrize('kind', ['balanced', 'unbalanced', 'open_phase'])
+def test_batch_matches_scalar_on_millman_data(triangle_pts, kind):
+    scenarios = generate_scenarios(50, kind=kind, seed=1, triangle_amplitude=AMPLITUDE, noise=0)
+    batch = solve_n_prime_batch(triangle_pts, scenarios)
+    scalar = [solve_n_prime(triangle_pts, scenario) for scenario in scenarios]
+
+    assert np.allclose(batch.point, [result.point for result in scalar], atol=1e-3 * AMPLITUDE)
+    assert np.allclose(batch.point, calculate_n_prime_millman(triangle_pts, scenarios.impedances), atol=1e-3 * AMPLITUDE)
+    assert set(batch.status) == {'converged'}
+    assert [result.status for result in scalar] == ['converged'] * len(scenarios)
+
+
+def test_noisy_measurements_stay_converged(triangle_pts):
+    scenarios = generate_scenarios(50, seed=2, triangle_amplitude=AMPLITUDE, noise=0.005)
+    assert set(solve_n_prime_batch(triangle_pts, scenarios).status) == {'converged'}
+
+
+def test_tolerance_follows_measured_voltages():
+    # Kleine Spannungen an einem kleinen Dreieck: das Residuum wird an den Messwerten gemessen, nicht an einer festen Amplitude
+    triangle_pts = np.asarray(calculate_triangle_points(1))
+    scenarios = generate_scenarios(20, seed=3, triangle_amplitude=1, noise=0)
+    result = solve_n_prime_batch(triangle_pts, scenarios)
+    assert set(result.status) == {'converged'}
+
+    scaled = solve_n_prime_batch(triangle_pts, scenarios.unn_values * 1.5, scenarios.voltages * 1.5)
+    assert set(scaled.status) == {'inconsistent'}
+
+
+def test_inconsistent_measurements(triangle_pts):
+    # Keine Spannung passt zum Dreieck: alle Abstände viel zu groß
+    result = solve_n_prime(triangle_pts, 1.0, [200.0, 200.0, 200.0])
+    assert result.status == 'inconsistent'
+    batch = solve_n_prime_batch(triangle_pts, np.array([1.0]), np.array([[200.0, 200.0, 200.0]]))
+    assert batch.status[0] == 'inconsistent'
+
+
+def test_at_bound(triangle_pts):
+    point = np.array([30.0, 20.0])
+    u_nn = np.hypot(*point)
+    u_values = np.hypot(*(point - triangle_pts).T)
+    bounds = ((-10.0, 10.0), (-10.0, 10.0))
+
+    result = solve_n_prime(triangle_pts, u_nn, u_values, bounds=bounds)
+    assert result.status == 'at_bound'
+    batch = solve_n_prime_batch(triangle_pts, np.array([u_nn]), u_values[None, :], bounds=bounds)
+    assert batch.status[0] == 'at_bound'
+    assert np.all(np.abs(batch.point) <= 10.0 + 1e-9)
+
+
+def test_failed_status_takes_precedence():
+    points = np.array([[0.0, 0.0], [0.0, 0.0], [5.0, 0.0]])
+    status = _solver_status(np.array([False, True, False]), points, np.array([0.0, 0.0, 10.0]), np.ones(3),
+                            ((-5.0, 5.0), (-5.0, 5.0)), 0.02)
+    assert status.tolist() == ['failed', 'converged', 'failed']
+
+
+def test_scenarios_without_shift(triangle_pts):
+    scenarios = generate_scenarios(10, seed=4, triangle_amplitude=AMPLITUDE, noise=0)
+    scenarios.unn_values[::2] = 0
+    n_primes, shift_enabled, _, result = solve_scenarios(triangle_pts, scenarios, diagnostics=True, multi_start=True)
+
+    assert result.status[~shift_enabled].tolist() == ['no_shift'] * 5
+    assert np.all(np.isnan(result.residual[~shift_enabled]))
+    assert np.all(result.iterations[~shift_enabled] == 0)
+    assert np.all(n_primes[~shift_enabled] == 0)
+    assert set(result.status[shift_enabled]) == {'converged'}
@@ -0,0 +1,57 @@
+import numpy as np
+from benchmarks.synthetic import generate_scenarios
+from calculations import solve_scenarios
+from scenario_set import ScenarioSet
+from timeseries import NPrimeTracker, solve_time_series
+
+AMPLITUDE = 50
+
+
+def circling_scenarios(triangle_pts, num_samples=40, voltage_factor=1.0):
+    # N' läuft auf einem Kreis um N; mit voltage_factor != 1 passen die Spannungen nicht mehr zu einem Punkt
+    t = np.linspace(0, 2 * np.pi, num_samples)
+    points = 0.4 * AMPLITUDE * np.column_stack([np.cos(t), np.sin(t)])
+    voltages = np.hypot(*(points[:, None, :] - triangle_pts[None]).transpose(2, 0, 1)) * voltage_factor
+    zeros = np.zeros((num_samples, 3))
+    return ScenarioSet(zeros + 1, zeros, voltages, np.hypot(*points.T), np.zeros(num_samples))
+
+
+def sequential_n_primes(triangle_pts, scenarios):
+    tracker = NPrimeTracker(triangle_pts)
+    return np.array([tracker.update(scenario)[0] for scenario in scenarios])
+
+
+def test_consistent_samples_match_batch_solver(triangle_pts):
+    scenarios = generate_scenarios(200, seed=4, triangle_amplitude=AMPLITUDE)
+    n_primes, shift_enabled, inn_angles = solve_time_series(triangle_pts, scenarios)
+    expected = solve_scenarios(triangle_pts, scenarios)
+
+    assert np.allclose(n_primes, expected[0])
+    assert np.array_equal(shift_enabled, expected[1])
+    assert np.allclose(inn_angles, expected[2])
+
+
+def test_warm_start_follows_previous_sample(triangle_pts):
+    # Inkonsistente Messwerte haben mehrere lokale Lösungen: der Warmstart bleibt auf der Lösung der vorherigen Messung
+    scenarios = circling_scenarios(triangle_pts, voltage_factor=1.5)
+    warm = solve_time_series(triangle_pts, scenarios)[0]
+    cold = solve_scenarios(triangle_pts, scenarios)[0]
+
+    assert np.allclose(warm, sequential_n_primes(triangle_pts, scenarios), atol=1e-9)
+    assert not np.allclose(warm, cold, atol=1e-3)
+
+    def jumps(points):
+        return np.count_nonzero(np.hypot(*np.diff(points, axis=0).T) > 0.2 * AMPLITUDE)
+    assert jumps(warm) < jumps(cold)
+
+
+def test_samples_without_shift_keep_previous_start(triangle_pts):
+    scenarios = circling_scenarios(triangle_pts, voltage_factor=1.5)
+    unn_values = scenarios.unn_values.copy()
+    unn_values[10:13] = 0
+    scenarios = ScenarioSet(scenarios.currents, scenarios.angles, scenarios.voltages, unn_values, scenarios.inn_values)
+
+    n_primes, shift_enabled, _ = solve_time_series(triangle_pts, scenarios)
+    assert not shift_enabled[10:13].any()
+    assert np.all(n_primes[10:13] == 0)
+    assert np.allclose(n_primes, sequential_n_primes(triangle_pts, scenarios), atol=1e-9)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from benchmarks.synthetic import write_csv
+from input_excel_data import iter_scenarios
+from scenario_set import ScenarioSet
+from validation import ScenarioValidationError, apply_validation, validate_chunks, validate_scenarios
+
+
+def with_invalid(scenarios, indices):
+    # Negative Ströme in den angegebenen Szenarien
+    currents = scenarios.currents.copy()
+    currents[indices, 0] = -1
+    return ScenarioSet(currents, scenarios.angles, scenarios.voltages, scenarios.unn_values, scenarios.inn_values,
+                       scenarios.impedances, scenarios.numbers)
+
+
+def chunked(scenarios, chunk_size):
+    return [scenarios[start:start + chunk_size] for start in range(0, len(scenarios), chunk_size)]
+
+
+def test_validate_scenarios_reports_numbers(scenarios):
+    valid, issues = validate_scenarios(with_invalid(scenarios, [2, 17]))
+    assert np.flatnonzero(~valid).tolist() == [2, 17]
+    assert [issue.scenario for issue in issues] == [3, 18]
+
+
+def test_raise_collects_issues_of_all_chunks(scenarios):
+    chunks = chunked(with_invalid(scenarios, [2, 17, 29]), 10)
+    yielded = []
+    with pytest.raises(ScenarioValidationError) as error:
+        for chunk in validate_chunks(chunks, 'raise'):
+            yielded.append(chunk)
+    # Ab dem ersten fehlerhaften Block wird nichts mehr zurückgegeben, gemeldet werden alle Blöcke
+    assert yielded == []
+    assert [issue.scenario for issue in error.value.issues] == [3, 18, 30]
+
+
+def test_raise_yields_chunks_before_first_issue(scenarios):
+    chunks = chunked(with_invalid(scenarios, [25]), 10)
+    yielded = []
+    with pytest.raises(ScenarioValidationError):
+        for chunk in validate_chunks(chunks, 'raise'):
+            yielded.append(len(chunk))
+    assert yielded == [10, 10]
+
+
+def test_quarantine_skips_invalid_chunks(scenarios, capsys):
+    chunks = chunked(with_invalid(scenarios, list(range(10, 20)) + [25]), 10)
+    result = list(validate_chunks(chunks, 'quarantine'))
+
+    assert [len(chunk) for chunk in result] == [10, 9]
+    assert 26 not in ScenarioSet.concatenate(result).scenario_numbers()
+    assert 'aussortiert' in capsys.readouterr().out
+
+
+def test_quarantine_raises_only_if_nothing_is_left(scenarios):
+    chunks = chunked(with_invalid(scenarios, list(range(len(scenarios)))), 10)
+    with pytest.raises(ScenarioValidationError) as error:
+        list(validate_chunks(chunks, 'quarantine'))
+    assert len(error.value.issues) == len(scenarios)
+
+
+def test_off_passes_chunks_unchanged(scenarios):
+    chunks = chunked(with_invalid(scenarios, [0]), 10)
+    assert list(validate_chunks(chunks, 'off')) == chunks
+
+
+def test_unknown_mode(scenarios):
+    with pytest.raises(ValueError):
+        list(validate_chunks([scenarios], 'ignore'))
+    with pytest.raises(ValueError):
+        apply_validation(scenarios, 'ignore')
+
+
+def test_iter_scenarios_validates_whole_file(scenarios, tmp_path):
+    path = str(tmp_path / 'input.csv')
+    write_csv(with_invalid(scenarios, [3, 28]), path)
+
+    with pytest.raises(ScenarioValidationError) as error:
+        list(iter_scenarios(path, 10))
+    assert [issue.scenario for issue in error.value.issues] == [4, 29]
+
+    result = ScenarioSet.concatenate(iter_scenarios(path, 10, validate='quarantine'))
+    assert len(result) == len(scenarios) - 2
+    assert not {4, 29} & set(result.scenario_numbers())
@@ -0,0 +1,247 @@
+import os
+import numpy as np
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib import animation
+from batch_render import DEFAULT_SETTINGS
+from input_excel_data import check_method, iter_frames, scenarios_from_frame
+from scenario_set import ScenarioSet
+from validation import apply_validation
+from calculations import solve_n_prime_batch
+from plotting_functions import calculate_diagram_limits, calculate_n_prime, calculate_triangle_points, solve_scenarios, DiagramRenderer
+from instrumentation import timed
+
+# Mögliche Namen der Zeitspalte in Messprotokollen
+TIME_COLUMNS = ('Zeit', 'Time', 'time', 'Timestamp', 'timestamp')
+
+# Relative Änderung von N', ab der beim Warmstart die folgende Messung neu berechnet wird (siehe solve_time_series)
+WARM_START_TOLERANCE = 1e-8
+
+def read_times(df, time_column):
+    """
+    Liest die Zeitspalte eines Blocks als Sekunden (float64). Datums-/Zeitangaben werden in
+    Sekunden seit 1970 umgerechnet, Zahlen werden als Sekunden übernommen.
+    """
+    values = df[time_column]
+    if values.dtype.kind in 'iuf':
+        return values.to_numpy(dtype=np.float64)
+    timestamps = pd.to_datetime(values)
+    return timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+
+@timed('timeseries.load')
+def load_time_series(file_path, time_column=None, sample_rate=1.0, chunk_size=100000, validate='raise'):
+    """
+    Lädt ein Messprotokoll (CSV oder Parquet, eine Zeile pro Messung, Spalten siehe scenario_columns,
+    optional mit Impedanzen, siehe impedance_columns) blockweise ein.
+
+    Parameter:
+    file_path: str, Pfad zur CSV- oder Parquet-Datei
+    time_column: str, Name der Zeitspalte (None = erste vorhandene Spalte aus TIME_COLUMNS)
+    sample_rate: float, Abtastrate in Hz, falls die Datei keine Zeitspalte hat
+    chunk_size: int, Anzahl der Zeilen pro Block
+    validate: Prüfung der Messungen: 'raise', 'quarantine' (fehlerhafte Messungen samt Zeitpunkt auslassen) oder 'off'
+
+    Rückgabewert:
+    Tupel (times, scenarios): Zeit jeder Messung in Sekunden seit der ersten Messung und ein ScenarioSet.
+    """
+    times = []
+    chunks = []
+    for df in iter_frames(file_path, chunk_size):
+        if time_column is None:
+            time_column = next((column for column in TIME_COLUMNS if column in df.columns), False)
+        if time_column:
+            times.append(read_times(df, time_column))
+        chunks.append(scenarios_from_frame(df, first_number=sum(len(chunk) for chunk in chunks) + 1))
+    scenarios = ScenarioSet.concatenate(chunks)
+    if time_column:
+        times = np.concatenate(times)
+        times -= times[0]
+    else:
+        times = np.arange(len(scenarios)) / sample_rate
+    scenarios = apply_validation(scenarios, validate, source=file_path)
+    return times[scenarios.scenario_numbers() - 1], scenarios
+
+class NPrimeTracker:
+    """
+    Berechnet N' Messung für Messung. Jede Berechnung startet bei N' der vorherigen Messung statt
+    beim Schwerpunkt des Dreiecks bzw. der linearisierten Lösung; bei langsam driftenden Messwerten
+    genügen dann wenige Newton-Schritte, und N' springt bei mehrdeutigen Messwerten nicht zwischen
+    den Lösungen hin und her.
+    """
+
+    def __init__(self, triangle_pts, method='geometric'):
+        """
+        Parameter:
+        triangle_pts: Koordinaten der Dreieckspunkte
+        method: Methode zur Berechnung von N' ('geometric' oder 'millman')
+        """
+        self.triangle_pts = triangle_pts
+        self.method = method
+        self.previous = None  # N' der letzten Messung mit Sternpunktverschiebung
+
+    def reset(self):
+        self.previous = None
+
+    def update(self, scenario):
+        """
+        Berechnet N' für die nächste Messung (Scenario).
+
+        Rückgabewert:
+        Tupel (optimal_n_prime, shift_enabled). Bei der Methode 'geometric' und U_NN = 0 bleibt N' bei N.
+        """
+        if self.method == 'geometric' and scenario.unn_values == 0:
+            return np.zeros(2), False
+        initial_guess = self.previous if self.method == 'geometric' else None
+        self.previous = calculate_n_prime(self.triangle_pts, scenario, method=self.method, initial_guess=initial_guess)
+        return self.previous, True
+
+@timed('timeseries.solve')
+def solve_time_series(triangle_pts, scenarios, method='geometric'):
+    """
+    Berechnet N' und den Winkel von I_NN für alle Messungen eines Protokolls mit Warmstart, aber vektorisiert:
+    Zuerst werden alle Messungen gemeinsam berechnet (solve_scenarios). Passen die Messwerte zusammen (Status
+    'converged'), ist N' eindeutig und ein Warmstart änderte nichts. Bei den übrigen Messungen hängt N' vom Startpunkt
+    ab; sie werden wie beim NPrimeTracker mit N' der vorherigen Messung mit Sternpunktverschiebung als Startpunkt neu
+    berechnet, mit einem Batch-Aufruf pro Durchgang. Ändert sich dabei N' einer Messung, wird die folgende im nächsten
+    Durchgang erneut berechnet, bis sich nichts mehr ändert. Das Ergebnis entspricht dem Berechnen Messung für Messung
+    mit dem NPrimeTracker: N' springt nicht bei jeder Messung zwischen mehrdeutigen Lösungen hin und her.
+
+    Rückgabewert:
+    Tupel (n_primes, shift_enabled, inn_angles) wie bei solve_scenarios.
+    """
+    n_primes, shift_enabled, inn_angles, solver = solve_scenarios(triangle_pts, scenarios, method, diagnostics=True)
+    if method != 'geometric':
+        return n_primes, shift_enabled, inn_angles
+
+    rows = np.flatnonzero(shift_enabled)
+    points = n_primes[rows]
+    u_nn = scenarios.unn_values[rows]
+    u_values = scenarios.voltages[rows]
+    ambiguous = solver.status[rows] != 'converged'
+    ambiguous[:1] = False  # Die erste Messung hat keinen Vorgänger
+    pending = np.flatnonzero(ambiguous)
+    while len(pending):
+        result = solve_n_prime_batch(triangle_pts, u_nn[pending], u_values[pending], initial_points=points[pending - 1])
+        moved = np.hypot(*(result.point - points[pending]).T) > WARM_START_TOLERANCE * (1 + np.hypot(*points[pending].T))
+        points[pending] = result.point
+        following = pending[moved] + 1
+        following = following[following < len(points)]
+        pending = following[ambiguous[following]]
+    n_primes[rows] = points
+    return n_primes, shift_enabled, inn_angles
+
+def trajectory_limits(triangle_pts, n_primes, shift_enabled):
+    """
+    Feste Achsengrenzen, in die alle N' der Zeitreihe passen (damit das Bild während der Animation nicht springt).
+    """
+    points = n_primes[shift_enabled]
+    if len(points) == 0:
+        return calculate_diagram_limits(triangle_pts, (0, 0), False)
+    low = calculate_diagram_limits(triangle_pts, points.min(axis=0), True)
+    high = calculate_diagram_limits(triangle_pts, points.max(axis=0), True)
+    return tuple((min(a[0], b[0]), max(a[1], b[1])) for a, b in zip(low, high))
+
+class TimeSeriesAnimation:
+    """
+    Animiert das Zeigerdiagramm über alle Messungen einer Zeitreihe.
+    Das Diagramm wird mit einem DiagramRenderer gezeichnet (Artists werden nur verschoben),
+    zusätzlich zeigt eine Linie den Verlauf von N' über die letzten trail Messungen.
+    """
+
+    def __init__(self, times, scenarios, n_primes, shift_enabled, inn_angles, settings=None, step=1, trail=None, fps=25, figsize=(10, 10)):
+        """
+        Parameter:
+        times: Zeit jeder Messung in Sekunden
+        scenarios: ScenarioSet mit den Messungen
+        n_primes, shift_enabled, inn_angles: Ergebnisse von solve_time_series
+        settings: dict, überschreibt Einträge aus DEFAULT_SETTINGS
+        step: int, nur jede step-te Messung als Bild anzeigen
+        trail: int, Anzahl der Messungen im angezeigten Verlauf von N' (None = gesamter bisheriger Verlauf)
+        fps: float, Bilder pro Sekunde
+        figsize: Größe der Figur in Zoll
+        """
+        self.times = np.asarray(times)
+        self.scenarios = scenarios
+        self.n_primes = np.asarray(n_primes)
+        self.shift_enabled = np.asarray(shift_enabled)
+        self.inn_angles = np.asarray(inn_angles)
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.trail = trail
+        self.fps = fps
+        self.frames = range(0, len(scenarios), max(1, step))
+
+        triangle_pts = calculate_triangle_points(self.settings['triangle_amplitude'])
+        self.fig, self.ax = plt.subplots(figsize=figsize)
+        self.renderer = DiagramRenderer(
+            self.ax,
+            triangle_pts,
+            current_scale=self.settings['current_scale'],
+            label_fontsize=self.settings['overview_label_fontsize'],
+            blit=False,
+            limits=trajectory_limits(triangle_pts, self.n_primes, self.shift_enabled)
+        )
+        self.trajectory, = self.ax.plot([], [], '-', color='gray', linewidth=1, alpha=0.7)
+        self.time_text = self.ax.text(0.02, 0.98, '', transform=self.ax.transAxes, va='top', fontsize=self.settings['overview_label_fontsize'])
+        self.animation = animation.FuncAnimation(self.fig, self.draw_frame, frames=self.frames, interval=1000 / fps,
+                                                 blit=False, repeat=False, cache_frame_data=False)
+
+    @timed('timeseries.frame')
+    def draw_frame(self, index):
+        """
+        Zeigt die Messung mit dem Index index; das Neuzeichnen übernimmt FuncAnimation.
+        """
+        scenario = self.scenarios[index]
+        self.renderer.update(self.n_primes[index], scenario.voltages, scenario.currents, scenario.angles,
+                             scenario.inn_values, self.inn_angles[index], self.shift_enabled[index], redraw=False)
+        start = 0 if self.trail is None else max(0, index - self.trail + 1)
+        visible = self.shift_enabled[start:index + 1]
+        self.trajectory.set_data(*self.n_primes[start:index + 1][visible].T)
+        self.time_text.set_text(f"t = {self.times[index]:.2f} s (Messung {index + 1} von {len(self.scenarios)})")
+        return [self.trajectory, self.time_text]
+
+    def save(self, output_path, dpi=100):
+        """
+        Exportiert die Animation als Video. Für .mp4/.mkv/.avi wird ffmpeg benötigt; ist es nicht
+        installiert, wird stattdessen ein GIF (Pillow) geschrieben.
+
+        Rückgabewert:
+        Pfad der geschriebenen Datei.
+        """
+        extension = os.path.splitext(output_path)[1].lower()
+        if extension != '.gif' and animation.writers.is_available('ffmpeg'):
+            writer = animation.FFMpegWriter(fps=self.fps)
+        else:
+            if extension != '.gif':
+                output_path = os.path.splitext(output_path)[0] + '.gif'
+                print(f"Warnung: ffmpeg ist nicht installiert, die Animation wird als GIF geschrieben: {output_path}")
+            writer = animation.PillowWriter(fps=self.fps)
+        self.animation.save(output_path, writer=writer, dpi=dpi,
+                            progress_callback=lambda i, n: print(f"\r{i + 1}/{n} Bilder", end='', flush=True))
+        print()
+        return output_path
+
+def animate_time_series(file_path, output_path=None, method='geometric', time_column=None, sample_rate=1.0, step=1, trail=None, fps=25, dpi=100, settings=None,
+                        validate='raise'):
+    """
+    Lädt ein Messprotokoll, berechnet N' mit Warmstart und animiert das Zeigerdiagramm.
+    Mit output_path wird die Animation ohne Fenster (Agg-Backend) als Video exportiert, sonst angezeigt.
+
+    Rückgabewert:
+    Pfad der geschriebenen Datei bzw. None bei der Anzeige im Fenster.
+    """
+    if output_path is not None:
+        matplotlib.use('Agg')
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    times, scenarios = load_time_series(file_path, time_column=time_column, sample_rate=sample_rate, validate=validate)
+    check_method(scenarios, method, source=file_path)
+    triangle_pts = calculate_triangle_points(settings['triangle_amplitude'])
+    n_primes, shift_enabled, inn_angles = solve_time_series(triangle_pts, scenarios, method)
+
+    player = TimeSeriesAnimation(times, scenarios, n_primes, shift_enabled, inn_angles, settings=settings, step=step, trail=trail, fps=fps)
+    if output_path is None:
+        plt.show()
+        return None
+    path = player.save(output_path, dpi=dpi)
+    plt.close(player.fig)
+    return path
@@ -0,0 +1,231 @@
+from collections import namedtuple
+import numpy as np
+
+# Ein gefundenes Problem; scenario ist die Nummer des Szenarios (1-basiert) oder None, wenn es die ganze Datei betrifft
+ValidationIssue = namedtuple('ValidationIssue', ['scenario', 'field', 'message'])
+
+# 'raise': bei Problemen ScenarioValidationError auslösen
+# 'quarantine': fehlerhafte Szenarien mit Warnung aussortieren, die übrigen weiterverwenden
+# 'off': nicht prüfen
+VALIDATION_MODES = ('raise', 'quarantine', 'off')
+
+# Bezeichnungen der Attribute des ScenarioSet in Meldungen
+FIELD_LABELS = {
+    'currents': 'Strom',
+    'angles': 'Stromwinkel',
+    'voltages': 'Spannung',
+    'unn_values': 'UNN',
+    'inn_values': 'INN',
+    'impedances': 'Impedanz'
+}
+MAGNITUDE_FIELDS = ('currents', 'voltages', 'unn_values', 'inn_values')  # Beträge, dürfen nicht negativ sein
+MAX_ANGLE = 360                # Winkel außerhalb von +-360° deuten auf vertauschte Spalten hin
+TRIANGLE_TOLERANCE = 0.05      # Erlaubte relative Verletzung der Dreiecksungleichung (Messfehler)
+MAX_LISTED_ISSUES = 50         # Höchstens so viele Probleme in der Fehlermeldung aufführen
+
+class ScenarioValidationError(ValueError):
+    """
+    Die Eingangsdaten enthalten fehlerhafte Szenarien. issues enthält alle gefundenen Probleme (ValidationIssue).
+    """
+
+    def __init__(self, issues, source=None):
+        self.issues = list(issues)
+        self.source = source
+        super().__init__(format_issues(self.issues, source))
+
+def format_issues(issues, source=None):
+    """
+    Fasst die Probleme zu einer mehrzeiligen Meldung zusammen (höchstens MAX_LISTED_ISSUES Zeilen).
+    """
+    scenarios = {issue.scenario for issue in issues if issue.scenario is not None}
+    lines = [f"{len(issues)} Problem(e){f' in {source}' if source else ''}"
+             + (f", {len(scenarios)} Szenario(s) betroffen:" if scenarios else ":")]
+    for issue in issues[:MAX_LISTED_ISSUES]:
+        prefix = "Datei" if issue.scenario is None else f"Szenario {issue.scenario}"
+        lines.append(f"- {prefix}: {issue.message}")
+    if len(issues) > MAX_LISTED_ISSUES:
+        lines.append(f"... und {len(issues) - MAX_LISTED_ISSUES} weitere")
+    return '\n'.join(lines)
+
+def check_sheets(sheet_names, required, optional_groups=()):
+    """
+    Prüft, ob alle benötigten Blätter vorhanden sind, bevor Werte gelesen werden.
+
+    Parameter:
+    sheet_names: Namen der vorhandenen Blätter
+    required: Namen der benötigten Blätter
+    optional_groups: Gruppen von Blättern, die nur gemeinsam vorkommen dürfen (z. B. Impedanzen und ihre Winkel)
+
+    Rückgabewert:
+    Liste von ValidationIssue (leer, wenn alles vorhanden ist).
+    """
+    sheet_names = set(sheet_names)
+    issues = [ValidationIssue(None, sheet, f"Blatt '{sheet}' fehlt") for sheet in required if sheet not in sheet_names]
+    for group in optional_groups:
+        present = [sheet for sheet in group if sheet in sheet_names]
+        if present and len(present) != len(group):
+            missing = ', '.join(f"'{sheet}'" for sheet in group if sheet not in sheet_names)
+            issues.append(ValidationIssue(None, missing, f"Blatt {missing} fehlt (wird zusammen mit '{present[0]}' benötigt)"))
+    return issues
+
+def check_shapes(arrays, sources=None, num_phases=None):
+    """
+    Prüft, ob alle Blätter bzw. Spaltengruppen gleich viele Szenarien und die Phasengrößen num_phases Werte enthalten.
+
+    Parameter:
+    arrays: dict Attributname -> Array (Szenarien,) bzw. (Szenarien, Phasen)
+    sources: dict Attributname -> Bezeichnung für Meldungen (z. B. Name des Blatts)
+    num_phases: int, erwartete Anzahl der Werte pro Szenario bei Strömen, Winkeln, Spannungen und Impedanzen
+                (None = Anzahl der Ströme, bei Netzen mit beliebig vielen Phasen)
+
+    Rückgabewert:
+    Liste von ValidationIssue.
+    """
+    sources = sources or {}
+    issues = []
+    if num_phases is None:
+        currents = arrays.get('currents')
+        num_phases = currents.shape[1] if currents is not None and np.ndim(currents) == 2 else 3
+    lengths = {name: len(values) for name, values in arrays.items() if values is not None}
+    expected = max(lengths.values(), key=list(lengths.values()).count) if lengths else 0  # häufigste Anzahl
+    for name, length in lengths.items():
+        source = sources.get(name, FIELD_LABELS.get(name, name))
+        if length != expected:
+            issues.append(ValidationIssue(None, name, f"'{source}' enthält {length} Szenarien, die übrigen Blätter {expected}"))
+        values = arrays[name]
+        if np.ndim(values) == 2 and values.shape[1] != num_phases:
+            issues.append(ValidationIssue(None, name, f"'{source}' enthält {values.shape[1]} Werte pro Szenario, erwartet werden {num_phases}"))
+    return issues
+
+def _phase_label(name, phase):
+    return FIELD_LABELS[name] if phase is None else f"{FIELD_LABELS[name]} L{phase + 1}"
+
+def validate_scenarios(scenarios, tolerance=TRIANGLE_TOLERANCE):
+    """
+    Prüft alle Szenarien vektorisiert auf:
+    - fehlende Werte (NaN) und unendliche Werte
+    - negative Beträge (Ströme, Spannungen, UNN, INN) und Winkel außerhalb von +-360°
+    - Impedanzen mit Betrag 0 (Millman teilt durch die Impedanzen)
+    - bei drei Phasen die Dreiecksungleichung der Spannungen U1N', U2N', U3N': Die Abstände eines Punkts N' zu den Ecken eines
+      gleichseitigen Dreiecks bilden immer selbst ein Dreieck (Satz von Pompeiu), keine Spannung darf also größer
+      sein als die Summe der beiden anderen (bis auf die relative Toleranz tolerance für Messfehler).
+
+    Parameter:
+    scenarios: ScenarioSet
+    tolerance: float, erlaubte relative Verletzung der Dreiecksungleichung
+
+    Rückgabewert:
+    Tupel (valid, issues): bool-Array (N,) der fehlerfreien Szenarien und Liste von ValidationIssue, nach Szenario sortiert.
+    """
+    numbers = scenarios.scenario_numbers()
+    valid = np.ones(len(scenarios), dtype=bool)
+    found = []  # (Maske, Feld, Funktion Zeilenindex -> Meldung)
+
+    for name in FIELD_LABELS:
+        values = getattr(scenarios, name)
+        if values is None:
+            continue
+        columns = [(None, values)] if values.ndim == 1 else [(phase, values[:, phase]) for phase in range(values.shape[1])]
+        for phase, column in columns:
+            label = _phase_label(name, phase)
+            missing = ~np.isfinite(column)
+            found.append((missing, name, lambda i, label=label, column=column: f"{label} fehlt oder ist ungültig ({column[i]})"))
+            if name in MAGNITUDE_FIELDS:
+                found.append((column < 0, name, lambda i, label=label, column=column: f"{label} ist negativ ({column[i]:g})"))
+            elif name == 'angles':
+                found.append((np.abs(column) > MAX_ANGLE, name,
+                              lambda i, label=label, column=column: f"{label} liegt außerhalb von ±{MAX_ANGLE}° ({column[i]:g}°)"))
+            elif name == 'impedances':
+                found.append((column == 0, name, lambda i, label=label: f"{label} ist 0"))
+
+    voltages = scenarios.voltages
+    if voltages.shape[1] == 3:
+        largest = voltages.max(axis=1)
+        others = voltages.sum(axis=1) - largest
+        violated = largest > (1 + tolerance) * others
+        found.append((violated, 'voltages', lambda i: (
+            f"Spannungen {', '.join(f'{u:g}' for u in voltages[i])} verletzen die Dreiecksungleichung "
+            f"(größter Wert {largest[i]:g} > Summe der anderen {others[i]:g}), es gibt keinen passenden Punkt N'"
+        )))
+
+    issues = []
+    for mask, name, message in found:
+        for i in np.flatnonzero(mask):
+            issues.append(ValidationIssue(int(numbers[i]), name, message(i)))
+        valid &= ~mask
+    issues.sort(key=lambda issue: issue.scenario)
+    return valid, issues
+
+def apply_validation(scenarios, mode='raise', source=None, tolerance=TRIANGLE_TOLERANCE):
+    """
+    Prüft die Szenarien (siehe validate_scenarios) und reagiert je nach mode (siehe VALIDATION_MODES).
+
+    Parameter:
+    scenarios: ScenarioSet
+    mode: 'raise', 'quarantine' oder 'off'
+    source: Bezeichnung der Daten für Meldungen (z. B. Dateiname)
+    tolerance: float, erlaubte relative Verletzung der Dreiecksungleichung
+
+    Rückgabewert:
+    ScenarioSet; bei 'quarantine' ohne die fehlerhaften Szenarien (die ursprünglichen Nummern bleiben in
+    scenarios.numbers erhalten). Sind alle Szenarien fehlerhaft, wird auch dann ScenarioValidationError ausgelöst
+    (bei blockweise gelesenen Daten siehe validate_chunks).
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unbekannter Prüfmodus: {mode!r} (erwartet {', '.join(VALIDATION_MODES)})")
+    if mode == 'off':
+        return scenarios
+    valid, issues = validate_scenarios(scenarios, tolerance)
+    if not issues:
+        return scenarios
+    if mode == 'raise' or not np.any(valid):
+        raise ScenarioValidationError(issues, source)
+    return quarantine(scenarios, valid, issues, source)
+
+def quarantine(scenarios, valid, issues, source=None):
+    """
+    Gibt eine Warnung mit den Problemen aus und gibt die fehlerfreien Szenarien zurück (valid siehe validate_scenarios).
+    """
+    print(f"Warnung: {format_issues(issues, source)}")
+    print(f"{np.count_nonzero(~valid)} Szenario(s) aussortiert, {np.count_nonzero(valid)} werden verwendet.")
+    return scenarios[valid]
+
+def validate_chunks(chunks, mode='raise', source=None, tolerance=TRIANGLE_TOLERANCE):
+    """
+    Prüft blockweise gelesene Szenarien (z. B. aus input_excel_data.iter_scenarios) wie apply_validation,
+    bezogen auf die ganze Datei statt auf einzelne Blöcke (Generator).
+
+    - 'raise': Ab dem ersten fehlerhaften Block werden keine Blöcke mehr zurückgegeben, die übrigen aber noch
+      geprüft; danach meldet ein ScenarioValidationError alle fehlerhaften Szenarien der Datei auf einmal.
+    - 'quarantine': Fehlerhafte Szenarien werden je Block aussortiert, vollständig fehlerhafte Blöcke übersprungen.
+      ScenarioValidationError nur, wenn in der ganzen Datei kein einziges Szenario fehlerfrei ist.
+    - 'off': Die Blöcke werden unverändert zurückgegeben.
+
+    Parameter:
+    chunks: Iterable von ScenarioSet-Blöcken
+    mode, source, tolerance: siehe apply_validation
+
+    Rückgabewert:
+    Generator über die (bereinigten) ScenarioSet-Blöcke.
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unbekannter Prüfmodus: {mode!r} (erwartet {', '.join(VALIDATION_MODES)})")
+    if mode == 'off':
+        yield from chunks
+        return
+    issues = []
+    used = 0
+    for chunk in chunks:
+        valid, chunk_issues = validate_scenarios(chunk, tolerance)
+        issues += chunk_issues
+        if mode == 'raise':
+            if not issues:
+                yield chunk
+            continue
+        if chunk_issues:
+            chunk = quarantine(chunk, valid, chunk_issues, source)
+        used += len(chunk)
+        if len(chunk):
+            yield chunk
+    if issues and (mode == 'raise' or used == 0):
+        raise ScenarioValidationError(issues, source)
@@ -1,101 +1,240 @@
 import os
+import numpy as np
 import matplotlib.pyplot as plt
-from input_excel_data import load_data_from_excel
-from plotting_functions import calculate_triangle_points, plot_diagram, calculate_inn_angle, calculate_optimal_n_prime
+from input_excel_data import load_scenarios_from_excel
+from plotting_functions import calculate_triangle_points, plot_diagram, DiagramRenderer
+from result_cache import ResultCache, compute_scenario_results, scenario_key
+from precompute import ScenarioPrecomputer
+from instrumentation import count, stage, timed
 
 class ZeigerDiagram:
-    def __init__(self):
+    def __init__(self, file_path='./data/input.xlsx', result_cache_path=None, scenario_range=None, n_prime_method='geometric', validate='raise'):
+        """
+        Parameter:
+        file_path: str, Pfad zur Excel-Datei
+        result_cache_path: str, Datei für den Ergebnis-Cache (None = nur im Speicher)
+        scenario_range: range der anzuzeigenden Szenario-Indizes (None = alle)
+        n_prime_method: Methode zur Berechnung von N' ('geometric' oder 'millman')
+        validate: Prüfung der Eingangsdaten: 'raise', 'quarantine' (fehlerhafte Szenarien aussortieren) oder 'off'
+        """
         self.fig = None
         self.ax = None
+        self.renderer = None
         self.current_index = 0
         self.global_label_fontsize = 12      # Standard-Schriftgröße für Labels
         self.overview_label_fontsize = 10     # Standard-Schriftgröße für Labels in der Übersicht
         self.global_triangle_amplitude = 50  # Amplitude des Dreiecks
         self.global_current_scale = 1.5      # Skalierung für die Strompfeile
+        self.n_prime_method = n_prime_method  # Berechnung von N': 'geometric' (Abstandsfit) oder 'millman' (Impedanzen)
 
-        # Daten aus der Excel-Datei laden
-        data = load_data_from_excel(os.path.abspath('./data/input.xlsx'))
-
-        # INN-Werte für jedes Szenario
-        self.inn_values = data['inn_values']
-
-        # Winkel von INN für jedes Szenario (initial leer)
-        self.inn_angles = [None] * len(self.inn_values)
+        # Daten aus der Excel-Datei laden (ScenarioSet mit Strömen, Winkeln, Spannungen, UNN, INN und optional Impedanzen)
+        # Die Daten werden vor jeder Berechnung geprüft
+        self.scenarios = load_scenarios_from_excel(os.path.abspath(file_path), validate=validate)
 
-        # Ströme für jedes Szenario
-        self.currents_scenarios = data['currents']
+        # Optional nur einen Bereich der Szenarien anzeigen; die Nummerierung bleibt die der Excel-Datei
+        if scenario_range is not None:
+            indices = self.scenarios.scenario_numbers() - 1
+            self.scenarios = self.scenarios[(indices >= scenario_range.start) & (indices < scenario_range.stop)]
+            if len(self.scenarios) == 0:
+                raise ValueError(f"Der Szenariobereich {scenario_range.start + 1}-{scenario_range.stop} enthält keine Szenarien der Datei {file_path}.")
 
-        # Winkel der Ströme für jedes Szenario
-        self.current_angle_scenarios = data['angles']
+        # Berechnete Ergebnisse (N', Winkel von I_NN, Pfeilgeometrie) für jedes Szenario, optional auf der Festplatte gespeichert
+        self.results = ResultCache(maxsize=max(4096, len(self.scenarios)), path=result_cache_path)
 
-        # UNN-Werte für jedes Szenario
-        self.unn_values = data['unn_values']
-
-        # Spannungswerte für jedes Szenario
-        self.voltage_values = data['voltages']
+        # Alle Szenarien im Hintergrund vorberechnen, benachbarte Szenarien zuerst
+        self.precomputer = ScenarioPrecomputer(len(self.scenarios), self.get_result_key, self.compute_results, self.results)
+        self.precomputer.start()
+        self.poll_timer = None  # Timer, der auf noch nicht berechnete Szenarien wartet
+        self.overview = None    # Seitenweise Übersicht (OverviewBrowser)
 
+    @timed('gui.on_key')
     def on_key(self, event):
         """
         Handhabt die Navigation durch die Szenarien mit den Pfeiltasten.
         """
         if event.key == 'right':  # Nächstes Szenario
-            self.current_index = (self.current_index + 1) % len(self.currents_scenarios)
+            self.current_index = (self.current_index + 1) % len(self.scenarios)
         elif event.key == 'left':  # Vorheriges Szenario
-            self.current_index = (self.current_index - 1) % len(self.currents_scenarios)
+            self.current_index = (self.current_index - 1) % len(self.scenarios)
+
+        # Vorberechnung auf die Umgebung des neuen Szenarios ausrichten
+        self.precomputer.set_focus(self.current_index)
 
         # Aktualisiere das Diagramm basierend auf dem neuen Szenario
         self.update_plot()
 
+    def scenario_title(self, index):
+        """
+        Bezeichnung eines Szenarios für Fenstertitel, z. B. 'Szenario 3 von 10'. Wird nur ein Teil der Szenarien
+        angezeigt (Bereich, aussortierte Szenarien), steht die Nummer in der Excel-Datei vorne, z. B. 'Szenario 12 (2 von 10)'.
+        """
+        number = self.scenarios[index].number
+        if number == index + 1 and self.scenarios.scenario_numbers()[-1] == len(self.scenarios):
+            return f"Szenario {number} von {len(self.scenarios)}"
+        return f"Szenario {number} ({index + 1} von {len(self.scenarios)})"
+
     def initialize_plot_data(self, index):
         """
-        Initialisiert die Werte für das aktuelle Szenario.
+        Initialisiert die Werte für das aktuelle Szenario (None, solange das Ergebnis noch im Hintergrund berechnet wird).
+        """
+        triangle_pts = calculate_triangle_points(self.global_triangle_amplitude)
+        scenario = self.scenarios[index]
+        result = self.get_result(index)
+        if result is None:
+            return None
+
+        return triangle_pts, scenario.currents, scenario.angles, scenario.voltages, scenario.inn_values, result.inn_angle, result.optimal_n_prime, result.shift_enabled
+
+    def get_result(self, index):
+        """
+        Gibt die berechneten Werte eines Szenarios aus dem Cache zurück, ohne im GUI-Thread zu rechnen
+        (None, solange das Szenario noch im Hintergrund berechnet wird). Wurde das Ergebnis aus dem Cache verdrängt,
+        wird es erneut vorberechnet; ist die Berechnung fehlgeschlagen, wird deren Exception ausgelöst.
+        """
+        result = self.results.get(self.get_result_key(index))
+        if result is None:
+            if index in self.precomputer.errors:
+                raise self.precomputer.errors[index]
+            if self.precomputer.is_done(index):
+                self.precomputer.request([index])
+        return result
+
+    def get_result_key(self, index):
+        """
+        Schlüssel eines Szenarios im Ergebnis-Cache.
+        """
+        return scenario_key(self.scenarios[index], self.global_triangle_amplitude, self.global_current_scale, self.n_prime_method)
+
+    @timed('compute.scenario_results')
+    def compute_results(self, indices):
+        """
+        Berechnet die Ergebnisse mehrerer Szenarien mit einem gemeinsamen Aufruf von solve_scenarios (für die Vorberechnung).
         """
         triangle_pts = calculate_triangle_points(self.global_triangle_amplitude)
-        current_values = self.currents_scenarios[index]
-        current_angles = self.current_angle_scenarios[index]
-        u_nn = self.unn_values[index]
-        u_values = self.voltage_values[index]
-        inn_value = self.inn_values[index]
-
-        # Berechne den Winkel von I_NN, falls noch nicht gesetzt
-        if self.inn_angles[index] is None:
-            self.inn_angles[index] = calculate_inn_angle(current_values, current_angles)
-
-        # Überprüfe, ob der berechnete Winkel von I_NN None ist, falls ja, setze ihn auf 0
-        inn_angle = self.inn_angles[index] if self.inn_angles[index] is not None else 0
-
-        # Prüfe, ob U_NN = 0 ist
-        if u_nn == 0 or u_nn is None:
-            # Keine Sternpunktverschiebung: N' bleibt N
-            optimal_n_prime = (0, 0)
-            shift_enabled = False
-        else:
-            # Berechne den verschobenen Sternpunkt
-            optimal_n_prime = calculate_optimal_n_prime(triangle_pts, u_nn, u_values)
-            shift_enabled = True
-
-        return triangle_pts, current_values, current_angles, u_values, inn_value, inn_angle, optimal_n_prime, shift_enabled
+        return compute_scenario_results(self.scenarios[np.asarray(indices)], triangle_pts, self.global_current_scale, self.n_prime_method)
 
+    @timed('gui.update_plot')
     def update_plot(self):
         """
         Aktualisiert das individuelle Diagramm basierend auf dem aktuellen Szenario (current_index).
         Falls U_NN = 0, wird keine Sternpunktverschiebung berechnet.
         """
         # Validierung von current_index
-        if self.current_index < 0 or self.current_index >= len(self.voltage_values):
+        if self.current_index < 0 or self.current_index >= len(self.scenarios):
             print(f"Warnung: current_index ({self.current_index}) ist außerhalb der gültigen Grenzen. Setze auf 0.")
             self.current_index = 0
 
-        # Falls fig oder ax nicht existieren, erstelle sie
+        # Falls fig oder ax nicht existieren, erstelle sie zusammen mit dem Renderer (Artists werden nur einmal angelegt)
         if self.fig is None or self.ax is None:
             self.fig, self.ax = plt.subplots(figsize=(16, 16))
-        else:
-            self.ax.clear()  # Lösche den Inhalt der Achse, um sie neu zu zeichnen
+            with stage('gui.create_renderer'):
+                self.renderer = DiagramRenderer(
+                    self.ax,
+                    calculate_triangle_points(self.global_triangle_amplitude),
+                    current_scale=self.global_current_scale,
+                    label_fontsize=self.global_label_fontsize
+                )
+            self.fig.canvas.mpl_connect('draw_event', lambda event: count('gui.full_redraws'))
+
+        # Aktualisiere den Fenstertitel
+        self.fig.canvas.manager.set_window_title(f"Zeigerdiagramme - {self.scenario_title(self.current_index)} (mit Pfeiltasten navigieren)")
+
+        # Nicht auf den Solver warten: solange das Szenario noch im Hintergrund berechnet wird, Platzhalter anzeigen
+        index = self.current_index
+        if index in self.precomputer.errors:
+            self.renderer.show_placeholder(f"Fehler bei der Berechnung von Szenario {self.scenarios[index].number}:\n{self.precomputer.errors[index]}")
+            return
+        result = self.get_result(index)
+        if result is None:
+            self.renderer.show_placeholder(f"Szenario {self.scenarios[index].number} wird berechnet ...")
+            self.start_polling()
+            return
+
+        # Werte und vorberechnete Pfeilgeometrie des aktuellen Szenarios
+        scenario = self.scenarios[index]
+
+        # Aktualisiere nur Koordinaten und Texte der bestehenden Artists
+        self.renderer.update(
+            optimal_n_prime=result.optimal_n_prime,
+            angles=scenario.voltages,
+            currents=scenario.currents,
+            current_angles=scenario.angles,
+            inn_value=scenario.inn_values,
+            inn_angle=result.inn_angle,
+            shift_enabled=result.shift_enabled,
+            geometry=(result.limits, result.current_arrows, result.inn_arrow)
+        )
+
+    def start_polling(self):
+        """
+        Prüft regelmäßig im GUI-Thread, ob das angezeigte Szenario fertig berechnet ist, und zeichnet es dann.
+        """
+        if self.poll_timer is None:
+            self.poll_timer = self.fig.canvas.new_timer(interval=50)
+            self.poll_timer.add_callback(self.poll_result)
+        self.poll_timer.start()
+
+    def poll_result(self):
+        index = self.current_index
+        if self.get_result_key(index) in self.results or self.precomputer.is_done(index):
+            self.poll_timer.stop()
+            self.update_plot()
+
+    def show_overview(self, rows=3, cols=4, workers=None):
+        """
+        Zeigt eine seitenweise Übersicht aller Szenarien in einem separaten Fenster.
+        Die Szenarien werden parallel als Vorschaubilder gerendert; ein Klick öffnet das Szenario in voller Größe.
+        Die Ergebnisse kommen aus dem Ergebnis-Cache. Noch nicht vorberechnete Szenarien erhalten einen Platzhalter,
+        bis die Vorberechnung sie liefert; sie wird dazu auf die angezeigte Seite ausgerichtet.
+        """
+        from overview import OverviewBrowser
+
+        n_primes = np.zeros((len(self.scenarios), 2))
+        shift_enabled = np.zeros(len(self.scenarios), dtype=bool)
+        inn_angles = np.zeros(len(self.scenarios))
+        ready = np.zeros(len(self.scenarios), dtype=bool)
+        for index in range(len(self.scenarios)):
+            try:
+                result = self.overview_result(index)
+            except Exception:
+                result = None  # Die Übersicht fragt fehlende Ergebnisse erneut ab und zeigt dann den Fehler an
+            if result is not None:
+                n_primes[index], shift_enabled[index], inn_angles[index] = result
+                ready[index] = True
+        settings = {
+            'triangle_amplitude': self.global_triangle_amplitude,
+            'current_scale': self.global_current_scale,
+            'overview_label_fontsize': self.overview_label_fontsize
+        }
+        self.overview = OverviewBrowser(self.scenarios, n_primes, shift_enabled, inn_angles, settings=settings,
+                                        rows=rows, cols=cols, workers=workers, on_open=self.open_scenario, ready=ready,
+                                        result_func=self.overview_result, on_page=lambda indices: self.precomputer.set_focus(indices[0]))
 
-        # Initialisiere die Werte für das aktuelle Szenario
-        triangle_pts, current_values, current_angles, u_values, inn_value, inn_angle, optimal_n_prime, shift_enabled = self.initialize_plot_data(self.current_index)
+        # Zeige das Diagramm
+        plt.show()
+        self.overview.close()
 
-        # Zeichne das Diagramm für das aktuelle Szenario
+    def overview_result(self, index):
+        """
+        Ergebnis eines Szenarios für die Übersicht als (optimal_n_prime, shift_enabled, inn_angle) oder None,
+        solange es noch berechnet wird (siehe get_result).
+        """
+        result = self.get_result(index)
+        return None if result is None else (result.optimal_n_prime, result.shift_enabled, result.inn_angle)
+
+    def open_scenario(self, index):
+        """
+        Öffnet ein Szenario in voller Größe in einem neuen Fenster.
+        Ist das Ergebnis inzwischen aus dem Cache verdrängt, werden die Werte der Übersicht verwendet.
+        """
+        data = self.initialize_plot_data(index)
+        if data is None:
+            scenario = self.scenarios[index]
+            optimal_n_prime, shift_enabled, inn_angle = self.overview.result(index)
+            data = (calculate_triangle_points(self.global_triangle_amplitude), scenario.currents, scenario.angles, scenario.voltages,
+                    scenario.inn_values, inn_angle, optimal_n_prime, shift_enabled)
+        triangle_pts, current_values, current_angles, u_values, inn_value, inn_angle, optimal_n_prime, shift_enabled = data
+        fig, ax = plt.subplots(figsize=(16, 16))
         plot_diagram(
             triangle_pts=triangle_pts,
             optimal_n_prime=optimal_n_prime,
@@ -106,84 +245,37 @@ class ZeigerDiagram:
             inn_angle=inn_angle,
             current_scale=self.global_current_scale,
             shift_enabled=shift_enabled,
-            ax=self.ax,  # Übergabe der bestehenden Achse
+            ax=ax,
             label_fontsize=self.global_label_fontsize
         )
-
-        # Aktualisiere den Fenstertitel
-        self.fig.canvas.manager.set_window_title(f"Zeigerdiagramme - Szenario {self.current_index + 1} von {len(self.currents_scenarios)} (mit Pfeiltasten navigieren)")
-
-        self.fig.canvas.draw_idle()  # Aktualisiere die Anzeige
-
-    def show_overview(self):
-        """
-        Zeigt eine Übersicht aller Szenarien als Subplots in einem separaten Fenster.
-        Passt die Anzahl der Zeilen und Spalten dynamisch an die Anzahl der Szenarien an.
-        """
-        # Speichere den aktuellen Wert von current_index, um ihn nach der Funktion wiederherzustellen
-        original_index = self.current_index
-
-        # Berechne die Anzahl der Szenarien
-        num_scenarios = len(self.currents_scenarios)
-
-        # Dynamisch die Anzahl der Spalten und Zeilen festlegen (z. B. maximal 4 Spalten)
-        max_cols = 4  # Maximale Anzahl an Spalten
-        cols = min(num_scenarios, max_cols)  # Weniger Spalten, wenn Szenarien < max_cols
-        rows = (num_scenarios + cols - 1) // cols  # Anzahl der notwendigen Zeilen
-
-        # Erstelle die Figur mit dynamischem Layout
-        fig, axes = plt.subplots(rows, cols, figsize=(cols * 4, rows * 4))  # Größe proportional zur Anzahl der Szenarien anpassen
-        fig.subplots_adjust(hspace=0.4, wspace=0.4)  # Abstand zwischen den Subplots
-
-        # Falls es nur eine Zeile gibt, sicherstellen, dass axes iterierbar ist
-        if rows == 1:
-            axes = [axes] if cols == 1 else axes.flatten()
-        else:
-            axes = axes.flatten()
-
-        # Iteriere durch jedes Szenario und zeichne es als Subplot
-        for idx in range(num_scenarios):
-            ax = axes[idx]  # Wähle die aktuelle Achse
-            self.current_index = idx  # Setze den aktuellen Index auf das Szenario
-
-            # Initialisiere die Werte für das aktuelle Szenario
-            triangle_pts, current_values, current_angles, u_values, inn_value, inn_angle, optimal_n_prime, shift_enabled = self.initialize_plot_data(self.current_index)
-
-            # Zeichne das Diagramm für den Subplot
-            plot_diagram(
-                triangle_pts=triangle_pts,
-                optimal_n_prime=optimal_n_prime,
-                angles=u_values,
-                currents=current_values,
-                current_angles=current_angles,
-                inn_value=inn_value,
-                inn_angle=inn_angle,
-                current_scale=self.global_current_scale,
-                shift_enabled=shift_enabled,
-                ax=ax,
-                label_fontsize=self.overview_label_fontsize
-            )
-
-            # Füge einen Titel hinzu
-            ax.set_title(f"Szenario {idx + 1}", fontsize=14)
-
-        # Deaktiviere ungenutzte Subplots (falls Szenarien < rows * cols)
-        for ax in axes[num_scenarios:]:
-            ax.axis('off')
-
-        # Ursprünglichen Index wiederherstellen
-        self.current_index = original_index
-
-        # Zeige das Diagramm
+        fig.canvas.manager.set_window_title(f"Zeigerdiagramme - {self.scenario_title(index)}")
+        fig.show()
+
+def main(file_path='./data/input.xlsx', scenario_range=None, n_prime_method='geometric', overview=True, result_cache_path=None, validate='raise'):
+    """
+    Zeigt die Diagramme interaktiv an: zuerst das Einzeldiagramm mit Pfeiltasten-Navigation,
+    nach dem Schließen des Fensters die Übersicht aller Szenarien (wenn overview gesetzt ist).
+    """
+    # Erstelle eine Instanz von ZeigerDiagram und initialisiere das erste Diagramm
+    diagram = ZeigerDiagram(file_path, result_cache_path=result_cache_path, scenario_range=scenario_range, n_prime_method=n_prime_method,
+                            validate=validate)
+    diagram.update_plot()
+
+    # Verbinde die Pfeiltasten-Navigation
+    diagram.fig.canvas.mpl_connect('key_press_event', diagram.on_key)
+
+    # Zeige das Diagramm
+    with stage('gui.event_loop'):
         plt.show()
+    if overview:
+        with stage('gui.overview'):
+            diagram.show_overview()
 
-# Erstelle eine Instanz von ZeigerDiagram und initialisiere das erste Diagramm
-diagram = ZeigerDiagram()
-diagram.update_plot()
+    diagram.precomputer.stop()
 
-# Verbinde die Pfeiltasten-Navigation
-diagram.fig.canvas.mpl_connect('key_press_event', diagram.on_key)
+    # Berechnete Ergebnisse speichern (nur wenn ein Pfad für den Ergebnis-Cache angegeben wurde)
+    if diagram.results.path is not None:
+        diagram.results.save()
 
-# Zeige das Diagramm
-plt.show()
-diagram.show_overview()
+if __name__ == "__main__":
+    main()